@@ -1,12 +1,26 @@
-from flask import Flask, render_template, request, jsonify, url_for, send_from_directory
+from flask import Flask, render_template, request, jsonify, url_for, send_from_directory, Response
 from flask_cors import CORS
 import os
-from werkzeug.utils import secure_filename
+from werkzeug.utils import secure_filename, safe_join
 import video_processor
-import threading
+import pipeline
+import process_graph
+import transcript_cache
+import job_queue
+import task_store
+import font_registry
+import media_probe
+import upload_store
+import storage_manager
+import font_store
 import uuid
+import threading
+import time
 import json
+import shutil
+import zipfile
 from urllib.request import urlopen
+from contextlib import nullcontext
 import socket
 
 app = Flask(__name__)
@@ -26,183 +40,433 @@ FONT_FOLDER = 'fonts'
 os.makedirs(FONT_FOLDER, exist_ok=True)
 app.config['FONT_FOLDER'] = FONT_FOLDER
 
-# Varsayılan birkaç açık kaynak fontu otomatik indir (yoksa)
-def ensure_default_fonts():
-    default_fonts = {
-        'Roboto-Bold.ttf': 'https://raw.githubusercontent.com/google/fonts/main/apache/roboto/Roboto-Bold.ttf',
-        'Montserrat-Bold.ttf': 'https://raw.githubusercontent.com/google/fonts/main/ofl/montserrat/Montserrat-Bold.ttf',
-        'Anton-Regular.ttf': 'https://raw.githubusercontent.com/google/fonts/main/ofl/anton/Anton-Regular.ttf',
-        'Poppins-Bold.ttf': 'https://raw.githubusercontent.com/google/fonts/main/ofl/poppins/Poppins-Bold.ttf'
-    }
-    for fname, url in default_fonts.items():
+# Varsayılan birkaç açık kaynak font; repoda gelmeyenler (yoksa) arka planda indirilir
+DEFAULT_FONTS = {
+    'Roboto-Bold.ttf': 'https://raw.githubusercontent.com/google/fonts/main/apache/roboto/Roboto-Bold.ttf',
+    'Montserrat-Bold.ttf': 'https://raw.githubusercontent.com/google/fonts/main/ofl/montserrat/Montserrat-Bold.ttf',
+    'Anton-Regular.ttf': 'https://raw.githubusercontent.com/google/fonts/main/ofl/anton/Anton-Regular.ttf',
+    'Poppins-Bold.ttf': 'https://raw.githubusercontent.com/google/fonts/main/ofl/poppins/Poppins-Bold.ttf'
+}
+# Tek bir font indirmesinde bağlantı/okuma zaman aşımı (saniye)
+FONT_DOWNLOAD_TIMEOUT_SEC = float(os.environ.get('FONT_DOWNLOAD_TIMEOUT_SEC', 10))
+# 0 ise hiç indirme yapılmaz; yalnızca fonts/ klasöründeki (repoyla gelen) fontlar kullanılır
+FONT_AUTO_DOWNLOAD = os.environ.get('FONT_AUTO_DOWNLOAD', '1').lower() not in ('0', 'false', 'no')
+
+def ensure_default_fonts(timeout=FONT_DOWNLOAD_TIMEOUT_SEC):
+    """Eksik varsayılan fontları indirir; {'ready': [...], 'missing': [...]} döndürür.
+
+    Dosya önce geçici bir ada yazılır ve tamamlanınca taşınır: yarım inen font listede
+    görünmez, aynı anda açılan worker'lar birbirinin dosyasını bozmaz.
+    """
+    result = {'ready': [], 'missing': []}
+    for fname, url in DEFAULT_FONTS.items():
         dest = os.path.join(FONT_FOLDER, fname)
-        if not os.path.exists(dest):
+        if not os.path.exists(dest) and FONT_AUTO_DOWNLOAD:
+            tmp = f"{dest}.{os.getpid()}.part"
             try:
-                with urlopen(url) as resp, open(dest, 'wb') as out:
-                    out.write(resp.read())
-            except Exception:
-                # Ağ yoksa sessiz geç
-                pass
+                with urlopen(url, timeout=timeout) as resp, open(tmp, 'wb') as out:
+                    shutil.copyfileobj(resp, out)
+                os.replace(tmp, dest)
+            except Exception as e:
+                # Ağ yoksa ya da yavaşsa geç; varsayılan font ile devam edilir
+                print(f'Font indirilemedi ({fname}):', e)
+            finally:
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+        result['ready' if os.path.exists(dest) else 'missing'].append(fname)
+    return result
+
+# Açılış: istek karşılamak için gerekmeyen işler (font indirme) worker'ı bekletmez.
+# startup_done, arka plan hazırlığı bittiğinde (başarılı ya da değil) işaretlenir.
+startup_done = threading.Event()
+_readiness = {'fonts': 'pending', 'missing_fonts': []}
+
+def _provision_fonts():
+    try:
+        result = ensure_default_fonts()
+        _readiness['missing_fonts'] = result['missing']
+        _readiness['fonts'] = 'degraded' if result['missing'] else 'ready'
+    except Exception as e:
+        print('Font hazırlığı başarısız:', e)
+        _readiness['fonts'] = 'degraded'
+    finally:
+        startup_done.set()
+
+threading.Thread(target=_provision_fonts, name='font-provisioning', daemon=True).start()
+
+# Arka plan görevlerinin durumu; yeniden başlatmada korunan depo (varsayılan SQLite)
+tasks = task_store.create_store()
+# Önceki (ölmüş) süreçte yarım kalan görevler istemcide sonsuza dek 'processing' kalmasın
+_orphaned = tasks.fail_orphaned('Sunucu yeniden başlatıldığı için görev yarıda kaldı; lütfen tekrar deneyin.')
+if _orphaned:
+    print(f'{_orphaned} yarım kalan görev hatalı olarak kapatıldı.')
+# Öldürülen kodlamalardan kalan yazım işaretleri /download'u 409'da bırakmasın
+video_processor.yarim_isaretleri_temizle(app.config['OUTPUT_FOLDER'])
+uploads = upload_store.UploadStore(app.config['UPLOAD_FOLDER'])
+# Yüklemeler, ara dosyalar ve çıktılar disk kotası içinde tutulur
+storage = storage_manager.StorageManager(
+    app.config['UPLOAD_FOLDER'], app.config['OUTPUT_FOLDER'],
+    extra_roots={
+        'segments': video_processor.SEGMENT_CACHE_DIR,
+        'fontstore': font_store.FONT_STORE_DIR,
+        'subset': font_store.FONT_SUBSET_DIR,
+        'job_dir': font_store.JOB_DIR_ROOT,
+        'probe': media_probe.PROBE_CACHE_DIR,
+    }
+)
+
+# Uzun süren akışlar (SSE durum akışı, canlı video akışı) istek süresince bir gunicorn
+# thread'i tutar. İkisinin toplamı STREAM_MAX_TOTAL ile sınırlanır ve thread sayısının
+# (GUNICORN_THREADS) yarısının altında tutulur; kalan thread'ler yükleme, önizleme ve
+# durum sorgularına kalır. Sınır aşılırsa 503 döner ve istemci sorgulamaya geçer.
+GUNICORN_THREADS = max(1, int(os.environ.get('GUNICORN_THREADS', 8)))
+STREAM_MAX_TOTAL = min(
+    int(os.environ.get('STREAM_MAX_TOTAL', 0)) or max(1, GUNICORN_THREADS // 2 - 1),
+    max(1, GUNICORN_THREADS - 2),
+)
+_all_streams = threading.BoundedSemaphore(STREAM_MAX_TOTAL)
+
+# SSE durum akışı ayarları
+SSE_MAX_STREAMS = min(int(os.environ.get('SSE_MAX_STREAMS', 0)) or STREAM_MAX_TOTAL, STREAM_MAX_TOTAL)
+SSE_MAX_STREAM_SEC = 300
+SSE_POLL_SEC = 0.5
+_sse_streams = threading.BoundedSemaphore(SSE_MAX_STREAMS)
+
+# Kodlanırken izleme (progressive çıktı) akışı ayarları
+LIVE_STREAM_MAX = min(int(os.environ.get('LIVE_STREAM_MAX', 0)) or max(1, STREAM_MAX_TOTAL // 2), STREAM_MAX_TOTAL)
+LIVE_STREAM_CHUNK_BYTES = 256 * 1024
+LIVE_STREAM_POLL_SEC = 0.25
+# Dosya bu kadar süre büyümezse yazan süreç ölmüş sayılır ve akış kapatılır
+LIVE_STREAM_STALL_SEC = 60
+_live_streams = threading.BoundedSemaphore(LIVE_STREAM_MAX)
+
+
+def _acquire_stream(kind_semaphore) -> bool:
+    """Akış türü slotunu ve ortak akış slotunu beklemeden alır; biri doluysa False."""
+    if not kind_semaphore.acquire(blocking=False):
+        return False
+    if not _all_streams.acquire(blocking=False):
+        kind_semaphore.release()
+        return False
+    return True
+
+
+def _release_stream(kind_semaphore):
+    _all_streams.release()
+    kind_semaphore.release()
+
+# Toplu iş ayarları: tek istekte en fazla video sayısı ve ortak aşama havuzlarının boyutu.
+# Havuzlardaki aşamalar yine job_queue slotlarını alır; toplu iş diğer işlerle slotları paylaşır.
+BATCH_MAX_ITEMS = int(os.environ.get('BATCH_MAX_ITEMS', 100))
+BATCH_LANES = {
+    'audio': job_queue.TRANSCRIBE_SLOTS,
+    'transcribe': job_queue.TRANSCRIBE_SLOTS,
+    'encode': job_queue.ENCODE_SLOTS,
+}
+
+def _update_task(task_id, **fields):
+    """Görev kaydını atomik olarak günceller (aşamalar paralel çalıştığı için)."""
+    return tasks.update(task_id, **fields)
+
+
+def _task_progress_reporter(task_id):
+    """Tek aşamalı görevlerde ffmpeg ilerlemesini doğrudan görev kaydına yazar."""
+    def report(percent, speed=None, eta=None):
+        fields = {}
+        if percent is not None:
+            fields['progress'] = int(percent)
+        if speed is not None:
+            fields['speed'] = round(speed, 2)
+        if eta is not None:
+            fields['eta_sec'] = int(eta)
+        if fields:
+            _update_task(task_id, **fields)
+    return report
 
-ensure_default_fonts()
 
-# Arka plan görevlerinin durumunu saklamak için global bir sözlük
-tasks = {}
+def _stream_announcer(task_id, output_path, report):
+    """progressive çıktıda ilk ilerleme bildirimiyle birlikte akış yolunu görev durumuna yazar.
+
+    İlk bildirim geldiğinde ffmpeg çıktıyı açmış ve yazım işareti konmuştur; istemci
+    /stream isteğini bundan önce yapıp eski bir dosyayı almaz.
+    """
+    announced = []
+
+    def wrapped(percent, speed=None, eta=None):
+        if not announced and task_id:
+            announced.append(True)
+            _update_task(task_id, stream_path=_web_path(output_path))
+        report(percent, speed, eta)
+    return wrapped
+
+
+def _sidecar_web_paths(video_path, task_id=None):
+    """Yumuşak altyazılı çıktının SRT/VTT/ASS yan dosyalarını kaydeder ve web yollarını döndürür."""
+    sidecars = {}
+    for fmt, path in video_processor.yan_dosya_yollari(video_path).items():
+        if os.path.exists(path):
+            storage.register(path, 'output', task_id)
+            sidecars[fmt] = _web_path(path)
+    return sidecars
+
+
+def _web_path(path):
+    """Sunucudaki dosya yolunu tarayıcının kullanacağı 'static/...' yoluna çevirir."""
+    return os.path.relpath(path, os.getcwd()).replace("\\", "/")
+
+
+# FFMPEG_THREADS ortamda verilmediyse libx264 kodlamaları slot politikasıyla sınırlanır: her slot
+# THREADS_PER_SLOT thread kullanır (havuz thread'lerindeki parça kodlamaları dahil), ek slot tutan
+# bir işin tek komutluk kodlaması tuttuğu slotlar kadar thread alır. N iş aynı anda kodlarken
+# toplam thread çekirdek sayısını aşmaz.
+_SLOT_THREAD_POLITIKASI = 'FFMPEG_THREADS' not in os.environ
+if _SLOT_THREAD_POLITIKASI:
+    video_processor.FFMPEG_THREADS = job_queue.THREADS_PER_SLOT
+
+
+def _kodlama_threadleri(slots=1):
+    """'slots' kodlama slotu tutan kodlamanın thread sınırı (FFMPEG_THREADS sabitse değişmez)."""
+    if not _SLOT_THREAD_POLITIKASI:
+        return nullcontext()
+    return video_processor.kodlama_thread_siniri(job_queue.threads_for(slots))
+
+
+def _with_encode_slot(func, parallel=False):
+    """Aşama fonksiyonunu bir ffmpeg kodlama slotu alarak çalıştırır.
+
+    parallel=True ise boştaki ek slotlar da alınır ve func'a parallel=<aralık sayısı> geçilir.
+    """
+    def wrapped(r, report):
+        with job_queue.encode_slot():
+            if not parallel:
+                with _kodlama_threadleri(1):
+                    return func(r, report)
+            with job_queue.extra_encode_slots(job_queue.MAX_PARALLEL_RANGES - 1) as extra, _kodlama_threadleri(1 + extra):
+                return func(r, report, parallel=1 + extra)
+    return wrapped
+
+
+def build_process_stages(video_path, style_options, font_path=None, task_id=None, parallel_ranges=True):
+    """İşleme akışının aşama grafiğini (process_graph) sunucunun slot ve depolarıyla kurar.
+
+    Kodlama aşamaları job_queue slotlarını, transkripsiyon transkripsiyon slotunu alır;
+    ses disk kotasına kaydedilir ve ölçümleri görev durumunda raporlanır. parallel_ranges=False
+    ise altyazı basma boştaki ek slotları almaz; toplu işte slotlar tek videoyu bölmek yerine
+    farklı videoları kodlar.
+    """
+    def on_audio_stats(stats):
+        # Yüklenen bayt, kırpılan süre ve kazanılan süre tahminleri görev durumunda raporlanır
+        if task_id:
+            _update_task(task_id, audio_stats=stats)
+
+    return process_graph.build_process_stages(
+        video_path, app.config['OUTPUT_FOLDER'], style_options, font_path,
+        with_encode_slot=lambda func, parallel=False: _with_encode_slot(func, parallel=parallel and parallel_ranges),
+        transcribe_slot=job_queue.transcribe_slot,
+        on_audio=lambda audio: storage.register(audio['path'], 'audio', task_id),
+        on_audio_stats=on_audio_stats,
+        release_audio=lambda path: storage.delete(path, reason='released'),
+        render_report=lambda output_path, report: _stream_announcer(task_id, output_path, report),
+    )
+
+
+def _complete_process_task(task_id, style_options, results):
+    """Aşama sonuçlarını kaydeder ve görevi tamamlandı olarak işaretler."""
+    final_video_path = results['render']
+    subtitles_data = results['transcribe']
+    storage.register(final_video_path, 'output', task_id)
+    storage.register(final_video_path.replace('_altyazili.mp4', '.mp4'), 'base', task_id)
+    sidecars = _sidecar_web_paths(final_video_path, task_id) if style_options.get('subtitle_mode') == 'soft' else None
+
+    # Web için göreceli yolu oluştur
+    final_video_web_path = os.path.join('static', 'outputs', os.path.basename(final_video_path)).replace("\\", "/")
+
+    _update_task(
+        task_id,
+        status='complete',
+        progress=100,
+        message='İşlem tamamlandı!',
+        video_path=final_video_web_path, # URL yerine path gönderiyoruz
+        sidecars=sidecars,
+        subtitles=subtitles_data
+    )
+
 
 def process_video_task(video_path, task_id, style_options, font_path=None): # font_path eklendi
     """Bu fonksiyon arka planda çalışacak ve video işleme adımlarını yürütecek."""
     # app.app_context() artık gerekli değil çünkü url_for kullanmıyoruz.
     try:
-        tasks[task_id] = {'status': 'processing', 'progress': 25, 'message': 'Video 9:16 boyutuna getiriliyor...'}
-        resized_video_path = video_processor.videoyu_9_16_boyutuna_getir(
-            video_path,
-            app.config['OUTPUT_FOLDER'],
-            width=style_options.get('width', 1080),
-            height=style_options.get('height', 1920),
-            crf=style_options.get('crf', 20),
-            fps=style_options.get('fps', None)
-        )
-        
-        tasks[task_id] = {'status': 'processing', 'progress': 50, 'message': 'Sesi ayrıştırılıyor...'}
-        audio_path = video_processor.sesi_ayikla(resized_video_path, app.config['OUTPUT_FOLDER'])
-        
-        tasks[task_id] = {'status': 'processing', 'progress': 75, 'message': 'Gemini AI ile altyazılar oluşturuluyor...'}
-        subtitles_data = video_processor.gemini_altyazi_olustur(audio_path)
-
-        # Zaman esnetme istenirse (ilk işlemde) uygula
-        if style_options.get('timing_relax'):
-            subtitles_data = video_processor.relax_timings(subtitles_data, start_pad_sec=0.0, end_pad_sec=0.5)
-
-        tasks[task_id] = {'status': 'processing', 'progress': 90, 'message': 'Altyazılar videoya ekleniyor...'}
-        final_video_path = video_processor.altyazilari_videoya_ekle(
-            resized_video_path, subtitles_data, app.config['OUTPUT_FOLDER'], 
-            font_path=font_path, # font_path'i aktar
-            is_bold=style_options['is_bold'],
-            has_background=style_options['has_background'],
-            bg_opacity=style_options['bg_opacity'],
-            has_animation=style_options['has_animation'],
-            margin_v=style_options['margin_v'],
-            font_size=style_options.get('font_size', 60),
-            outline_px=style_options.get('outline_px', 3),
-            shadow_px=style_options.get('shadow_px', 2),
-            alignment=style_options.get('alignment', 2),
-            crf=style_options.get('crf', 20),
-            fps=style_options.get('fps', None),
-            margin_l=style_options.get('margin_l', 80),
-            margin_r=style_options.get('margin_r', 80)
+        stages = build_process_stages(video_path, style_options, font_path, task_id)
+        results = pipeline.run_stages(
+            stages,
+            on_update=lambda update: _update_task(task_id, status='processing', **update)
         )
-        
-        # Web için göreceli yolu oluştur
-        final_video_web_path = os.path.join('static', 'outputs', os.path.basename(final_video_path)).replace("\\", "/")
-
-        tasks[task_id] = {
-            'status': 'complete', 
-            'progress': 100, 
-            'message': 'İşlem tamamlandı!',
-            'video_path': final_video_web_path, # URL yerine path gönderiyoruz
-            'subtitles': subtitles_data
-        }
+        _complete_process_task(task_id, style_options, results)
 
     except Exception as e:
-        tasks[task_id] = {'status': 'error', 'message': str(e)}
+        _update_task(task_id, status='error', message=str(e))
         try:
             print('Process task error:', e)
         except Exception:
             pass
+    finally:
+        # Aşamalardan biri hata verse de ses dosyası kalmasın
+        storage.release_job(task_id)
+        storage.unpin([video_path])
+        storage.maybe_enforce()
+
+
+def process_batch_task(batch_id, items, style_options, font_path=None):
+    """Toplu işin videolarını ortak transkripsiyon ve kodlama havuzlarında işler.
+
+    Her video kendi görev kaydını (ve /status akışını) korur; aşamaları ise BATCH_LANES
+    havuzlarında diğer videolarınkiyle birlikte sıraya girer. Böylece bir videonun
+    kodlaması sürerken sonrakilerin transkripsiyonu ilerler ve kodlama slotları boş kalmaz.
+    Bir videonun hatası diğerlerini durdurmaz.
+    """
+    paths = {item['task_id']: item['video_path'] for item in items}
+    _update_task(batch_id, status='processing', message='Toplu iş işleniyor...')
+
+    def bitti(tid, sonuc):
+        try:
+            if isinstance(sonuc, Exception):
+                raise sonuc
+            _complete_process_task(tid, style_options, sonuc)
+        except Exception as e:
+            _update_task(tid, status='error', message=str(e))
+            print(f'Toplu iş videosu {tid} hata:', e)
+        finally:
+            storage.release_job(tid)
+            storage.unpin([paths[tid]])
+
+    try:
+        graphs = {}
+        for tid, path in paths.items():
+            graphs[tid] = build_process_stages(path, style_options, font_path, tid, parallel_ranges=False)
+        pipeline.run_graphs(
+            graphs, lanes=BATCH_LANES, on_done=bitti,
+            on_update=lambda tid, update: _update_task(tid, status='processing', **update)
+        )
+    except Exception as e:
+        print('Batch task error:', e)
+    finally:
+        # Beklenmeyen bir hatada yarım kalan videolar da kapanır
+        for tid, path in paths.items():
+            task = tasks.get(tid) or {}
+            if task.get('status') not in ('complete', 'error'):
+                _update_task(tid, status='error', message='Toplu iş yarıda kaldı.')
+                storage.unpin([path])
+        batch = _batch_snapshot(batch_id)
+        ok = batch['counts'].get('complete', 0) if batch else 0
+        _update_task(
+            batch_id,
+            status='complete' if ok else 'error',
+            message=f"Toplu iş tamamlandı: {ok}/{len(batch['items']) if batch else 0} video işlendi."
+        )
+        storage.maybe_enforce()
 
 
 @app.route('/')
 def index():
     return render_template('index.html')
 
-@app.route('/process', methods=['POST'])
-def process_video():
-    if 'video' not in request.files:
-        return jsonify({'success': False, 'error': 'Video dosyası bulunamadı.'})
-    file = request.files['video']
-    if file.filename == '':
-        return jsonify({'success': False, 'error': 'Video dosyası seçilmedi.'})
+@app.route('/uploads', methods=['POST'])
+def upload_create():
+    """Parçalı yüklemeyi başlatır: {filename, size, sha256?}.
 
-    if file:
-        filename = secure_filename(file.filename)
-        uploaded_video_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(uploaded_video_path)
+    sha256 bildirilir ve aynı içerik sunucuda varsa aktarım atlanır (complete=True).
+    """
+    data = request.get_json(silent=True) or request.form
+    try:
+        result = uploads.create(data.get('filename', ''), int(data.get('size', 0)), data.get('sha256'))
+    except (ValueError, upload_store.UploadError) as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    return jsonify({'success': True, 'chunk_size': upload_store.MAX_CHUNK_BYTES, **result})
 
-        # Stilleri ve fontu formdan al
-        style_options = {
-            'has_background': request.form.get('has_background') == 'true',
-            'has_animation': request.form.get('has_animation') == 'true',
-            'is_bold': request.form.get('is_bold') == 'true',
-            'timing_relax': request.form.get('timing_relax') == 'true',
-            'bg_opacity': float(request.form.get('bg_opacity', 0.5)),
-            'margin_v': int(request.form.get('margin_v', 450)),
-            'font_size': int(request.form.get('font_size', 60)),
-            'outline_px': int(request.form.get('outline_px', 3)),
-            'shadow_px': int(request.form.get('shadow_px', 2)),
-            'alignment': int(request.form.get('alignment', 2)),
-            'crf': int(request.form.get('crf', 20)),
-            'fps': (int(request.form.get('fps')) if request.form.get('fps') and request.form.get('fps').isdigit() else None),
-            'margin_l': int(request.form.get('margin_l', 80)),
-            'margin_r': int(request.form.get('margin_r', 80))
-        }
-        res = request.form.get('resolution', '1080x1920')
-        try:
-            w, h = res.lower().split('x')
-            style_options['width'] = int(w)
-            style_options['height'] = int(h)
-        except Exception:
-            style_options['width'] = 1080
-            style_options['height'] = 1920
-        
-        font_path = None
-        selected_font = request.form.get('selected_font', '').strip()
-        if 'font_file' in request.files:
-            font_file = request.files['font_file']
-            if font_file.filename != '':
-                font_filename = secure_filename(font_file.filename)
-                font_path = os.path.join(app.config['FONT_FOLDER'], font_filename)
-                font_file.save(font_path)
-        if not font_path and selected_font:
-            candidate_path = os.path.join(app.config['FONT_FOLDER'], secure_filename(selected_font))
-            if os.path.exists(candidate_path):
-                font_path = candidate_path
+@app.route('/uploads/<upload_id>', methods=['GET'])
+def upload_status(upload_id):
+    """Yüklemenin sunucudaki konumu; bağlantı koptuysa istemci buradan devam eder."""
+    try:
+        return jsonify({'success': True, **uploads.status(upload_id)})
+    except upload_store.UploadError as e:
+        return jsonify({'success': False, 'error': str(e)}), 404
 
-        task_id = str(uuid.uuid4())
-        tasks[task_id] = {'status': 'pending', 'progress': 0, 'message': 'Görev başlatılıyor...'}
-        
-        # Görevi stil seçenekleriyle birlikte arka plan thread'inde başlat
-        thread = threading.Thread(target=process_video_task, args=(uploaded_video_path, task_id, style_options, font_path))
-        thread.start()
+@app.route('/uploads/<upload_id>', methods=['PUT'])
+def upload_chunk(upload_id):
+    """Bir parçayı ham gövde olarak alır; başlangıç konumu 'offset' parametresiyle verilir."""
+    try:
+        offset = int(request.args.get('offset', request.headers.get('Upload-Offset', -1)))
+        result = uploads.append(upload_id, offset, request.stream, request.content_length)
+    except upload_store.OffsetMismatch as e:
+        return jsonify({'success': False, 'error': str(e), 'offset': e.expected}), 409
+    except (ValueError, upload_store.UploadError) as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    return jsonify({'success': True, **result})
 
-        return jsonify({'success': True, 'task_id': task_id})
+def _job_video_path(task_id):
+    """/process isteğindeki videoyu (yükleme kimliği ya da eski multipart dosya) işe bağlar.
 
-@app.route('/status/<task_id>')
-def task_status(task_id):
-    """Bir görevin durumunu döndürür."""
-    task = tasks.get(task_id, None)
-    if not task:
-        return jsonify({'status': 'error', 'message': 'Görev bulunamadı.'})
-    return jsonify(task)
+    Dönüş: (video_yolu, hata_mesajı)
+    """
+    video_id = request.form.get('video_id', '').strip()
+    if video_id:
+        blob = uploads.resolve(video_id)
+        if not blob:
+            return None, 'Yüklenen video bulunamadı; lütfen yeniden yükleyin.'
+        original_name = request.form.get('filename', '') or video_id
+    else:
+        if 'video' not in request.files:
+            return None, 'Video dosyası bulunamadı.'
+        file = request.files['video']
+        if file.filename == '':
+            return None, 'Video dosyası seçilmedi.'
+        original_name = file.filename
+        blob = uploads.save_stream(file.stream, original_name)
+    stem = os.path.splitext(secure_filename(original_name))[0] or 'video'
+    # Aynı içerik farklı işlerde işlenirse çıktı adları çakışmasın
+    return uploads.link_for_job(blob, f"{stem}_{task_id[:8]}"), None
 
-@app.route('/reprocess', methods=['POST'])
-def reprocess_video():
-    # FormData'dan verileri al
-    video_path = request.form.get('video_path')
-    subtitles = json.loads(request.form.get('subtitles'))
-    color_map = json.loads(request.form.get('color_map'))
-    has_background = request.form.get('has_background') == 'true'
-    has_animation = request.form.get('has_animation') == 'true'
-    is_bold = request.form.get('is_bold') == 'true'
-    timing_relax = request.form.get('timing_relax') == 'true'
-    bg_opacity = float(request.form.get('bg_opacity', 0.5))
-    margin_v = int(request.form.get('margin_v', 450)) # Yeni dikey konumu al
-    font_size = int(request.form.get('font_size', 60))
-    outline_px = int(request.form.get('outline_px', 3))
-    shadow_px = int(request.form.get('shadow_px', 2))
-    alignment = int(request.form.get('alignment', 2))
-    crf = int(request.form.get('crf', 20))
-    fps = (int(request.form.get('fps')) if request.form.get('fps') and request.form.get('fps').isdigit() else None)
-    
+def _style_options_from_form():
+    """/process ve /batch formundaki ortak stil seçeneklerini ayrıştırır."""
+    style_options = {
+        'has_background': request.form.get('has_background') == 'true',
+        'has_animation': request.form.get('has_animation') == 'true',
+        'is_bold': request.form.get('is_bold') == 'true',
+        'timing_relax': request.form.get('timing_relax') == 'true',
+        'bg_opacity': float(request.form.get('bg_opacity', 0.5)),
+        'margin_v': int(request.form.get('margin_v', 450)),
+        'font_size': int(request.form.get('font_size', 60)),
+        'outline_px': int(request.form.get('outline_px', 3)),
+        'shadow_px': int(request.form.get('shadow_px', 2)),
+        'alignment': int(request.form.get('alignment', 2)),
+        'crf': int(request.form.get('crf', 20)),
+        'fps': (int(request.form.get('fps')) if request.form.get('fps') and request.form.get('fps').isdigit() else None),
+        'margin_l': int(request.form.get('margin_l', 80)),
+        'margin_r': int(request.form.get('margin_r', 80)),
+        # Tek geçişli kodlama varsayılan; 'false' gönderilirse eski iki geçişli akış kullanılır
+        'fused': request.form.get('fused_encode', 'true') != 'false',
+        'base_mode': request.form.get('base_mode', 'copy'),
+        # Kodlanırken izlenebilen (fragmented MP4) çıktı
+        'progressive': _form_flag('progressive', video_processor.PROGRESSIVE_OUTPUT),
+        # 'soft': altyazı basılmaz, ayrı iz ve SRT/VTT/ASS yan dosyaları olarak verilir
+        'subtitle_mode': request.form.get('subtitle_mode', 'burn')
+    }
+    if style_options['base_mode'] not in video_processor.BASE_MODES:
+        style_options['base_mode'] = 'copy'
+    if style_options['subtitle_mode'] not in video_processor.SUBTITLE_MODES:
+        style_options['subtitle_mode'] = 'burn'
+    res = request.form.get('resolution', '1080x1920')
+    try:
+        w, h = res.lower().split('x')
+        style_options['width'] = int(w)
+        style_options['height'] = int(h)
+    except Exception:
+        style_options['width'] = 1080
+        style_options['height'] = 1920
+    return style_options
+
+def _font_from_form():
+    """Yüklenen font dosyasını kaydeder ya da seçilen fontun yolunu döndürür (yoksa None)."""
     font_path = None
     selected_font = request.form.get('selected_font', '').strip()
     if 'font_file' in request.files:
@@ -215,6 +479,355 @@ def reprocess_video():
         candidate_path = os.path.join(app.config['FONT_FOLDER'], secure_filename(selected_font))
         if os.path.exists(candidate_path):
             font_path = candidate_path
+    return font_path
+
+@app.route('/process', methods=['POST'])
+def process_video():
+    task_id = str(uuid.uuid4())
+    uploaded_video_path, error = _job_video_path(task_id)
+    if error:
+        return jsonify({'success': False, 'error': error})
+
+    if uploaded_video_path:
+
+        # Medya bilgisi bir kez okunup önbelleğe alınır; sessiz videolar kuyruğa girmeden reddedilir
+        try:
+            media_probe.require_audio(uploaded_video_path)
+        except media_probe.NoAudioStream as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        except Exception as e:
+            print('Medya bilgisi okunamadı:', e)
+
+        # Stilleri ve fontu formdan al
+        style_options = _style_options_from_form()
+        font_path = _font_from_form()
+
+        tasks.set(task_id, {'status': 'pending', 'progress': 0, 'message': 'Görev başlatılıyor...'})
+        
+        # Kuyrukta beklerken girdi videosu silinmesin
+        storage.register(uploaded_video_path, 'job_input', task_id)
+        storage.pin([uploaded_video_path])
+
+        # Görevi stil seçenekleriyle birlikte sınırlı iş kuyruğuna ekle
+        try:
+            position = job_queue.default_queue.submit(task_id, process_video_task, uploaded_video_path, task_id, style_options, font_path)
+        except job_queue.QueueFull as e:
+            storage.unpin([uploaded_video_path])
+            _update_task(task_id, status='error', message=str(e))
+            return jsonify({'success': False, 'error': str(e)}), 429
+
+        return jsonify({'success': True, 'task_id': task_id, 'queue_position': position})
+
+@app.route('/batch', methods=['POST'])
+def batch_create():
+    """Aynı stil ayarlarıyla birden çok videoyu tek toplu iş olarak kuyruğa ekler.
+
+    Videolar 'videos' dosya alanlarıyla ya da parçalı yüklemeden gelen 'video_ids' ile
+    (tekrarlanan ya da virgülle ayrılmış alan) verilir; isteğe bağlı 'filenames' alanı
+    video_ids ile aynı sırada özgün adları taşır. Stil alanları /process ile aynıdır.
+    """
+    batch_id = str(uuid.uuid4())
+    video_ids = [v.strip() for alan in request.form.getlist('video_ids') for v in alan.split(',') if v.strip()]
+    names = request.form.getlist('filenames')
+    files = [f for f in request.files.getlist('videos') if f.filename]
+    if not video_ids and not files:
+        return jsonify({'success': False, 'error': 'Toplu iş için video bulunamadı.'}), 400
+    if len(video_ids) + len(files) > BATCH_MAX_ITEMS:
+        return jsonify({'success': False, 'error': f'Bir toplu işte en fazla {BATCH_MAX_ITEMS} video olabilir.'}), 400
+
+    sources = []
+    for i, video_id in enumerate(video_ids):
+        blob = uploads.resolve(video_id)
+        if not blob:
+            return jsonify({'success': False, 'error': f'Yüklenen video bulunamadı: {video_id}'}), 400
+        sources.append(((names[i] if i < len(names) else '') or video_id, blob))
+    for file in files:
+        sources.append((file.filename, uploads.save_stream(file.stream, file.filename)))
+
+    style_options = _style_options_from_form()
+    # Çıktılar ZIP olarak alınır; kodlanırken izleme toplu işte kullanılmaz
+    style_options['progressive'] = False
+    font_path = _font_from_form()
+
+    items, runnable = [], []
+    for name, blob in sources:
+        task_id = str(uuid.uuid4())
+        stem = os.path.splitext(secure_filename(name))[0] or 'video'
+        video_path = uploads.link_for_job(blob, f"{stem}_{task_id[:8]}")
+        storage.register(video_path, 'job_input', task_id)
+        items.append({'task_id': task_id, 'filename': name})
+        try:
+            media_probe.require_audio(video_path)
+        except media_probe.NoAudioStream as e:
+            # Sessiz video tüm toplu işi reddetmez; yalnızca o video hatalı işaretlenir
+            tasks.set(task_id, {'status': 'error', 'progress': 0, 'message': str(e), 'batch_id': batch_id})
+            continue
+        except Exception as e:
+            print('Medya bilgisi okunamadı:', e)
+        tasks.set(task_id, {'status': 'pending', 'progress': 0, 'message': 'Toplu işte sırada bekleniyor...', 'batch_id': batch_id})
+        storage.pin([video_path])
+        runnable.append({'task_id': task_id, 'video_path': video_path})
+
+    tasks.set(batch_id, {'kind': 'batch', 'status': 'pending', 'message': 'Toplu iş başlatılıyor...', 'items': items})
+    if not runnable:
+        _update_task(batch_id, status='error', message='Toplu işteki videoların hiçbiri işlenemiyor.')
+        return jsonify({'success': False, 'error': 'Toplu işteki videoların hiçbiri işlenemiyor.', 'batch_id': batch_id}), 400
+
+    # Toplu iş kuyrukta tek iş olarak yer alır
+    try:
+        position = job_queue.default_queue.submit(batch_id, process_batch_task, batch_id, runnable, style_options, font_path)
+    except job_queue.QueueFull as e:
+        storage.unpin([item['video_path'] for item in runnable])
+        for item in runnable:
+            _update_task(item['task_id'], status='error', message=str(e))
+        _update_task(batch_id, status='error', message=str(e))
+        return jsonify({'success': False, 'error': str(e)}), 429
+
+    return jsonify({'success': True, 'batch_id': batch_id, 'items': items, 'queue_position': position})
+
+def _batch_snapshot(batch_id):
+    """Toplu işin kaydını videoların güncel durumu ve toplam ilerlemeyle birlikte döndürür."""
+    batch = tasks.get(batch_id, None)
+    if not batch or batch.get('kind') != 'batch':
+        return None
+    items = []
+    counts = {}
+    for item in batch['items']:
+        task = tasks.get(item['task_id'], None) or {'status': 'error', 'message': 'Görev bulunamadı.'}
+        status = task.get('status', 'pending')
+        counts[status] = counts.get(status, 0) + 1
+        items.append(dict(
+            item, status=status, message=task.get('message', ''),
+            progress=100 if status == 'complete' else int(task.get('progress') or 0),
+            video_path=task.get('video_path'), sidecars=task.get('sidecars')
+        ))
+    batch = dict(batch, items=items, counts=counts)
+    # Hatalı videolar da bitmiş sayılır; toplam ilerleme bekleyen işi gösterir
+    batch['progress'] = int(sum(100 if i['status'] == 'error' else i['progress'] for i in items) / (len(items) or 1))
+    position = job_queue.default_queue.position(batch_id)
+    if position is not None:
+        batch.update(queue_position=position, message=f'Sırada bekleniyor ({position}. sıra)...')
+    return batch
+
+@app.route('/batch/<batch_id>')
+def batch_status(batch_id):
+    """Toplu işin toplam ve video başına ilerlemesi."""
+    batch = _batch_snapshot(batch_id)
+    if not batch:
+        return jsonify({'status': 'error', 'message': 'Toplu iş bulunamadı.'}), 404
+    return jsonify(batch)
+
+class _ZipBuffer:
+    """zipfile'ın yazdığı baytları biriktirir; ZIP akışı her parçadan sonra boşaltır."""
+
+    def __init__(self):
+        self._parts = []
+
+    def write(self, data):
+        self._parts.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._parts)
+        self._parts.clear()
+        return data
+
+def _zip_stream(entries):
+    """(arşiv_adı, dosya_yolu) listesini sıkıştırmadan, parça parça ZIP olarak akıtır.
+
+    Videolar zaten sıkıştırılmış olduğundan ZIP_STORED kullanılır; arşiv bellekte ya da
+    diskte kurulmaz, her LIVE_STREAM_CHUNK_BYTES parçası okunduğu gibi gönderilir.
+    """
+    buffer = _ZipBuffer()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_STORED, allowZip64=True) as zf:
+        for arcname, path in entries:
+            try:
+                info = zipfile.ZipInfo.from_file(path, arcname)
+                src = open(path, 'rb')
+            except OSError:
+                # Kota temizliğiyle silinmiş dosya arşive girmez
+                continue
+            with src, zf.open(info, 'w', force_zip64=info.file_size > zipfile.ZIP64_LIMIT) as dst:
+                for chunk in iter(lambda: src.read(LIVE_STREAM_CHUNK_BYTES), b''):
+                    dst.write(chunk)
+                    data = buffer.drain()
+                    if data:
+                        yield data
+            yield buffer.drain()
+    yield buffer.drain()
+
+def _batch_zip_entries(batch):
+    """Tamamlanan videoların çıktıları (ve yan dosyaları) için benzersiz arşiv adları."""
+    entries = []
+    used = set()
+    for item in batch['items']:
+        if item['status'] != 'complete' or not item.get('video_path'):
+            continue
+        stem = os.path.splitext(secure_filename(item['filename']))[0] or 'video'
+        name, n = stem, 1
+        while name in used:
+            n += 1
+            name = f"{stem}_{n}"
+        used.add(name)
+        entries.append((f"{name}.mp4", os.path.join(app.config['OUTPUT_FOLDER'], os.path.basename(item['video_path']))))
+        for fmt, web_path in (item.get('sidecars') or {}).items():
+            entries.append((f"{name}.{fmt}", os.path.join(app.config['OUTPUT_FOLDER'], os.path.basename(web_path))))
+    return entries
+
+@app.route('/batch/<batch_id>/download')
+def batch_download(batch_id):
+    """Toplu işin çıktılarını tek bir ZIP olarak akıtır.
+
+    İş sürerken 409 döner; partial=true ile o ana kadar tamamlanan videolar alınabilir.
+    Akış sürdükçe dosyalar kota temizliğine karşı sabitlenir.
+    """
+    batch = _batch_snapshot(batch_id)
+    if not batch:
+        return jsonify({'success': False, 'error': 'Toplu iş bulunamadı.'}), 404
+    if batch['status'] not in ('complete', 'error') and request.args.get('partial') != 'true':
+        return jsonify({'success': False, 'error': 'Toplu iş henüz tamamlanmadı.', 'progress': batch['progress']}), 409
+    entries = _batch_zip_entries(batch)
+    if not entries:
+        return jsonify({'success': False, 'error': 'İndirilecek tamamlanmış video yok.'}), 404
+    paths = [path for _, path in entries]
+    storage.pin(paths)
+    response = Response(_zip_stream(entries), mimetype='application/zip', headers={
+        'Content-Disposition': f'attachment; filename="batch_{batch_id[:8]}.zip"',
+        'X-Accel-Buffering': 'no',
+    })
+    response.call_on_close(lambda: storage.unpin(paths))
+    return response
+
+@app.route('/status/<task_id>')
+def task_status(task_id):
+    """Bir görevin durumunu döndürür.
+
+    Altyazı listesi ayrı saklanır ve yalnızca görev tamamlandığında eklenir; işlem
+    sürerken yapılan sorgular küçük kalır.
+    """
+    task = _task_snapshot(task_id)
+    if not task:
+        return jsonify({'status': 'error', 'message': 'Görev bulunamadı.'})
+    if task.get('status') == 'complete':
+        subtitles = tasks.get_subtitles(task_id)
+        if subtitles is not None:
+            task['subtitles'] = subtitles
+    return jsonify(task)
+
+def _task_snapshot(task_id):
+    """Görev kaydını (altyazısız) kuyruk sırasıyla birlikte döndürür."""
+    task = tasks.get(task_id, None)
+    if not task:
+        return None
+    position = job_queue.default_queue.position(task_id)
+    if position is not None:
+        task = dict(task, queue_position=position, message=f'Sırada bekleniyor ({position}. sıra)...')
+    return task
+
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+@app.route('/status/<task_id>/stream')
+def task_status_stream(task_id):
+    """Görev durumunu Server-Sent Events ile iter.
+
+    Yalnızca değişen alanlar ('status' olayı) gönderilir; altyazı listesi tamamlanınca
+    bir kez 'complete' olayıyla gelir. Her akış bir thread tuttuğu için SSE_MAX_STREAMS ve
+    ortak STREAM_MAX_TOTAL ile sınırlıdır; sınır aşılırsa 503 döner ve istemci sorgulamaya geçer.
+    Uzun akışlar SSE_MAX_STREAM_SEC sonra kapatılır; EventSource kendiliğinden yeniden bağlanır.
+    """
+    if not _acquire_stream(_sse_streams):
+        return jsonify({'status': 'error', 'message': 'Çok fazla açık durum akışı; sorgulamaya geçin.'}), 503
+
+    def generate():
+        try:
+            last = {}
+            started = time.time()
+            last_sent = started
+            # Tarayıcı bağlantı koparsa bu aralıkla yeniden dener
+            yield "retry: 2000\n\n"
+            while True:
+                task = _task_snapshot(task_id)
+                if not task:
+                    yield _sse('error', {'status': 'error', 'message': 'Görev bulunamadı.'})
+                    return
+                changed = {k: v for k, v in task.items() if last.get(k) != v}
+                if task.get('status') == 'complete':
+                    task['subtitles'] = tasks.get_subtitles(task_id) or []
+                    yield _sse('complete', task)
+                    return
+                if task.get('status') == 'error':
+                    yield _sse('error', task)
+                    return
+                now = time.time()
+                if changed:
+                    last = task
+                    last_sent = now
+                    yield _sse('status', changed)
+                elif now - last_sent > 15:
+                    # Ara sunucuların bağlantıyı kesmemesi için yorum satırı
+                    last_sent = now
+                    yield ": keepalive\n\n"
+                if now - started > SSE_MAX_STREAM_SEC:
+                    return
+                time.sleep(SSE_POLL_SEC)
+        finally:
+            _release_stream(_sse_streams)
+
+    return Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',
+    })
+
+def _form_flag(name, default=False):
+    """'true'/'false' form alanını okur; alan yoksa varsayılanı döndürür."""
+    value = request.form.get(name)
+    if value is None or value == '':
+        return default
+    return value == 'true'
+
+def _editor_form():
+    """Editörden gelen (yeniden işleme / önizleme) form alanlarını ayrıştırır.
+
+    Dönüş: (alanlar, hata_mesajı). Taban video bulunamazsa alanlar None olur.
+    """
+    # FormData'dan verileri al
+    video_path = request.form.get('video_path')
+    form = {
+        'subtitles': json.loads(request.form.get('subtitles')),
+        'color_map': json.loads(request.form.get('color_map')),
+        'has_background': request.form.get('has_background') == 'true',
+        'has_animation': request.form.get('has_animation') == 'true',
+        'is_bold': request.form.get('is_bold') == 'true',
+        'timing_relax': request.form.get('timing_relax') == 'true',
+        'bg_opacity': float(request.form.get('bg_opacity', 0.5)),
+        'margin_v': int(request.form.get('margin_v', 450)), # Yeni dikey konumu al
+        'font_size': int(request.form.get('font_size', 60)),
+        'outline_px': int(request.form.get('outline_px', 3)),
+        'shadow_px': int(request.form.get('shadow_px', 2)),
+        'alignment': int(request.form.get('alignment', 2)),
+        'crf': int(request.form.get('crf', 20)),
+        'fps': (int(request.form.get('fps')) if request.form.get('fps') and request.form.get('fps').isdigit() else None),
+        'progressive': _form_flag('progressive', video_processor.PROGRESSIVE_OUTPUT),
+        'subtitle_mode': request.form.get('subtitle_mode', 'burn'),
+    }
+    if form['subtitle_mode'] not in video_processor.SUBTITLE_MODES:
+        form['subtitle_mode'] = 'burn'
+    # Taban stream-copy ile saklanmış olabilir; ölçekleme zinciri burada uygulanır
+    width, height = None, None
+    res = request.form.get('resolution', '')
+    if res:
+        try:
+            w, h = res.lower().split('x')
+            width, height = int(w), int(h)
+        except Exception:
+            width, height = None, None
+    form['width'], form['height'] = width, height
+
+    form['font_path'] = _font_from_form()
 
     # Gelen yol 'static/' ile başlıyorsa, onu sistem yoluna çevir
     if video_path.startswith('static/'):
@@ -224,47 +837,196 @@ def reprocess_video():
 
     # Orijinal _9x16.mp4 dosyasını bulmalıyız, _altyazili.mp4'ü değil.
     base_video_path = system_video_path.replace('_altyazili.mp4', '.mp4')
+    if not os.path.exists(base_video_path):
+        return None, 'Taban video bulunamadı (base_mode=none ile işlenmiş olabilir). Videoyu yeniden yükleyin.'
+    form['video_path'] = base_video_path
+    return form, None
+
+def _reprocess_inputs(base_video_path):
+    """Yeniden işlemenin ihtiyaç duyduğu dosyalar: taban video ve artımlı parçaları."""
+    return [base_video_path, video_processor._segment_klasoru(base_video_path)]
+
+@app.route('/reprocess', methods=['POST'])
+def reprocess_video():
+    form, error = _editor_form()
+    if error:
+        return jsonify({'success': False, 'error': error})
 
     task_id = str(uuid.uuid4())
-    tasks[task_id] = {'status': 'pending', 'message': 'Değişiklikler uygulanıyor...'}
+    tasks.set(task_id, {'status': 'pending', 'message': 'Değişiklikler uygulanıyor...'})
+    # Bekleyen yeniden işleme tabanı ve parçalarını kullanır; kota temizliği bunları silmesin
+    storage.pin(_reprocess_inputs(form['video_path']))
     
-    # Yeniden işleme görevini arka planda başlat
-    thread = threading.Thread(target=reprocess_video_task, args=(
-        base_video_path, subtitles, color_map, font_path, has_background, has_animation, is_bold, timing_relax, bg_opacity, margin_v, font_size, outline_px, shadow_px, alignment, crf, fps, task_id
-    ))
-    thread.start()
+    # Yeniden işleme görevini sınırlı iş kuyruğuna ekle
+    try:
+        position = job_queue.default_queue.submit(task_id, reprocess_video_task, task_id=task_id, **form)
+    except job_queue.QueueFull as e:
+        storage.unpin(_reprocess_inputs(form['video_path']))
+        _update_task(task_id, status='error', message=str(e))
+        return jsonify({'success': False, 'error': str(e)}), 429
+
+    return jsonify({'success': True, 'task_id': task_id, 'queue_position': position})
 
-    return jsonify({'success': True, 'task_id': task_id})
+# Önizleme isteğinde en fazla bu kadar kare üretilir
+PREVIEW_MAX_STILLS = 8
+PREVIEW_MAX_WINDOW_SEC = 10.0
+
+@app.route('/preview', methods=['POST'])
+def preview_style():
+    """Stil değişikliğini tüm videoyu kodlamadan gösterir.
+
+    mode=stills: seçilen zamanlarda (timestamps, yoksa count kadar altyazı ortası) JPEG kareler.
+    mode=window: 'at' saniyesi çevresinde window_sec uzunluğunda düşük çözünürlüklü klip.
+    """
+    form, error = _editor_form()
+    if error:
+        return jsonify({'success': False, 'error': error})
+    mode = request.form.get('mode', 'stills')
+    if mode not in ('stills', 'window'):
+        return jsonify({'success': False, 'error': "Geçersiz mode (stills veya window olmalı)."})
+    try:
+        scale = min(1.0, max(0.1, float(request.form.get('scale', video_processor.PREVIEW_SCALE))))
+    except ValueError:
+        scale = video_processor.PREVIEW_SCALE
+
+    subtitles = form['subtitles']
+    if form['timing_relax']:
+        subtitles = video_processor.relax_timings(subtitles, start_pad_sec=0.0, end_pad_sec=0.5)
+    stil = process_graph.style_kwargs(form, form['font_path'])
+    # Önizleme kendi kodlama ayarlarını kullanır
+    stil.pop('crf')
+    stil.pop('fps')
+    stil['color_map'] = form['color_map']
+    preview_id = uuid.uuid4().hex
+    output_folder = os.path.join(app.config['OUTPUT_FOLDER'], 'previews', preview_id)
+
+    try:
+        # Önizleme etkileşimlidir: boş kodlama slotu yoksa istek thread'i bekletilmez
+        with job_queue.try_encode_slot() as slot, storage.in_use(form['video_path']), _kodlama_threadleri(1):
+            if not slot:
+                return jsonify({'success': False, 'error': 'Tüm kodlama slotları dolu; önizlemeyi birazdan tekrar deneyin.'}), 429
+            if mode == 'stills':
+                zamanlar = request.form.get('timestamps', '').strip()
+                if zamanlar:
+                    zamanlar = [float(t) for t in zamanlar.split(',') if t.strip()][:PREVIEW_MAX_STILLS]
+                else:
+                    adet = min(PREVIEW_MAX_STILLS, int(request.form.get('count', 4)))
+                    zamanlar = video_processor.onizleme_zamanlari_sec(subtitles, adet)
+                dosyalar = video_processor.onizleme_kareleri_olustur(
+                    form['video_path'], subtitles, output_folder, zamanlar,
+                    width=form['width'], height=form['height'], scale=scale, **stil
+                )
+                storage.register(output_folder, 'preview')
+                items = [{'time': t, 'image_path': _web_path(d)} for t, d in zip(zamanlar, dosyalar)]
+                return jsonify({'success': True, 'mode': mode, 'stills': items})
+            sure = min(PREVIEW_MAX_WINDOW_SEC, float(request.form.get('window_sec', 4.0)))
+            at = request.form.get('at')
+            merkez = float(at) if at else video_processor.onizleme_zamanlari_sec(subtitles, 1)[0]
+            klip = video_processor.onizleme_klibi_olustur(
+                form['video_path'], subtitles, output_folder, merkez, sure=sure,
+                width=form['width'], height=form['height'], scale=scale, **stil
+            )
+            storage.register(output_folder, 'preview')
+            return jsonify({'success': True, 'mode': mode, 'clip_path': _web_path(klip), 'start': max(0.0, merkez - sure / 2.0)})
+    except ValueError as e:
+        return jsonify({'success': False, 'error': f"Geçersiz önizleme parametresi: {e}"})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)})
 
 @app.route('/api/fonts', methods=['GET'])
 def list_fonts():
-    """Sunucudaki fonts/ klasöründe bulunan fontları listeler."""
-    fonts_dir = app.config['FONT_FOLDER']
+    """Sunucudaki fonts/ klasöründe bulunan fontları listeler (meta veriler önbellekten)."""
     items = []
     try:
-        for f in os.listdir(fonts_dir):
-            if f.lower().endswith(('.ttf', '.otf')):
-                full_path = os.path.join(fonts_dir, f)
-                try:
-                    family = video_processor._read_font_family_name(full_path)  # type: ignore
-                except Exception:
-                    family = os.path.splitext(f)[0]
-                items.append({'file': f, 'family': family})
-        items.sort(key=lambda it: os.path.getmtime(os.path.join(fonts_dir, it['file'])), reverse=True)
+        items = [
+            {'file': it['file'], 'family': it['family']}
+            for it in font_registry.get_default_registry().list_fonts()
+        ]
     except Exception:
         pass
     return jsonify({'fonts': items})
 
+@app.route('/api/cache', methods=['GET'])
+def cache_stats():
+    """Transkripsiyon ve medya bilgisi önbelleklerinin isabet/ıska sayaçlarını döndürür."""
+    return jsonify({
+        'transcripts': transcript_cache.get_default_cache().stats(),
+        'probes': media_probe.get_default_cache().stats(),
+    })
+
+@app.route('/api/storage', methods=['GET'])
+def storage_stats():
+    """Yönetilen klasörlerin tür bazında disk kullanımı, kota ve silme sayaçları."""
+    return jsonify(storage.usage())
+
 @app.route('/download/<path:filename>')
 def download_output(filename: str):
-    """İşlenmiş videoyu tarayıcıya indirtecek uç nokta."""
+    """İşlenmiş videoyu tarayıcıya indirtecek uç nokta (Range istekleri desteklenir)."""
     directory = app.config['OUTPUT_FOLDER']
+    path = safe_join(directory, filename)
+    if path and video_processor.yaziliyor_mu(path):
+        return jsonify({'success': False, 'error': 'Video hâlâ kodlanıyor; tamamlanınca indirilebilir.'}), 409
+    storage.touch(os.path.join(directory, filename))
     return send_from_directory(directory, filename, as_attachment=True)
 
-def reprocess_video_task(video_path, subtitles, color_map, font_path, has_background, has_animation, is_bold, timing_relax, bg_opacity, margin_v, font_size, outline_px, shadow_px, alignment, crf, fps, task_id):
-    """Sadece altyazıları yeniden basan arka plan görevi."""
+def _growing_file(path):
+    """Yazılmakta olan dosyayı büyüdükçe okur; yazım bitip dosya sonuna gelince durur."""
+    f = None
+    last_growth = time.time()
     try:
-        tasks[task_id] = {'status': 'processing', 'progress': 50, 'message': 'Yeni altyazılar videoya ekleniyor...'}
+        while True:
+            if f is None:
+                try:
+                    f = open(path, 'rb')
+                except FileNotFoundError:
+                    pass
+            chunk = f.read(LIVE_STREAM_CHUNK_BYTES) if f else b''
+            if chunk:
+                last_growth = time.time()
+                yield chunk
+                continue
+            if not video_processor.yaziliyor_mu(path):
+                # İşaret kalkmadan hemen önce yazılan son parçalar
+                if f:
+                    yield from iter(lambda: f.read(LIVE_STREAM_CHUNK_BYTES), b'')
+                return
+            if time.time() - last_growth > LIVE_STREAM_STALL_SEC:
+                return
+            time.sleep(LIVE_STREAM_POLL_SEC)
+    finally:
+        if f:
+            f.close()
+
+@app.route('/stream/<path:filename>')
+def stream_output(filename: str):
+    """Çıktıyı tarayıcıda oynatmak için sunar.
+
+    Kodlama sürerken (progressive mod) fragmented MP4 dosyası büyüdükçe parça parça
+    gönderilir; oynatma ilk parçalar yazılır yazılmaz başlar. Tamamlanmış dosyalar Range
+    istekleriyle (206) sunulur, böylece tarayıcı ileri sarabilir. Canlı akışlar LIVE_STREAM_MAX
+    ve ortak STREAM_MAX_TOTAL ile sınırlıdır; aşılırsa 503 döner ve istemci tamamlanmayı bekler.
+    """
+    directory = app.config['OUTPUT_FOLDER']
+    path = safe_join(directory, filename)
+    if path is None:
+        return jsonify({'success': False, 'error': 'Dosya bulunamadı.'}), 404
+    if not video_processor.yaziliyor_mu(path):
+        storage.touch(path)
+        return send_from_directory(directory, filename, conditional=True)
+    if not _acquire_stream(_live_streams):
+        return jsonify({'success': False, 'error': 'Çok fazla açık video akışı; video tamamlanınca gösterilecek.'}), 503
+    response = Response(_growing_file(path), mimetype='video/mp4', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',
+    })
+    # Üreteç hiç başlamadan bağlantı kapansa da slot geri verilir
+    response.call_on_close(lambda: _release_stream(_live_streams))
+    return response
+
+def reprocess_video_task(video_path, subtitles, color_map, font_path, has_background, has_animation, is_bold, timing_relax, bg_opacity, margin_v, font_size, outline_px, shadow_px, alignment, crf, fps, task_id, width=None, height=None, progressive=False, subtitle_mode='burn'):
+    """Sadece altyazıları yeniden basan (subtitle_mode='soft' ise iz olarak ekleyen) arka plan görevi."""
+    try:
+        _update_task(task_id, status='processing', progress=0, message='Yeni altyazılar videoya ekleniyor...')
         
         # Orijinal video yolundan (_9x16.mp4) yola çıkarak dosya adlarını oluştur
         base_video_path = video_path.replace(os.getcwd() + os.sep, '') # Mutlak yolu göreceli yap
@@ -273,29 +1035,102 @@ def reprocess_video_task(video_path, subtitles, color_map, font_path, has_backgr
         if timing_relax:
             subtitles = video_processor.relax_timings(subtitles, start_pad_sec=0.0, end_pad_sec=0.5)
 
-        final_video_path = video_processor.altyazilari_videoya_ekle(
-            base_video_path, subtitles, app.config['OUTPUT_FOLDER'], 
-            color_map, font_path, has_background, has_animation, is_bold, bg_opacity, margin_v,
+        stil = dict(
             font_size=font_size, outline_px=outline_px, shadow_px=shadow_px, alignment=alignment,
-            crf=crf, fps=fps
+            crf=crf, fps=fps, width=width, height=height,
+            on_progress=_task_progress_reporter(task_id)
         )
+        segment_stats = None
+        sidecars = None
+        if subtitle_mode == 'soft':
+            # Altyazı izi ve yan dosyalar yeniden yazılır; görüntü (gerekmedikçe) kodlanmaz
+            with job_queue.encode_slot(), _kodlama_threadleri(1):
+                final_video_path, _ = video_processor.yumusak_altyazi_ekle(
+                    base_video_path, subtitles, app.config['OUTPUT_FOLDER'],
+                    color_map, font_path, has_background, has_animation, is_bold, bg_opacity, margin_v, **stil
+                )
+            sidecars = _sidecar_web_paths(final_video_path, task_id)
+        else:
+            with job_queue.encode_slot(), job_queue.extra_encode_slots(job_queue.MAX_PARALLEL_RANGES - 1) as extra, \
+                    _kodlama_threadleri(1 + extra):
+                stil['parallel'] = 1 + extra
+                final_video_path = None
+                if video_processor.REPROCESS_INCREMENTAL:
+                    # Yalnızca altyazısı/stili değişen parçalar yeniden kodlanır
+                    try:
+                        final_video_path, segment_stats = video_processor.artimli_altyazi_ekle(
+                            base_video_path, subtitles, app.config['OUTPUT_FOLDER'],
+                            color_map, font_path, has_background, has_animation, is_bold, bg_opacity, margin_v, **stil
+                        )
+                    except Exception as e:
+                        print('Artımlı yeniden işleme başarısız, tüm video kodlanacak:', e)
+                if final_video_path is None:
+                    if progressive:
+                        # Tüm video kodlanacaksa editör sonucu kodlama sürerken oynatabilir
+                        stil['progressive'] = True
+                        stil['on_progress'] = _stream_announcer(task_id, os.path.join(
+                            app.config['OUTPUT_FOLDER'], f"{os.path.splitext(os.path.basename(base_video_path))[0]}_altyazili.mp4"
+                        ), stil['on_progress'])
+                    final_video_path = video_processor.altyazilari_videoya_ekle(
+                        base_video_path, subtitles, app.config['OUTPUT_FOLDER'], 
+                        color_map, font_path, has_background, has_animation, is_bold, bg_opacity, margin_v, **stil
+                    )
         
+        storage.register(final_video_path, 'output', task_id)
+        storage.register(_reprocess_inputs(video_path)[1], 'segments', task_id)
         final_video_web_path = os.path.join('static', 'outputs', os.path.basename(final_video_path)).replace("\\", "/")
 
-        tasks[task_id] = {
-            'status': 'complete',
-            'progress': 100,
-            'message': 'Değişiklikler başarıyla uygulandı!',
-            'video_path': final_video_web_path,
-            'subtitles': subtitles
-        }
+        _update_task(
+            task_id,
+            status='complete',
+            progress=100,
+            message='Değişiklikler başarıyla uygulandı!',
+            video_path=final_video_web_path,
+            segments=segment_stats,
+            sidecars=sidecars,
+            subtitles=subtitles
+        )
     except Exception as e:
-        tasks[task_id] = {'status': 'error', 'message': str(e)}
+        _update_task(task_id, status='error', message=str(e))
         try:
             print('Reprocess task error:', e)
         except Exception:
             pass
+    finally:
+        storage.unpin(_reprocess_inputs(video_path))
+        storage.maybe_enforce()
+
+
+@app.route('/healthz')
+def healthz():
+    """Canlılık: süreç istek karşılayabiliyor mu (hiçbir bağımlılığa bakılmaz)."""
+    return jsonify({'status': 'ok'})
+
+def _readiness_checks():
+    checks = {}
+    try:
+        tasks.get('__readyz__')
+        checks['task_store'] = 'ok'
+    except Exception as e:
+        checks['task_store'] = f'error: {e}'
+    checks['ffmpeg'] = 'ok' if shutil.which('ffmpeg') else 'missing'
+    checks['output_folder'] = 'ok' if os.access(app.config['OUTPUT_FOLDER'], os.W_OK) else 'not writable'
+    checks['fonts'] = _readiness['fonts']
+    return checks
+
+@app.route('/readyz')
+def readyz():
+    """Hazırlık: açılış hazırlığı bitti ve işleme için gereken bağımlılıklar erişilebilir mi.
 
+    Eksik varsayılan fontlar hazırlığı engellemez ('degraded'); altyazılar varsayılan
+    fontla basılır. Hazır değilse 503 döner.
+    """
+    checks = _readiness_checks()
+    ready = startup_done.is_set() and all(checks[k] == 'ok' for k in ('task_store', 'ffmpeg', 'output_folder'))
+    body = {'ready': ready, 'checks': checks}
+    if _readiness['missing_fonts']:
+        body['missing_fonts'] = _readiness['missing_fonts']
+    return jsonify(body), (200 if ready else 503)
 
 @app.route('/api/host', methods=['GET'])
 def host_info():
@@ -0,0 +1,287 @@
+"""Sıcak yolların elle çalıştırılan ölçümleri.
+
+Kullanım:
+    python benchmark.py ass [--max 100000]
+    python benchmark.py cues [--max 100000]
+    python benchmark.py batch [--clips 50]
+    python benchmark.py startup [--repeat 5]
+
+Sentetik veriyle çalışır; ffmpeg, ağ veya API anahtarı gerekmez.
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+
+def _sentetik_altyazilar(adet: int, seed: int = 7) -> list:
+    """Üç konuşmacılı, ardışık, iki satırlı metinler içeren altyazı listesi."""
+    rnd = random.Random(seed)
+    konusmacilar = ['Konuşmacı 1', 'Konuşmacı 2', 'Konuşmacı 3']
+    subs = []
+    t = 0.0
+    for i in range(adet):
+        sure = 0.8 + rnd.random() * 2.5
+        subs.append({
+            'start': round(t, 3),
+            'end': round(t + sure, 3),
+            'speaker': konusmacilar[i % len(konusmacilar)],
+            'text': f"Altyazı satırı {i} biraz uzun bir cümle\nikinci satır",
+        })
+        t += sure + rnd.random() * 0.4
+    return subs
+
+
+def _boyutlar(en_fazla: int) -> list:
+    boyutlar = []
+    n = 1000
+    while n < en_fazla:
+        boyutlar.append(n)
+        n *= 10
+    return boyutlar + [en_fazla]
+
+
+def bench_ass(en_fazla: int = 100000, tekrar: int = 3) -> None:
+    """generate_ass_file: altyazı sayısına göre süre ve yazım sırasındaki bellek tepe değeri.
+
+    Doğrusal ölçeklemede altyazı başına süre (us/altyazı) boyuttan bağımsız kalır.
+    Olaylar dosyaya akıtıldığı için bellek tepe değeri çıktı boyutuyla büyümez.
+    """
+    import video_processor
+
+    # Font ve stil render başına bir kez çözülür; ölçüme dahil edilmez
+    stil = video_processor.ass_stilini_coz(None, has_background=True, is_bold=True)
+    with tempfile.TemporaryDirectory() as tmp:
+        cikti = os.path.join(tmp, 'bench.ass')
+        print(f"{'altyazı':>9} {'süre (ms)':>10} {'us/altyazı':>11} {'tepe bellek (KB)':>17} {'dosya (KB)':>11}")
+        for adet in _boyutlar(en_fazla):
+            subs = _sentetik_altyazilar(adet)
+            en_iyi = None
+            for _ in range(tekrar):
+                t0 = time.perf_counter()
+                video_processor.generate_ass_file(subs, cikti, has_animation=True, stil=stil)
+                gecen = time.perf_counter() - t0
+                en_iyi = gecen if en_iyi is None else min(en_iyi, gecen)
+            tracemalloc.start()
+            video_processor.generate_ass_file(subs, cikti, has_animation=True, stil=stil)
+            _, tepe = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f"{adet:>9} {en_iyi * 1000:>10.1f} {en_iyi / adet * 1e6:>11.2f} "
+                  f"{tepe / 1024:>17.0f} {os.path.getsize(cikti) / 1024:>11.0f}")
+
+
+def _eski_relax_timings(subs: list, start_pad_sec: float = 0.0, end_pad_sec: float = 0.5, min_duration_sec: float = 0.0) -> list:
+    """Satır satır sözlüklerle çalışan önceki relax_timings (karşılaştırma için).
+
+    min_duration_sec, kırpmadan sonra satır satır uzatma olarak eklenmiştir.
+    """
+    items = sorted([dict(s) for s in subs], key=lambda s: (float(s.get('start', 0)), float(s.get('end', 0))))
+    n = len(items)
+    for i in range(n):
+        s = items[i]
+        s['start'] = max(0.0, float(s['start']) - float(start_pad_sec))
+        s['end'] = float(s['end']) + float(end_pad_sec)
+    for i in range(n):
+        if i > 0 and items[i]['start'] < items[i - 1]['end']:
+            items[i]['start'] = items[i - 1]['end']
+        if i < n - 1 and items[i]['end'] > float(items[i + 1]['start']):
+            items[i]['end'] = float(items[i + 1]['start'])
+        if items[i]['end'] < items[i]['start']:
+            items[i]['end'] = items[i]['start']
+    if min_duration_sec > 0:
+        for i in range(n):
+            hedef = items[i]['start'] + min_duration_sec
+            if items[i]['end'] < hedef:
+                items[i]['end'] = min(hedef, items[i + 1]['start']) if i < n - 1 else hedef
+    return items
+
+
+def _en_iyi_sure(func, tekrar: int) -> float:
+    en_iyi = None
+    for _ in range(tekrar):
+        t0 = time.perf_counter()
+        func()
+        gecen = time.perf_counter() - t0
+        en_iyi = gecen if en_iyi is None else min(en_iyi, gecen)
+    return en_iyi
+
+
+def bench_cues(en_fazla: int = 100000, tekrar: int = 3) -> None:
+    """cue_timing: esnetme (öncekiyle karşılaştırmalı) ve uzun cümle bölme süreleri.
+
+    Sütunlu esnetmenin satır satır uygulamayla birebir aynı sonucu verdiği sıralı, karışık
+    sıralı ve çakışan girdilerde (en kısa süre ile birlikte) ayrıca doğrulanır.
+    """
+    import cue_timing
+
+    print(f"{'altyazı':>9} {'relax eski (ms)':>16} {'relax yeni (ms)':>16} {'bölme (ms)':>11} {'us/altyazı':>11}")
+    for adet in _boyutlar(en_fazla):
+        subs = _sentetik_altyazilar(adet)
+        karisik = list(subs)
+        random.Random(adet).shuffle(karisik)
+        # Kasıtlı çakışmalar: her beşinci satır bir sonrakinin içine taşar
+        cakisan = [dict(s, end=s['end'] + 1.5) if i % 5 == 0 else s for i, s in enumerate(subs)]
+        for girdi, ayar in ((subs, {}), (karisik, {'start_pad_sec': 0.2}),
+                            (cakisan, {'start_pad_sec': 0.1, 'min_duration_sec': 1.2})):
+            if cue_timing.relax_timings(girdi, **ayar) != _eski_relax_timings(girdi, **ayar):
+                raise SystemExit(f"relax_timings sonucu önceki uygulamadan farklı! ({adet} altyazı, {ayar})")
+        # Uzun metinler: yarısı noktalamasız, bölme kelime sınırlarına düşer
+        uzun = [dict(s, text=(s['text'].replace('\n', ' ') + ' ') * 4 + ('. Son cümle.' if i % 2 else '')) for i, s in enumerate(subs)]
+        eski = _en_iyi_sure(lambda: _eski_relax_timings(subs), tekrar)
+        yeni = _en_iyi_sure(lambda: cue_timing.relax_timings(subs), tekrar)
+        bolme = _en_iyi_sure(lambda: cue_timing.split_long_sentences(uzun, 90), tekrar)
+        print(f"{adet:>9} {eski * 1000:>16.1f} {yeni * 1000:>16.1f} {bolme * 1000:>11.1f} {(yeni + bolme) / adet * 1e6:>11.2f}")
+
+
+def _sahte_is_asamalari(sureler: dict, parallel_ranges: bool = True) -> list:
+    """Gerçek slotları alan, süreleri uyku ile taklit edilen ses/transkripsiyon/kodlama aşamaları."""
+    import job_queue
+    import pipeline
+
+    def ses(r, report):
+        time.sleep(sureler['audio'])
+
+    def transkripsiyon(r, report):
+        with job_queue.transcribe_slot():
+            time.sleep(sureler['transcribe'])
+
+    def kodlama(r, report):
+        with job_queue.encode_slot():
+            if not parallel_ranges:
+                time.sleep(sureler['encode'])
+                return
+            # Tek işlik akış: boştaki slotlarla aralıklara bölünür; birleştirme payı eklenir
+            with job_queue.extra_encode_slots(job_queue.MAX_PARALLEL_RANGES - 1) as ek:
+                time.sleep(sureler['encode'] / (1 + ek) + sureler['concat'] * ek)
+
+    return [
+        pipeline.Stage('audio', ses, lane='audio'),
+        pipeline.Stage('transcribe', transkripsiyon, deps=('audio',), lane='transcribe'),
+        pipeline.Stage('render', kodlama, deps=('transcribe',), lane='encode'),
+    ]
+
+
+def bench_batch(klip: int = 50, transkripsiyon: float = 0.4, kodlama: float = 0.3) -> None:
+    """Toplu iş (ortak aşama havuzları) ile videoları tek tek göndermenin karşılaştırması.
+
+    Aşamalar uyku ile taklit edilir ama job_queue'nun gerçek kodlama/transkripsiyon
+    slotlarını alır; böylece ölçülen fark yalnızca zamanlamadan gelir.
+    """
+    import threading
+    import job_queue
+    import pipeline
+
+    sureler = {'audio': 0.02, 'transcribe': transkripsiyon, 'encode': kodlama, 'concat': 0.05}
+    print(f"{klip} klip; kodlama slotu={job_queue.ENCODE_SLOTS}, transkripsiyon slotu={job_queue.TRANSCRIBE_SLOTS}")
+
+    # Tek tek: her video kuyrukta ayrı iş, aşamaları kendi thread'lerinde
+    kuyruk = job_queue.JobQueue(workers=job_queue.ENCODE_SLOTS + job_queue.TRANSCRIBE_SLOTS, max_queued=0)
+    kalan = threading.Semaphore(0)
+
+    def tek_is():
+        try:
+            pipeline.run_stages(_sahte_is_asamalari(sureler))
+        finally:
+            kalan.release()
+
+    t0 = time.perf_counter()
+    for i in range(klip):
+        kuyruk.submit(f'is-{i}', tek_is)
+    for _ in range(klip):
+        kalan.acquire()
+    tek_tek = time.perf_counter() - t0
+
+    # Toplu: tüm grafikler ortak lane havuzlarında
+    lanes = {'audio': job_queue.TRANSCRIBE_SLOTS, 'transcribe': job_queue.TRANSCRIBE_SLOTS, 'encode': job_queue.ENCODE_SLOTS}
+    t0 = time.perf_counter()
+    sonuc = pipeline.run_graphs({i: _sahte_is_asamalari(sureler, parallel_ranges=False) for i in range(klip)}, lanes=lanes)
+    toplu = time.perf_counter() - t0
+    hatali = [k for k, v in sonuc.items() if isinstance(v, Exception)]
+    if hatali:
+        raise SystemExit(f"Toplu çalıştırmada hata: {sonuc[hatali[0]]!r}")
+
+    print(f"{'mod':>9} {'süre (sn)':>10} {'klip/dk':>9}")
+    for ad, sure in (('tek tek', tek_tek), ('toplu', toplu)):
+        print(f"{ad:>9} {sure:>10.2f} {klip / sure * 60:>9.1f}")
+
+
+# Alt süreçte ölçülen açılış: import süresi ve (app için) arka plan hazırlığının bitişi
+_ACILIS_KODU = '''
+import json, time
+t0 = time.perf_counter()
+import {modul} as m
+t1 = time.perf_counter()
+hazir = getattr(m, 'startup_done', None)
+if hazir is not None:
+    hazir.wait(120)
+print(json.dumps([t1 - t0, time.perf_counter() - t0 if hazir is not None else None]))
+'''
+
+
+def _acilis_olc(kod: str, tekrar: int) -> list:
+    """Kodu her seferinde yeni bir yorumlayıcıda çalıştırır; ölçümlerin listesini döndürür."""
+    olcumler = []
+    for _ in range(tekrar):
+        cikti = subprocess.run([sys.executable, '-c', kod], capture_output=True, text=True,
+                               cwd=os.path.dirname(os.path.abspath(__file__)))
+        if cikti.returncode != 0:
+            raise SystemExit(f"Alt süreç başarısız:\n{cikti.stderr[-2000:]}")
+        olcumler.append(json.loads(cikti.stdout.strip().splitlines()[-1]))
+    return olcumler
+
+
+def bench_startup(tekrar: int = 5) -> None:
+    """Soğuk açılış: modüllerin yeni bir süreçte içe aktarılma süresi (medyan).
+
+    'import' gunicorn worker'ının istek karşılamaya başlamadan önce beklediği süredir;
+    'hazır' app için arka plandaki font hazırlığının da bittiği andır (/readyz 200).
+    Gemini SDK artık ilk transkripsiyonda yüklendiği için ayrıca ölçülür (kurulu ise).
+    """
+    print(f"{'modül':>22} {'import (ms)':>12} {'hazır (ms)':>11}")
+    for modul in ('video_processor', 'app'):
+        olcumler = _acilis_olc(_ACILIS_KODU.format(modul=modul), tekrar)
+        imp = statistics.median(o[0] for o in olcumler) * 1000
+        hazir = [o[1] for o in olcumler if o[1] is not None]
+        hazir_metni = f"{statistics.median(hazir) * 1000:>11.0f}" if hazir else f"{'-':>11}"
+        print(f"{modul:>22} {imp:>12.0f} {hazir_metni}")
+    try:
+        olcumler = _acilis_olc(_ACILIS_KODU.format(modul='google.generativeai'), tekrar)
+        print(f"{'genai SDK (ertelenen)':>22} {statistics.median(o[0] for o in olcumler) * 1000:>12.0f} {'-':>11}")
+    except SystemExit:
+        print(f"{'genai SDK (ertelenen)':>22} {'kurulu değil':>12}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest='komut', required=True)
+    p_ass = sub.add_parser('ass', help='ASS yazıcısının ölçeklenmesi')
+    p_ass.add_argument('--max', type=int, default=100000, help='En büyük altyazı sayısı')
+    p_ass.add_argument('--repeat', type=int, default=3, help='Her boyut için tekrar (en iyisi raporlanır)')
+    p_cues = sub.add_parser('cues', help='Altyazı zamanlama işlemlerinin ölçeklenmesi')
+    p_cues.add_argument('--max', type=int, default=100000, help='En büyük altyazı sayısı')
+    p_cues.add_argument('--repeat', type=int, default=3, help='Her boyut için tekrar (en iyisi raporlanır)')
+    p_batch = sub.add_parser('batch', help='Toplu iş ile tek tek gönderimin verim karşılaştırması')
+    p_batch.add_argument('--clips', type=int, default=50, help='Klip sayısı')
+    p_batch.add_argument('--transcribe-sec', type=float, default=0.4, help='Klip başına taklit transkripsiyon süresi')
+    p_batch.add_argument('--encode-sec', type=float, default=0.3, help='Klip başına taklit kodlama süresi (tek slot)')
+    p_startup = sub.add_parser('startup', help='Soğuk açılış (import) süreleri')
+    p_startup.add_argument('--repeat', type=int, default=5, help='Her modül için yeni süreç sayısı (medyan raporlanır)')
+    args = parser.parse_args()
+    if args.komut == 'ass':
+        bench_ass(args.max, args.repeat)
+    elif args.komut == 'cues':
+        bench_cues(args.max, args.repeat)
+    elif args.komut == 'batch':
+        bench_batch(args.clips, args.transcribe_sec, args.encode_sec)
+    elif args.komut == 'startup':
+        bench_startup(args.repeat)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,382 @@
+"""Web sunucusu olmadan toplu altyazı işleme (gece boyu geriye dönük işler için).
+
+Kullanım:
+    python cli.py videolar/ -o cikti/
+    python cli.py --manifest liste.txt -o cikti/ --jobs 8 --style font_size=72 --style is_bold=true
+
+Girdi bir klasör (desteklenen video uzantıları, --recursive ile alt klasörler dahil) ya da
+manifest dosyası olabilir. Manifestte her satır bir video yoludur; satır '{' ile başlıyorsa
+{"path": ..., "style": {...}} biçiminde o videoya özel stil ayarları taşıyan JSON'dur.
+
+Her video ayrı bir süreçte, web uygulamasıyla aynı aşama grafiğiyle (process_graph) işlenir:
+ses ayıklama, Gemini transkripsiyonu, tek geçişte 9:16 ölçekleme + altyazı. Sonuçlar her video
+bittiğinde durum dosyasına yazılır; komut yeniden çalıştırıldığında tamamlanmış (çıktısı
+duran ve girdisi değişmemiş) videolar atlanır, hatalı olanlar yeniden denenir.
+
+Varsayılan olarak çekirdeklerin yarısı kadar video aynı anda işlenir ve her sürecin x264
+kodlaması çekirdek/--jobs thread ile sınırlanır; Gemini çağrıları tüm süreçlerde toplam
+--transcribe-jobs ile sınırlıdır. fonts/ ve cache/ klasörleri, komut nereden çalıştırılırsa
+çalıştırılsın uygulama klasöründen kullanılır.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import nullcontext
+
+import upload_store
+
+# fonts/ ve cache/ gibi göreli yollar sunucuda olduğu gibi uygulama klasörüne göre çözülür
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+# Sunucudaki TRANSCRIBE_SLOTS varsayılanıyla aynı
+DEFAULT_TRANSCRIBE_JOBS = int(os.environ.get('TRANSCRIBE_SLOTS', 0)) or 4
+
+# Durum dosyasının çıktı klasöründeki varsayılan adı
+STATE_FILE_NAME = '.cli_state.json'
+# /process formundaki varsayılanlarla aynı
+DEFAULT_STYLE = {
+    'has_background': False,
+    'has_animation': False,
+    'is_bold': False,
+    'timing_relax': False,
+    'bg_opacity': 0.5,
+    'margin_v': 450,
+    'font_size': 60,
+    'outline_px': 3,
+    'shadow_px': 2,
+    'alignment': 2,
+    'crf': 20,
+    'fps': None,
+    'margin_l': 80,
+    'margin_r': 80,
+}
+
+
+def _stil_degeri(anahtar: str, deger: str):
+    """--style anahtar=değer metnini varsayılanın türüne çevirir."""
+    if anahtar not in DEFAULT_STYLE:
+        raise ValueError(f"Bilinmeyen stil ayarı: {anahtar} (geçerli: {', '.join(DEFAULT_STYLE)})")
+    varsayilan = DEFAULT_STYLE[anahtar]
+    if isinstance(varsayilan, bool):
+        return deger.lower() in ('1', 'true', 'yes', 'evet')
+    if anahtar == 'fps':
+        return int(deger) if deger else None
+    return type(varsayilan)(deger)
+
+
+def _stili_birlestir(stil: dict, ayarlar: dict) -> dict:
+    """Manifestteki JSON stil ayarlarını (metin, sayı ya da bool) stile ekler."""
+    stil = dict(stil)
+    for anahtar, deger in ayarlar.items():
+        if anahtar not in DEFAULT_STYLE:
+            raise ValueError(f"Bilinmeyen stil ayarı: {anahtar} (geçerli: {', '.join(DEFAULT_STYLE)})")
+        stil[anahtar] = _stil_degeri(anahtar, deger) if isinstance(deger, str) else deger
+    return stil
+
+
+def _videolari_bul(klasor: str, recursive: bool = False) -> list:
+    bulunan = []
+    for kok, alt_klasorler, dosyalar in os.walk(klasor):
+        alt_klasorler[:] = sorted(d for d in alt_klasorler if not d.startswith('.')) if recursive else []
+        for ad in sorted(dosyalar):
+            if os.path.splitext(ad)[1].lower() in upload_store.ALLOWED_EXTENSIONS:
+                bulunan.append({'path': os.path.join(kok, ad)})
+    return bulunan
+
+
+def _manifest_oku(manifest_yolu: str) -> list:
+    """Manifest satırlarını {'path', 'style'?} sözlüklerine çevirir; yollar manifeste göre çözülür."""
+    taban = os.path.dirname(os.path.abspath(manifest_yolu))
+    ogeler = []
+    with open(manifest_yolu, 'r', encoding='utf-8') as f:
+        for satir_no, satir in enumerate(f, 1):
+            satir = satir.strip()
+            if not satir or satir.startswith('#'):
+                continue
+            if satir.startswith('{'):
+                try:
+                    oge = json.loads(satir)
+                except ValueError as e:
+                    raise ValueError(f"{manifest_yolu}:{satir_no}: geçersiz JSON ({e})")
+                if not oge.get('path'):
+                    raise ValueError(f"{manifest_yolu}:{satir_no}: 'path' alanı yok.")
+            else:
+                oge = {'path': satir}
+            oge['path'] = os.path.join(taban, os.path.expanduser(oge['path']))
+            ogeler.append(oge)
+    return ogeler
+
+
+def _imza(yol: str) -> list:
+    """Girdinin değişip değişmediğini anlamak için boyut ve değiştirilme zamanı."""
+    st = os.stat(yol)
+    return [st.st_size, int(st.st_mtime)]
+
+
+def _durum_oku(yol: str) -> dict:
+    try:
+        with open(yol, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except ValueError:
+        print(f"Uyarı: durum dosyası okunamadı, baştan başlanıyor: {yol}", file=sys.stderr)
+        return {}
+
+
+def _durum_yaz(yol: str, durum: dict) -> None:
+    # Yarıda kesilen yazım durum dosyasını bozmasın
+    tmp = f"{yol}.{os.getpid()}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(durum, f, ensure_ascii=False, indent=1)
+    os.replace(tmp, yol)
+
+
+def _tamamlandi_mi(kayit: dict | None, imza: list) -> bool:
+    return bool(kayit) and kayit.get('status') == 'complete' and kayit.get('input_signature') == imza \
+        and os.path.exists(kayit.get('output') or '')
+
+
+def _ad_koku(yol: str) -> str:
+    return os.path.splitext(os.path.basename(yol))[0]
+
+
+def _is_girdisi(kaynak: str, output_folder: str, kullanilan: set) -> str:
+    """Çıktı adları girdinin adından türetilir; aynı adlı iki girdi için ayrı bir ad (link) verir.
+
+    kullanilan, durum dosyasındaki önceki çalıştırmaların adlarını da içerir; böylece farklı
+    bir alt kümeyle yeniden çalıştırıldığında başka bir videonun çıktısı ezilmez.
+    """
+    kok, uzanti = os.path.splitext(os.path.basename(kaynak))
+    if kok not in kullanilan:
+        kullanilan.add(kok)
+        return kaynak
+    klasor = os.path.join(output_folder, '.inputs')
+    os.makedirs(klasor, exist_ok=True)
+    n = 2
+    while True:
+        ad = f"{kok}_{n}"
+        hedef = os.path.join(klasor, f"{ad}{uzanti}")
+        if ad not in kullanilan and not os.path.lexists(hedef):
+            break
+        n += 1
+    kullanilan.add(ad)
+    try:
+        os.link(kaynak, hedef)
+    except OSError:
+        os.symlink(os.path.abspath(kaynak), hedef)
+    return hedef
+
+
+def _onceki_girdi(kayit: dict | None) -> str | None:
+    video = (kayit or {}).get('video')
+    return video if video and os.path.exists(video) else None
+
+
+# Alt süreçlerde ortak transkripsiyon semaforu ve aralık sayısı (_isci_hazirla ayarlar)
+_transcribe_semaphore = None
+_parallel = 1
+
+
+def _isci_hazirla(transcribe_semaphore, threads: int, parallel: int) -> None:
+    """Alt süreç başlangıcı: ortak transkripsiyon sınırı ve süreç başına x264 thread sınırı."""
+    global _transcribe_semaphore, _parallel
+    import video_processor
+
+    _transcribe_semaphore = transcribe_semaphore
+    _parallel = max(1, parallel)
+    video_processor.FFMPEG_THREADS = max(1, threads)
+
+
+def _transkripsiyon_slotu():
+    return _transcribe_semaphore if _transcribe_semaphore is not None else nullcontext()
+
+
+def _kodlama_sarmalayici(func, parallel=False):
+    """Kodlama aşamasına --parallel aralık sayısını geçer (slot yok; süreç sayısı sınırdır)."""
+    if not parallel or _parallel <= 1:
+        return func
+    return lambda r, report: func(r, report, parallel=_parallel)
+
+
+def videoyu_isle(video_path: str, output_folder: str, style: dict, font_path: str | None = None,
+                 width: int = 1080, height: int = 1920, subtitle_mode: str = 'burn',
+                 base_mode: str = 'none') -> dict:
+    """Tek bir videoyu web uygulamasıyla aynı aşama grafiğinden geçirir (alt süreçte çalışır).
+
+    Dönüş: {'output', 'sidecars', 'subtitles', 'seconds', 'audio_stats'}
+    """
+    import media_probe
+    import pipeline
+    import process_graph
+    import video_processor
+
+    basla = time.time()
+    # Sessiz videolar ölçekleme başlamadan anlaşılır bir hatayla reddedilir
+    try:
+        media_probe.require_audio(video_path)
+    except media_probe.NoAudioStream:
+        raise
+    except Exception as e:
+        print(f"Medya bilgisi okunamadı ({video_path}):", e, file=sys.stderr)
+    audio_stats = {}
+    style_options = dict(style, width=width, height=height, subtitle_mode=subtitle_mode,
+                         base_mode=base_mode, progressive=False)
+    stages = process_graph.build_process_stages(
+        video_path, output_folder, style_options, font_path,
+        with_encode_slot=_kodlama_sarmalayici,
+        transcribe_slot=_transkripsiyon_slotu,
+        # Yüklenen bayt ve kazanılan süre tahminleri durum dosyasına yazılır
+        on_audio_stats=audio_stats.update,
+    )
+    sonuc = pipeline.run_stages(stages)
+    cikti = sonuc['render']
+    sidecars = None
+    if subtitle_mode == 'soft':
+        sidecars = {fmt: yol for fmt, yol in video_processor.yan_dosya_yollari(cikti).items() if os.path.exists(yol)}
+    return {'output': cikti, 'sidecars': sidecars, 'subtitles': len(sonuc['transcribe']),
+            'seconds': round(time.time() - basla, 1), 'audio_stats': audio_stats}
+
+
+def _arguman_ayristirici() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('inputs', nargs='*', help='Video dosyaları ya da klasörler')
+    parser.add_argument('-m', '--manifest', help='Her satırı bir video (ya da JSON) olan liste dosyası')
+    parser.add_argument('-o', '--output', required=True, help='Çıktı klasörü')
+    parser.add_argument('-r', '--recursive', action='store_true', help='Klasörlerin alt klasörlerini de tara')
+    parser.add_argument('-j', '--jobs', type=int, default=max(1, (os.cpu_count() or 1) // 2),
+                        help='Aynı anda işlenecek video (süreç) sayısı (varsayılan: çekirdek sayısının yarısı)')
+    parser.add_argument('--threads', type=int, default=0,
+                        help='Süreç başına x264 thread sınırı (varsayılan: çekirdek sayısı / --jobs)')
+    parser.add_argument('--transcribe-jobs', type=int, default=DEFAULT_TRANSCRIBE_JOBS,
+                        help=f'Tüm süreçlerde aynı anda çalışabilecek Gemini transkripsiyonu (varsayılan: {DEFAULT_TRANSCRIBE_JOBS})')
+    parser.add_argument('--parallel', type=int, default=1,
+                        help='Tek videonun altyazı basmasını bölebileceği aralık sayısı (--jobs küçükken)')
+    parser.add_argument('--state', help=f'Durum dosyası (varsayılan: <çıktı>/{STATE_FILE_NAME})')
+    parser.add_argument('--force', action='store_true', help='Tamamlanmış videoları da yeniden işle')
+    parser.add_argument('--resolution', default='1080x1920', help='Çıktı çözünürlüğü (GENİŞLİKxYÜKSEKLİK)')
+    parser.add_argument('--subtitle-mode', default='burn', choices=('burn', 'soft'),
+                        help="'soft': altyazı basılmaz, ayrı iz ve SRT/VTT/ASS yan dosyaları yazılır")
+    parser.add_argument('--base-mode', default='none', choices=('copy', 'lossless', 'none'),
+                        help='Editörde yeniden işleme için 9:16 taban videosu saklansın mı')
+    parser.add_argument('--font', help='Altyazı fontu (.ttf/.otf)')
+    parser.add_argument('--style', action='append', default=[], metavar='ANAHTAR=DEĞER',
+                        help=f"Stil ayarı (tekrarlanabilir): {', '.join(DEFAULT_STYLE)}")
+    return parser
+
+
+def main(argv=None) -> int:
+    args = _arguman_ayristirici().parse_args(argv)
+    try:
+        w, h = args.resolution.lower().split('x')
+        width, height = int(w), int(h)
+        style = dict(DEFAULT_STYLE)
+        for ayar in args.style:
+            anahtar, _, deger = ayar.partition('=')
+            style[anahtar.strip()] = _stil_degeri(anahtar.strip(), deger.strip())
+        ogeler = _manifest_oku(args.manifest) if args.manifest else []
+    except (ValueError, OSError) as e:
+        print(f"Hata: {e}", file=sys.stderr)
+        return 2
+    for girdi in args.inputs:
+        ogeler.extend(_videolari_bul(girdi, args.recursive) if os.path.isdir(girdi) else [{'path': girdi}])
+    if not ogeler:
+        print("Hata: işlenecek video bulunamadı.", file=sys.stderr)
+        return 2
+    if args.font and not os.path.exists(args.font):
+        print(f"Hata: font bulunamadı: {args.font}", file=sys.stderr)
+        return 2
+
+    # Kullanıcının verdiği yollar çalışma klasörüne göre çözülür; sonra fonts/ ve cache/
+    # sunucudaki gibi uygulama klasöründen kullanılsın diye oraya geçilir
+    args.output = os.path.abspath(args.output)
+    args.font = os.path.abspath(args.font) if args.font else None
+    args.state = os.path.abspath(args.state) if args.state else None
+    for oge in ogeler:
+        oge['path'] = os.path.abspath(oge['path'])
+    os.chdir(APP_DIR)
+
+    os.makedirs(args.output, exist_ok=True)
+    durum_yolu = args.state or os.path.join(args.output, STATE_FILE_NAME)
+    durum = _durum_oku(durum_yolu)
+
+    bekleyen = []
+    gorulen = set()
+    # Önceki çalıştırmalarda verilen adlar ayrılmış sayılır
+    kullanilan = {_ad_koku(k['video']) for k in durum.values() if k.get('video')}
+    atlanan = 0
+    for oge in ogeler:
+        anahtar = os.path.abspath(oge['path'])
+        if anahtar in gorulen:
+            continue
+        gorulen.add(anahtar)
+        try:
+            imza = _imza(anahtar)
+        except OSError as e:
+            print(f"Atlandı (okunamadı): {oge['path']}: {e}", file=sys.stderr)
+            continue
+        if not args.force and _tamamlandi_mi(durum.get(anahtar), imza):
+            atlanan += 1
+            continue
+        try:
+            oge_stili = _stili_birlestir(style, oge.get('style') or {})
+        except ValueError as e:
+            print(f"Hata: {oge['path']}: {e}", file=sys.stderr)
+            return 2
+        bekleyen.append((anahtar, imza, oge_stili))
+    # Daha önce ad verilen video aynı adı (ve çıktı yolunu) korur
+    bekleyen = [(anahtar, imza, stil, _onceki_girdi(durum.get(anahtar)) or _is_girdisi(anahtar, args.output, kullanilan))
+                for anahtar, imza, stil in bekleyen]
+
+    toplam = len(bekleyen)
+    jobs = max(1, args.jobs)
+    # Süreçlerin x264 thread'leri toplamda çekirdek sayısını aşmasın
+    threads = args.threads or max(1, (os.cpu_count() or 1) // jobs)
+    print(f"{toplam} video işlenecek, {atlanan} tamamlanmış video atlandı "
+          f"({jobs} süreç, süreç başına {threads} thread, {args.transcribe_jobs} transkripsiyon).")
+    if not toplam:
+        return 0
+
+    hatali = 0
+    baslangic = time.time()
+    ctx = multiprocessing.get_context()
+    pool = ProcessPoolExecutor(
+        max_workers=jobs, mp_context=ctx, initializer=_isci_hazirla,
+        initargs=(ctx.BoundedSemaphore(max(1, args.transcribe_jobs)), threads, args.parallel)
+    )
+    try:
+        futures = {}
+        for anahtar, imza, stil, video in bekleyen:
+            durum[anahtar] = {'status': 'running', 'video': video, 'input_signature': imza,
+                              'attempts': (durum.get(anahtar) or {}).get('attempts', 0) + 1}
+            futures[pool.submit(videoyu_isle, video, args.output, stil, args.font, width, height,
+                                args.subtitle_mode, args.base_mode)] = anahtar
+        _durum_yaz(durum_yolu, durum)
+        for i, fut in enumerate(as_completed(futures), 1):
+            anahtar = futures[fut]
+            kayit = durum[anahtar]
+            try:
+                sonuc = fut.result()
+                kayit.update(status='complete', finished_at=time.time(), error=None, **sonuc)
+                print(f"[{i}/{toplam}] tamam: {anahtar} -> {sonuc['output']} ({sonuc['seconds']} sn)")
+            except Exception as e:
+                hatali += 1
+                kayit.update(status='error', finished_at=time.time(), error=str(e))
+                print(f"[{i}/{toplam}] HATA: {anahtar}: {e}", file=sys.stderr)
+            # Her video bittiğinde yazılır; kesinti olursa kaldığı yerden devam edilir
+            _durum_yaz(durum_yolu, durum)
+    except KeyboardInterrupt:
+        print("Durduruluyor; başlamamış videolar iptal edildi, sonraki çalıştırmada devam edilecek.", file=sys.stderr)
+        pool.shutdown(wait=False, cancel_futures=True)
+        return 130
+    finally:
+        pool.shutdown(wait=True)
+    print(f"Bitti: {toplam - hatali} tamam, {hatali} hatalı, {time.time() - baslangic:.0f} sn. Durum: {durum_yolu}")
+    return 1 if hatali else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
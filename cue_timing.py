@@ -0,0 +1,225 @@
+"""Altyazı zamanlamalarının sütunlu işlenmesi.
+
+Altyazılar satır satır sözlükler yerine sütunlar halinde tutulur: başlangıç/bitiş için
+array('d'), konuşmacı için indeks dizisi array('i'). Esnetme, çakışma kırpma ve en kısa
+süre işlemleri sütunların tamamı üzerinde map/compress ile toplu yapılır: karşılaştırma
+tüm sütunda tek geçişte yapılır, yalnızca düzeltilmesi gereken (seyrek) satırlara yazılır.
+Sözlükler yalnızca sonda bir kez üretilir. video_processor'daki
+relax_timings ve _split_long_sentences bu modülü kullanır.
+
+Çakışma kırpma sıralı sütunlarda kapalı biçimdedir: başlangıçlar değişmez ve
+end[i] = max(start[i], min(end[i], start[i+1])). (Bir önceki satırın kırpılmış bitişi hiçbir
+zaman bu satırın başlangıcını geçmez; satır satır yapılan eski kırpmayla birebir aynıdır.)
+"""
+import re
+from array import array
+from itertools import compress, repeat
+from operator import add, eq, gt, le, lt, sub
+
+DEFAULT_SPEAKER = 'Konuşmacı 1'
+# Cümle sonu: . ! ? ve ardından boşluk
+_CUMLE_SONU_RE = re.compile(r'(?<=[\.!?])\s+')
+# Bölünen bir parçanın en kısa süresi (saniye)
+MIN_PIECE_SEC = 0.3
+# Bundan kısa altyazılar bölünmez
+MIN_SPLIT_DURATION_SEC = 0.4
+
+
+class CueColumns:
+    """Altyazı listesinin sütunlu gösterimi.
+
+    starts/ends: array('d'); speaker_idx: array('i') (speakers listesine indeks);
+    sources: her satırın geldiği orijinal sözlük (metin ve ek alanlar buradan okunur).
+    """
+
+    __slots__ = ('starts', 'ends', 'speaker_idx', 'speakers', 'sources')
+
+    def __init__(self):
+        self.starts = array('d')
+        self.ends = array('d')
+        self.speaker_idx = array('i')
+        self.speakers = []
+        self.sources = []
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    @classmethod
+    def from_subs(cls, subs, speakers: bool = True) -> 'CueColumns':
+        """speakers=False ise konuşmacı sütunu kurulmaz (yalnızca zamanlama işlemleri için)."""
+        cols = cls()
+        cols.starts = array('d', [float(s.get('start') or 0) for s in subs])
+        cols.ends = array('d', [float(s.get('end') or 0) for s in subs])
+        if speakers:
+            speaker_map = {}
+            cols.speaker_idx = array('i', [speaker_map.setdefault(s.get('speaker', DEFAULT_SPEAKER), len(speaker_map)) for s in subs])
+            cols.speakers = list(speaker_map)
+        cols.sources = list(subs)
+        return cols
+
+    def speaker(self, i: int) -> str:
+        return self.speakers[self.speaker_idx[i]]
+
+    def to_subs(self) -> list:
+        """Sütunları sözlük listesine çevirir; orijinal satırdaki diğer alanlar korunur."""
+        return [dict(src, start=st, end=en) for src, st, en in zip(self.sources, self.starts, self.ends)]
+
+    def _permute(self, order) -> None:
+        self.starts = array('d', [self.starts[i] for i in order])
+        self.ends = array('d', [self.ends[i] for i in order])
+        if self.speaker_idx:
+            self.speaker_idx = array('i', [self.speaker_idx[i] for i in order])
+        self.sources = [self.sources[i] for i in order]
+
+    def is_sorted(self) -> bool:
+        st, en = self.starts, self.ends
+        if not all(map(le, st, st[1:])):
+            return False
+        # Başlangıcı eşit olan (seyrek) komşularda bitiş sırası da korunmalı
+        return all(en[i] <= en[i + 1] for i in compress(range(len(st) - 1), map(eq, st, st[1:])))
+
+    def sort(self) -> None:
+        """(start, end) sırasına koyar; zaten sıralıysa (yaygın durum) hiçbir şey kopyalanmaz."""
+        if not self.is_sorted():
+            st, en = self.starts, self.ends
+            self._permute(sorted(range(len(st)), key=lambda i: (st[i], en[i])))
+
+    def _sonraki_baslangiclar(self) -> array:
+        """Her satır için bir sonrakinin başlangıcı; son satır için sonsuz."""
+        sonraki = self.starts[1:]
+        sonraki.append(float('inf'))
+        return sonraki
+
+    def _satirlar(self, maske):
+        """maske'nin doğru olduğu satır indeksleri."""
+        return compress(range(len(self.starts)), maske)
+
+    def pad(self, start_pad_sec: float = 0.0, end_pad_sec: float = 0.0) -> None:
+        """start = max(0, start - start_pad), end = end + end_pad (sıra korunur)."""
+        sp, ep = float(start_pad_sec), float(end_pad_sec)
+        if sp:
+            self.starts = array('d', map(sub, self.starts, repeat(sp)))
+        starts = self.starts
+        for i in self._satirlar(map(lt, starts, repeat(0.0))):
+            starts[i] = 0.0
+        if ep:
+            self.ends = array('d', map(add, self.ends, repeat(ep)))
+
+    def clamp_overlaps(self) -> None:
+        """Komşu satırlarla çakışmayı kırpar (sütunlar sıralı olmalı).
+
+        Bitiş bir sonraki satırın başlangıcını geçemez ve başlangıçtan önce olamaz.
+        """
+        if not self.starts:
+            return
+        starts, ends = self.starts, self.ends
+        sonraki = self._sonraki_baslangiclar()
+        for i in self._satirlar(map(gt, ends, sonraki)):
+            ends[i] = sonraki[i]
+        for i in self._satirlar(map(lt, ends, starts)):
+            ends[i] = starts[i]
+
+    def enforce_min_duration(self, min_duration_sec: float) -> None:
+        """Çok kısa satırları en az min_duration_sec süreye uzatır; sonraki satırı ezmez.
+
+        clamp_overlaps'tan sonra çağrılır: end = max(end, min(start + min_sure, sonraki.start)).
+        Kırpılmış bitiş sonraki başlangıcı geçmediği için kısa satırlarda bu min(hedef, sonraki) olur.
+        """
+        if not min_duration_sec or min_duration_sec <= 0 or not self.starts:
+            return
+        ends = self.ends
+        hedef = array('d', map(add, self.starts, repeat(float(min_duration_sec))))
+        sonraki = self._sonraki_baslangiclar()
+        for i in self._satirlar(map(lt, ends, hedef)):
+            ends[i] = min(hedef[i], sonraki[i])
+
+
+def relax_timings(subs: list, start_pad_sec: float = 0.0, end_pad_sec: float = 0.5, min_duration_sec: float = 0.0) -> list:
+    """Altyazı aralıklarını (start_pad_sec, end_pad_sec) kadar genişletir; çakışmayı komşularla sınırlar.
+
+    Kurallar:
+      - start = max(0, start - start_pad_sec)
+      - end   = end + end_pad_sec
+      - Bir sonraki satırla çakışırsa, end = min(end, next.start)
+      - Bir öncekiyle çakışırsa, start = max(start, prev.end)
+      - min_duration_sec verilirse kısa satırlar (sonrakini ezmeden) bu süreye uzatılır
+    """
+    if not subs:
+        return subs
+    # Konuşmacılar değişmez; satırlar ek alanlarıyla birlikte kopyalanır
+    cols = CueColumns.from_subs(subs, speakers=False)
+    cols.sort()
+    cols.pad(start_pad_sec, end_pad_sec)
+    cols.clamp_overlaps()
+    cols.enforce_min_duration(min_duration_sec)
+    return cols.to_subs()
+
+
+def _kelime_sinirinda_bol(text: str, max_chars: int) -> list:
+    """Metni kelime sınırlarında, her biri max_chars'ı geçmeyen dengeli parçalara böler.
+
+    Kalan metin için ceil(kalan / max_chars) parça hedeflenir ve kesim, eşit paya en yakın
+    boşluğa konur; böylece sonda tek kelimelik kısa bir parça kalmaz. max_chars'tan uzun
+    tek bir kelime mecburen karakterden kesilir.
+    """
+    text = ' '.join(text.split())
+    uzunluk = len(text)
+    parcalar = []
+    bas = 0
+    while uzunluk - bas > max_chars:
+        kalan = uzunluk - bas
+        hedef = bas + -(-kalan // -(-kalan // max_chars))
+        geri = text.rfind(' ', bas + 1, hedef + 1)
+        ileri = text.find(' ', hedef, bas + max_chars + 1)
+        adaylar = [k for k in (geri, ileri) if k > bas]
+        if not adaylar:
+            parcalar.append(text[bas:bas + max_chars])
+            bas += max_chars
+            continue
+        kes = min(adaylar, key=lambda k: abs(k - hedef))
+        parcalar.append(text[bas:kes])
+        bas = kes + 1
+    parcalar.append(text[bas:])
+    return parcalar
+
+
+def split_long_sentences(entries: list, max_chars_per_entry: int = 90) -> list:
+    """Uzun metinleri önce cümle sonlarından, gerekirse kelime sınırlarından böler.
+
+    Hiçbir parça max_chars_per_entry karakteri geçmez ve kelimeler ortadan kesilmez.
+    Süre parçalara karakter sayısıyla orantılı paylaştırılır (parça başına en az
+    MIN_PIECE_SEC, bitişi aşmadan). Boş metinli satırlar atılır; bölünmeyen satırlar
+    olduğu gibi (aynı nesne) döner.
+    """
+    entries = [e for e in entries if (e.get('text') or '').strip()]
+    if not entries:
+        return []
+    cols = CueColumns.from_subs(entries)
+    st, en = cols.starts, cols.ends
+    out = []
+    for i, e in enumerate(cols.sources):
+        text = e['text'].strip()
+        start = st[i]
+        end = en[i]
+        dur = end - start if end > start else 0.0
+        if len(text) <= max_chars_per_entry or dur <= MIN_SPLIT_DURATION_SEC:
+            out.append(e)
+            continue
+        parts = []
+        cumleler = _CUMLE_SONU_RE.split(text) if ('.' in text or '!' in text or '?' in text) else (text,)
+        for cumle in cumleler:
+            if not cumle:
+                continue
+            if len(cumle) <= max_chars_per_entry:
+                parts.append(cumle)
+            else:
+                parts.extend(_kelime_sinirinda_bol(cumle, max_chars_per_entry))
+        total_chars = sum(len(p) for p in parts)
+        speaker = cols.speaker(i)
+        t = start
+        for p in parts:
+            frac = (len(p) / total_chars) if total_chars else 1.0 / len(parts)
+            seg_end = min(end, t + max(MIN_PIECE_SEC, dur * frac))
+            out.append({'speaker': speaker, 'start': t, 'end': seg_end, 'text': p.strip()})
+            t = seg_end
+    return out
@@ -0,0 +1,240 @@
+"""Font meta verisi için önbellekli kayıt.
+
+Her font dosyası yalnızca (boyut, mtime) değiştiğinde ayrıştırılır ve yalnızca 'name',
+'OS/2' ve 'post' tabloları okunur. Sonuçlar diske yazılır; yeniden başlatmada fontlar
+tekrar açılmaz. fonts/ klasöründeki değişiklikler taramada artımlı olarak yakalanır.
+"""
+import hashlib
+import json
+import os
+import threading
+
+FONT_EXTENSIONS = ('.ttf', '.otf')
+FONT_INDEX_PATH = os.environ.get('FONT_INDEX_PATH', os.path.join('cache', 'font_index.json'))
+# Bu sürüm değişirse diskteki eski kayıtlar yok sayılır
+_INDEX_VERSION = 1
+
+
+def guess_family_from_filename(file_path: str) -> str:
+    """Font dosya adından aile ismini tahmin eder (fontTools yoksa)."""
+    base = os.path.splitext(os.path.basename(file_path))[0]
+    # Yaygın ağırlık/stil eklerini temizle
+    tokens = base.replace('_', '-').split('-')
+    if len(tokens) > 1:
+        family = tokens[0]
+    else:
+        family = base
+    # Bazı son ekleri kaldır
+    endings = [
+        'Regular', 'Bold', 'Italic', 'Oblique', 'Medium', 'SemiBold', 'ExtraBold',
+        'Light', 'Thin', 'Black', 'Book', 'Roman', 'ExtraLight', 'DemiBold'
+    ]
+    for end in endings:
+        if family.endswith(end):
+            family = family[: -len(end)]
+    return family.strip() or base
+
+
+def _load_ttfont_class():
+    """fontTools çalışma sırasında sonradan yüklenmiş olabilir; her seferinde dinamik dene."""
+    try:
+        from importlib import import_module
+        return import_module('fontTools.ttLib').TTFont  # type: ignore
+    except Exception:
+        return None
+
+
+def read_font_metadata(font_path: str) -> dict:
+    """Font dosyasından aile adı ve stil bayraklarını tek açılışta okur.
+
+    Dönüş: {'family', 'supports_bold', 'is_italic_face', 'fonttools': bool}
+    """
+    lower_name = os.path.basename(font_path).lower()
+    meta = {
+        'family': guess_family_from_filename(font_path),
+        'supports_bold': False,
+        'is_italic_face': 'italic' in lower_name or 'ital' in lower_name,
+        'fonttools': False,
+    }
+    TTFont = _load_ttfont_class()
+    if TTFont is None:
+        # Dosya adına göre kaba tahmin
+        if any(t in lower_name for t in ['bold', 'black', 'heavy']):
+            meta['supports_bold'] = True
+        return meta
+    try:
+        # lazy=True: tablolar yalnızca erişildiğinde çözülür; glyf/CFF hiç okunmaz
+        font = TTFont(font_path, lazy=True)
+    except Exception:
+        if any(t in lower_name for t in ['bold', 'black', 'heavy']):
+            meta['supports_bold'] = True
+        return meta
+    try:
+        meta['fonttools'] = True
+        # nameID 1: Family Name; nameID 4: Full Name
+        family_name = None
+        full_name = None
+        try:
+            for rec in font['name'].names:
+                try:
+                    text = rec.toUnicode()
+                except Exception:
+                    try:
+                        text = rec.string.decode(rec.getEncoding(), errors='ignore')
+                    except Exception:
+                        text = None
+                if not text:
+                    continue
+                if rec.nameID == 1 and not family_name:
+                    family_name = text
+                if rec.nameID == 4 and not full_name:
+                    full_name = text
+                if family_name and full_name:
+                    break
+        except Exception:
+            pass
+        # Önce family (1), yoksa full (4)
+        if family_name or full_name:
+            meta['family'] = family_name or full_name
+        try:
+            # OS/2 tablosu ağırlık ve italic bayrağı içerir
+            if 'OS/2' in font:
+                weight = getattr(font['OS/2'], 'usWeightClass', 400)
+                meta['supports_bold'] = bool(weight and weight >= 700)
+                # ItalicAngle bazı fontlarda post tablosunda olur
+                if 'post' in font:
+                    italic_angle = getattr(font['post'], 'italicAngle', 0)
+                    if italic_angle and float(italic_angle) != 0.0:
+                        meta['is_italic_face'] = True
+        except Exception:
+            if any(t in lower_name for t in ['bold', 'black', 'heavy']):
+                meta['supports_bold'] = True
+    finally:
+        font.close()
+    return meta
+
+
+class FontRegistry:
+    """(yol, boyut, mtime) anahtarlı, diske kalıcı font meta verisi önbelleği."""
+
+    def __init__(self, fonts_dir: str = 'fonts', index_path: str = FONT_INDEX_PATH):
+        self.fonts_dir = fonts_dir
+        self.index_path = index_path
+        self._lock = threading.Lock()
+        self._entries = self._load_index()
+        self._dirty = False
+
+    def _load_index(self) -> dict:
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == _INDEX_VERSION:
+                return data.get('fonts', {})
+        except (OSError, ValueError):
+            pass
+        return {}
+
+    def _save_index(self) -> None:
+        if not self._dirty:
+            return
+        try:
+            if os.path.dirname(self.index_path):
+                os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+            tmp = f"{self.index_path}.{os.getpid()}.tmp"
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump({'version': _INDEX_VERSION, 'fonts': self._entries}, f, ensure_ascii=False)
+            os.replace(tmp, self.index_path)
+            self._dirty = False
+        except OSError as e:
+            print("Font dizini kaydedilemedi:", e)
+
+    def _lookup(self, path: str, st: os.stat_result) -> dict:
+        """Kilit altında çağrılır; kayıt güncel değilse fontu yeniden ayrıştırır."""
+        key = os.path.abspath(path)
+        stamp = [st.st_size, st.st_mtime_ns]
+        entry = self._entries.get(key)
+        # fontTools olmadan tahmin edilmiş kayıtlar, fontTools yüklendiğinde yenilenir
+        if entry and entry.get('stamp') == stamp and (entry['meta'].get('fonttools') or _load_ttfont_class() is None):
+            return entry['meta']
+        meta = read_font_metadata(path)
+        self._entries[key] = {'stamp': stamp, 'meta': meta}
+        self._dirty = True
+        return meta
+
+    def get(self, font_path: str) -> dict:
+        """Tek bir fontun meta verisini döndürür (değişmediyse dosya açılmaz)."""
+        try:
+            st = os.stat(font_path)
+        except OSError:
+            return read_font_metadata(font_path)
+        with self._lock:
+            meta = self._lookup(font_path, st)
+            self._save_index()
+            return meta
+
+    def content_hash(self, font_path: str) -> str:
+        """Font dosyasının SHA-256 özetini döndürür; dosya değişmediyse yeniden okunmaz."""
+        st = os.stat(font_path)
+        with self._lock:
+            self._lookup(font_path, st)
+            entry = self._entries[os.path.abspath(font_path)]
+            digest = entry.get('sha256')
+        if digest:
+            return digest
+        h = hashlib.sha256()
+        with open(font_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                h.update(chunk)
+        digest = h.hexdigest()
+        with self._lock:
+            entry = self._entries.get(os.path.abspath(font_path))
+            if entry and entry.get('stamp') == [st.st_size, st.st_mtime_ns]:
+                entry['sha256'] = digest
+                self._dirty = True
+                self._save_index()
+        return digest
+
+    def list_fonts(self) -> list:
+        """fonts/ klasöründeki fontları yeniden eskiye sıralı döndürür.
+
+        Dönüş: [{'file', 'path', 'family', 'mtime', ...}]
+        """
+        items = []
+        try:
+            scan = list(os.scandir(self.fonts_dir))
+        except OSError:
+            return items
+        with self._lock:
+            seen = set()
+            for de in scan:
+                if not de.name.lower().endswith(FONT_EXTENSIONS) or not de.is_file():
+                    continue
+                st = de.stat()
+                meta = self._lookup(de.path, st)
+                seen.add(os.path.abspath(de.path))
+                items.append({'file': de.name, 'path': de.path, 'mtime': st.st_mtime, **meta})
+            # Klasörden silinen fontları dizinden de çıkar
+            fonts_abs = os.path.abspath(self.fonts_dir) + os.sep
+            for key in [k for k in self._entries if k.startswith(fonts_abs) and k not in seen]:
+                del self._entries[key]
+                self._dirty = True
+            self._save_index()
+        items.sort(key=lambda it: it['mtime'], reverse=True)
+        return items
+
+    def newest_font_path(self):
+        """En son eklenen/değiştirilen fontun yolu (yoksa None)."""
+        fonts = self.list_fonts()
+        return fonts[0]['path'] if fonts else None
+
+
+_default_registry = None
+_default_registry_lock = threading.Lock()
+
+
+def get_default_registry() -> FontRegistry:
+    global _default_registry
+    with _default_registry_lock:
+        if _default_registry is None:
+            _default_registry = FontRegistry()
+        return _default_registry
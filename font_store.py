@@ -0,0 +1,154 @@
+"""İçerik adresli font deposu ve iş başına izole font klasörleri.
+
+Her font, içeriğinin SHA-256 özetiyle depoya bir kez konur. Her render için ayrı bir
+klasör açılır; font buraya kopyalanmaz, depodaki dosyaya bağlantı (hard link, olmazsa
+symlink) verilir. İş bitince yalnızca kendi klasörü silinir; aynı fontu kullanan başka
+bir işin dosyası etkilenmez.
+
+Depo ve alt küme klasörü storage_manager'da ('fontstore', 'subset') tutulur; kullanılmayan
+fontlar TTL/kota ile silinir. Yeniden kullanılan dosyanın mtime'ı yenilenir, böylece bir işe
+bağlanmak üzere olan font temizlikte silinmez (iş klasöründeki hard link ayrıca içeriği korur).
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+
+import font_registry
+
+FONT_STORE_DIR = os.environ.get('FONT_STORE_DIR', os.path.join('cache', 'fontstore'))
+JOB_DIR_ROOT = os.environ.get('JOB_DIR_ROOT', os.path.join('cache', 'jobs'))
+FONT_SUBSET_DIR = os.environ.get('FONT_SUBSET_DIR', os.path.join('cache', 'fontsubsets'))
+# Glif alt kümesi: 'auto' yalnızca büyük fontlarda, 'on' her zaman, 'off' hiçbir zaman
+FONT_SUBSET = os.environ.get('FONT_SUBSET', 'auto').lower()
+FONT_SUBSET_MIN_BYTES = int(os.environ.get('FONT_SUBSET_MIN_BYTES', 512 * 1024))
+
+_store_lock = threading.Lock()
+
+
+def _link_or_copy(src: str, dest: str) -> None:
+    try:
+        os.link(src, dest)
+        return
+    except OSError:
+        pass
+    try:
+        os.symlink(os.path.abspath(src), dest)
+        return
+    except OSError:
+        pass
+    shutil.copy(src, dest)
+
+
+def _touch(path: str) -> None:
+    """Son kullanım zamanını yeniler (disk temizliği LRU/TTL için mtime'a bakar)."""
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+
+def store_font(font_path: str) -> str:
+    """Fontu depoya koyar (zaten varsa dokunmaz) ve depodaki yolunu döndürür."""
+    digest = font_registry.get_default_registry().content_hash(font_path)
+    ext = os.path.splitext(font_path)[1].lower()
+    stored = os.path.join(FONT_STORE_DIR, f"{digest}{ext}")
+    if os.path.exists(stored):
+        _touch(stored)
+        return stored
+    with _store_lock:
+        if not os.path.exists(stored):
+            os.makedirs(FONT_STORE_DIR, exist_ok=True)
+            tmp = f"{stored}.{os.getpid()}.{threading.get_ident()}.tmp"
+            # Kaynağa bağlantı değil kopya: fonts/ içindeki dosya yerinde üzerine yazılırsa
+            # (aynı inode) depodaki içerik bozulmasın. Bu kopya font başına bir kez yapılır.
+            shutil.copy(font_path, tmp)
+            os.replace(tmp, stored)
+    return stored
+
+
+def create_job_dir(prefix: str = 'job') -> str:
+    """Render'a özel geçici klasör oluşturur (ASS dosyası ve font bağlantıları için)."""
+    os.makedirs(JOB_DIR_ROOT, exist_ok=True)
+    return tempfile.mkdtemp(prefix=f"{prefix}_", dir=JOB_DIR_ROOT)
+
+
+def should_subset(font_path: str) -> bool:
+    if FONT_SUBSET == 'off':
+        return False
+    if FONT_SUBSET == 'on':
+        return True
+    try:
+        return os.path.getsize(font_path) >= FONT_SUBSET_MIN_BYTES
+    except OSError:
+        return False
+
+
+def subset_font(font_path: str, text: str) -> str | None:
+    """Fontu yalnızca metinde geçen karakterlerin glifleriyle alt kümeye indirir.
+
+    Sonuç (font özeti, glif kümesi özeti) anahtarıyla önbelleklenir; aynı font ve aynı
+    karakterlerle tekrar render'da hiçbir şey üretilmez. Alt küme üretilemezse None döner
+    ve çağıran tam fontu kullanır.
+    """
+    chars = sorted(set(text) - {'\n', '\r'} | {' ', '\u00a0'})
+    glyph_hash = hashlib.sha256(''.join(chars).encode('utf-8')).hexdigest()[:16]
+    digest = font_registry.get_default_registry().content_hash(font_path)
+    ext = os.path.splitext(font_path)[1].lower()
+    out = os.path.join(FONT_SUBSET_DIR, f"{digest}_{glyph_hash}{ext}")
+    if os.path.exists(out):
+        _touch(out)
+        return out
+    try:
+        from fontTools import subset  # type: ignore
+    except Exception:
+        return None
+    try:
+        os.makedirs(FONT_SUBSET_DIR, exist_ok=True)
+        options = subset.Options()
+        # libass fontu aile adıyla eşleştirdiği için name tablosu olduğu gibi kalmalı
+        options.name_IDs = ['*']
+        options.name_languages = ['*']
+        options.name_legacy = True
+        # Ligatür/kerning gibi düzen özellikleri korunur; hinting metin render'ı için gereksiz
+        options.layout_features = ['*']
+        options.hinting = False
+        options.notdef_outline = True
+        font = subset.load_font(font_path, options, lazy=True)
+        try:
+            subsetter = subset.Subsetter(options)
+            subsetter.populate(unicodes=[ord(c) for c in chars])
+            subsetter.subset(font)
+            tmp = f"{out}.{os.getpid()}.{threading.get_ident()}.tmp"
+            subset.save_font(font, tmp, options)
+            os.replace(tmp, out)
+        finally:
+            font.close()
+        print(f"Font alt kümesi oluşturuldu: {os.path.basename(font_path)} {os.path.getsize(font_path)} -> {os.path.getsize(out)} bayt")
+        return out
+    except Exception as e:
+        print("Font alt kümesi oluşturulamadı, tam font kullanılacak:", e)
+        return None
+
+
+def link_font_into(job_dir: str, font_path: str, text: str | None = None) -> str:
+    """Fontu, orijinal dosya adıyla iş klasörüne bağlar ve bağlantının yolunu döndürür.
+
+    text verilirse ve font alt kümeye uygunsa, tam font yerine alt küme bağlanır.
+    """
+    stored = None
+    if text is not None and should_subset(font_path):
+        stored = subset_font(font_path, text)
+    if stored is None:
+        stored = store_font(font_path)
+    dest = os.path.join(job_dir, os.path.basename(font_path))
+    if not os.path.exists(dest):
+        _link_or_copy(stored, dest)
+    return dest
+
+
+def remove_job_dir(job_dir: str) -> None:
+    """İş klasörünü siler. Bağlantılar silinir; depodaki font dosyası yerinde kalır."""
+    if job_dir and os.path.isdir(job_dir):
+        shutil.rmtree(job_dir, ignore_errors=True)
@@ -0,0 +1,158 @@
+"""Sınırlı iş kuyruğu ve kaynak slotları.
+
+Her istek için sınırsız thread açmak yerine işler sabit sayıda worker'a sıralanır.
+ffmpeg kodlamaları ve Gemini transkripsiyonları ayrı slot havuzlarıyla sınırlandırılır:
+böylece bir yükleme patlaması CPU'yu boğmaz, transkripsiyonlar ise kodlamaları beklemez.
+
+Kapsam: kuyruk, slotlar, akış sınırları ve parça kilitleri bilerek süreç içidir ve
+süreçler arası paylaşılmaz. Desteklenen dağıtım konteyner (host) başına tek gunicorn
+worker'ı ve çok sayıda thread'dir; ölçekleme, aynı TASK_DB_PATH'i paylaşabilen daha fazla
+konteynerle yapılır. Aynı host'ta birden fazla worker desteklenmez: sınırlar worker başına
+çarpılır (kodlamalar CPU'yu aşırı yükler) ve kuyruk sırası yalnızca işi alan worker'da görünür.
+"""
+import os
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+WEB_CONCURRENCY = max(1, int(os.environ.get('WEB_CONCURRENCY', 1)))
+if WEB_CONCURRENCY > 1:
+    print(f"Uyarı: WEB_CONCURRENCY={WEB_CONCURRENCY} desteklenmiyor; iş kuyruğu ve slotlar süreç içidir, "
+          "sınırlar her worker'da ayrı uygulanır. Konteyner başına tek worker çalıştırın, "
+          "ölçekleme için konteyner sayısını artırın.")
+# Aynı anda çalışabilecek ffmpeg kodlaması (varsayılan: çekirdek sayısı)
+ENCODE_SLOTS = int(os.environ.get('ENCODE_SLOTS', 0)) or max(1, os.cpu_count() or 1)
+# Kodlama slotu başına libx264 thread sayısı (0: çekirdekler / ENCODE_SLOTS); ENCODE_SLOTS kodlama
+# aynı anda çalışırken toplam thread çekirdek sayısını aşmaz
+THREADS_PER_SLOT = int(os.environ.get('THREADS_PER_SLOT', 0)) or max(1, (os.cpu_count() or 1) // ENCODE_SLOTS)
+# Aynı anda çalışabilecek Gemini transkripsiyonu (kodlamadan bağımsız)
+TRANSCRIBE_SLOTS = int(os.environ.get('TRANSCRIBE_SLOTS', 0)) or 4
+# Tek bir işin altyazı basmayı bölebileceği en fazla aralık sayısı (0: ENCODE_SLOTS)
+MAX_PARALLEL_RANGES = int(os.environ.get('MAX_PARALLEL_RANGES', 0)) or ENCODE_SLOTS
+# Kuyrukta bekleyebilecek en fazla iş; aşılırsa istek 429 ile reddedilir
+MAX_QUEUED_JOBS = int(os.environ.get('MAX_QUEUED_JOBS', 20))
+
+_encode_semaphore = threading.BoundedSemaphore(ENCODE_SLOTS)
+_transcribe_semaphore = threading.BoundedSemaphore(TRANSCRIBE_SLOTS)
+
+
+@contextmanager
+def encode_slot():
+    """Bir ffmpeg kodlama slotu alır; boş slot yoksa bekler."""
+    with _encode_semaphore:
+        yield
+
+
+@contextmanager
+def try_encode_slot():
+    """Boş kodlama slotu varsa beklemeden alır; True/False verir (etkileşimli istekler için)."""
+    alindi = _encode_semaphore.acquire(blocking=False)
+    try:
+        yield alindi
+    finally:
+        if alindi:
+            _encode_semaphore.release()
+
+
+@contextmanager
+def transcribe_slot():
+    """Bir transkripsiyon slotu alır; boş slot yoksa bekler."""
+    with _transcribe_semaphore:
+        yield
+
+
+@contextmanager
+def extra_encode_slots(wanted: int):
+    """Paralel kodlama için boştaki slotlardan en fazla 'wanted' tanesini beklemeden alır.
+
+    Kuyrukta bekleyen her iş için bir slot boş bırakılır; sunucu boştayken tek büyük iş
+    tüm çekirdekleri kullanır, yoğunken diğer işleri aç bırakmaz. Alınan slot sayısını verir.
+    """
+    wanted = max(0, int(wanted) - default_queue.stats()['queued'])
+    alinan = 0
+    try:
+        while alinan < wanted and _encode_semaphore.acquire(blocking=False):
+            alinan += 1
+        yield alinan
+    finally:
+        for _ in range(alinan):
+            _encode_semaphore.release()
+
+
+def threads_for(slots: int) -> int:
+    """'slots' kodlama slotu tutan bir işin tek ffmpeg kodlamasına verilecek thread sayısı."""
+    return max(1, int(slots)) * THREADS_PER_SLOT
+
+
+class QueueFull(Exception):
+    """Kuyruk dolu olduğunda submit tarafından fırlatılır."""
+
+
+class JobQueue:
+    """Sabit sayıda worker thread'i olan FIFO iş kuyruğu."""
+
+    def __init__(self, workers: int, max_queued: int = MAX_QUEUED_JOBS):
+        self.workers = max(1, int(workers))
+        self.max_queued = max_queued
+        self._pending = deque()
+        self._running = set()
+        self._cond = threading.Condition()
+        self._threads = []
+
+    def _ensure_workers(self):
+        # Worker'lar ilk işte başlatılır; import sırasında thread açılmaz
+        if self._threads:
+            return
+        for i in range(self.workers):
+            t = threading.Thread(target=self._worker, name=f'job-worker-{i}', daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def submit(self, job_id: str, func, *args, **kwargs) -> int:
+        """İşi kuyruğa ekler ve kuyruktaki sırasını (1'den başlar) döndürür."""
+        with self._cond:
+            if self.max_queued and len(self._pending) >= self.max_queued:
+                raise QueueFull(f"Kuyruk dolu ({len(self._pending)} iş bekliyor). Lütfen biraz sonra tekrar deneyin.")
+            self._ensure_workers()
+            self._pending.append((job_id, func, args, kwargs))
+            self._cond.notify()
+            return len(self._pending)
+
+    def position(self, job_id: str) -> int | None:
+        """İş kuyrukta bekliyorsa sırasını (1'den başlar), değilse None döndürür."""
+        with self._cond:
+            for i, item in enumerate(self._pending):
+                if item[0] == job_id:
+                    return i + 1
+        return None
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                'workers': self.workers,
+                'queued': len(self._pending),
+                'running': len(self._running),
+                'max_queued': self.max_queued,
+                'encode_slots': ENCODE_SLOTS,
+                'transcribe_slots': TRANSCRIBE_SLOTS,
+                'max_parallel_ranges': MAX_PARALLEL_RANGES,
+            }
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                job_id, func, args, kwargs = self._pending.popleft()
+                self._running.add(job_id)
+            try:
+                func(*args, **kwargs)
+            except Exception as e:
+                print(f"İş {job_id} beklenmeyen hata:", e)
+            finally:
+                with self._cond:
+                    self._running.discard(job_id)
+
+
+# Worker sayısı iki havuzun toplamı: bir işin transkripsiyonu başka bir işin kodlamasıyla örtüşebilir
+default_queue = JobQueue(workers=ENCODE_SLOTS + TRANSCRIBE_SLOTS)
@@ -0,0 +1,192 @@
+"""ffprobe ile medya bilgisi okuma ve önbellekleme.
+
+Her yükleme için codec, çözünürlük, piksel biçimi, fps ve ses akışı bilgisi tek bir
+ffprobe çağrısıyla okunur ve (yol, boyut, mtime) anahtarıyla diske yazılır. Aynı dosya
+için sonraki sorgular (ölçekleme kararı, süre, ses kontrolü) ffprobe'u tekrar çalıştırmaz.
+Kayıtlar storage_manager'da 'probe' türüyle tutulur: kullanılmayanlar (kaynağı silinmiş
+olanlar dahil) TTL ile silinir; isabet alan kaydın mtime'ı yenilenir.
+"""
+import hashlib
+import json
+import os
+import subprocess
+import threading
+
+PROBE_CACHE_DIR = os.environ.get('PROBE_CACHE_DIR', os.path.join('cache', 'probes'))
+# Bu sürüm değişirse diskteki eski kayıtlar yok sayılır
+_PROBE_VERSION = 1
+
+
+class NoAudioStream(Exception):
+    """Videoda transkripsiyon için ses akışı bulunmadığında fırlatılır."""
+
+
+def _fps(oran) -> float | None:
+    """ffprobe'un '30000/1001' biçimindeki kare hızını sayıya çevirir."""
+    try:
+        pay, _, payda = str(oran).partition('/')
+        deger = float(pay) / float(payda or 1)
+        return deger if deger > 0 else None
+    except (ValueError, ZeroDivisionError):
+        return None
+
+
+def _rotation(stream: dict) -> int:
+    """Telefon videolarındaki döndürme bilgisini (derece) okur."""
+    for side in stream.get('side_data_list') or []:
+        if 'rotation' in side:
+            try:
+                return int(float(side['rotation'])) % 360
+            except (TypeError, ValueError):
+                pass
+    try:
+        return int(stream.get('tags', {}).get('rotate', 0)) % 360
+    except (TypeError, ValueError):
+        return 0
+
+
+def run_ffprobe(path: str) -> dict:
+    """ffprobe'u çalıştırır ve sonucu özet bir sözlüğe çevirir.
+
+    Dönüş: {'duration', 'format', 'video': {...} | None, 'audio': {...} | None, 'has_audio'}
+    """
+    result = subprocess.run(
+        ['ffprobe', '-v', 'error', '-print_format', 'json', '-show_format', '-show_streams', path],
+        check=True, capture_output=True, text=True
+    )
+    raw = json.loads(result.stdout or '{}')
+    streams = raw.get('streams') or []
+    fmt = raw.get('format') or {}
+    # Kapak resmi (attached_pic) gerçek video akışı sayılmaz
+    video = next((s for s in streams if s.get('codec_type') == 'video'
+                  and not (s.get('disposition') or {}).get('attached_pic')), None)
+    audio = next((s for s in streams if s.get('codec_type') == 'audio'), None)
+    try:
+        duration = float(fmt.get('duration') or (video or audio or {}).get('duration') or 0)
+    except ValueError:
+        duration = 0.0
+    info = {
+        'duration': duration,
+        'format': fmt.get('format_name'),
+        'video': None,
+        'audio': None,
+        'has_audio': audio is not None,
+    }
+    if video:
+        info['video'] = {
+            'codec': video.get('codec_name'),
+            'width': video.get('width'),
+            'height': video.get('height'),
+            'pix_fmt': video.get('pix_fmt'),
+            'fps': _fps(video.get('avg_frame_rate')) or _fps(video.get('r_frame_rate')),
+            'sar': video.get('sample_aspect_ratio'),
+            'rotation': _rotation(video),
+        }
+    if audio:
+        info['audio'] = {
+            'codec': audio.get('codec_name'),
+            'channels': audio.get('channels'),
+            'sample_rate': audio.get('sample_rate'),
+        }
+    return info
+
+
+def is_conforming(info: dict, width: int, height: int, fps: int | None = None) -> bool:
+    """Video zaten istenen çıktıyla aynıysa (yeniden kodlamadan kopyalanabilirse) True.
+
+    Koşullar: H.264, yuv420p, tam olarak width x height, kare pikseller, döndürme yok ve
+    fps istenmişse aynı kare hızı.
+    """
+    video = (info or {}).get('video')
+    if not video:
+        return False
+    if video.get('codec') != 'h264' or video.get('pix_fmt') != 'yuv420p':
+        return False
+    if video.get('width') != width or video.get('height') != height:
+        return False
+    if video.get('rotation'):
+        return False
+    if video.get('sar') not in (None, '', '1:1', '0:1'):
+        return False
+    if fps:
+        kaynak = video.get('fps')
+        if not kaynak or abs(kaynak - float(fps)) > 0.01 * float(fps):
+            return False
+    # Ses de olduğu gibi kopyalanacağı için mp4 kabının desteklediği bir codec olmalı
+    audio = info.get('audio')
+    if audio and audio.get('codec') not in ('aac', 'mp3', 'alac', 'ac3', 'eac3', 'opus'):
+        return False
+    return True
+
+
+class ProbeCache:
+    """(yol, boyut, mtime) anahtarlı, JSON dosyalarıyla tutulan ffprobe sonuç önbelleği."""
+
+    def __init__(self, cache_dir: str = PROBE_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, media_path: str, st: os.stat_result) -> str:
+        raw = f"{os.path.abspath(media_path)}|{st.st_size}|{st.st_mtime_ns}|{_PROBE_VERSION}"
+        return os.path.join(self.cache_dir, f"{hashlib.sha256(raw.encode('utf-8')).hexdigest()}.json")
+
+    def get(self, media_path: str) -> dict:
+        """Dosyanın medya bilgisini döndürür; dosya değişmediyse ffprobe çalıştırılmaz."""
+        st = os.stat(media_path)
+        path = self._path(media_path, st)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                info = json.load(f)
+            # Son kullanım: disk temizliği sık okunan kayıtları silmesin
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+            with self._lock:
+                self.hits += 1
+            return info
+        except (OSError, ValueError):
+            pass
+        info = run_ffprobe(media_path)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(info, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print("Medya bilgisi önbelleğe yazılamadı:", e)
+        with self._lock:
+            self.misses += 1
+        return info
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses}
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_cache() -> ProbeCache:
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = ProbeCache()
+        return _default_cache
+
+
+def probe(media_path: str) -> dict:
+    """Süreç genelindeki önbellek üzerinden medya bilgisini döndürür."""
+    return get_default_cache().get(media_path)
+
+
+def require_audio(media_path: str) -> dict:
+    """Ses akışı yoksa anlaşılır bir hatayla hemen durur; varsa medya bilgisini döndürür."""
+    info = probe(media_path)
+    if not info.get('has_audio'):
+        raise NoAudioStream("Videoda ses akışı bulunamadı; altyazı oluşturmak için sesli bir video yükleyin.")
+    return info
@@ -0,0 +1,202 @@
+"""İşleme adımlarını küçük bir bağımlılık grafiği (DAG) olarak çalıştırır.
+
+Her aşama yalnızca bağımlı olduğu aşamalar bittiğinde başlar; bağımsız aşamalar
+(ör. 9:16 ölçekleme ile ses ayıklama + Gemini transkripsiyonu) aynı anda yürür.
+Toplu işlerde birçok grafik aynı anda, aşama türüne (lane) göre ortak havuzlarda çalışır.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from dataclasses import dataclass, field
+from typing import Callable
+
+# Aşama durumları
+PENDING = 'pending'
+RUNNING = 'running'
+DONE = 'done'
+ERROR = 'error'
+SKIPPED = 'skipped'
+
+
+@dataclass
+class Stage:
+    """Tek bir işleme aşaması.
+
+    func(girdiler, report) çağrılır: girdiler bağımlılıkların sonuçlarını içeren sözlüktür,
+    report(percent, speed=None, eta=None) aşama içi ilerlemeyi bildirir (ör. ffmpeg'den).
+    weight, genel ilerleme yüzdesinde bu aşamanın payıdır.
+    lane yalnızca run_graphs'ta kullanılır (ör. 'transcribe', 'encode').
+    """
+    name: str
+    func: Callable[[dict, Callable], object]
+    deps: tuple = ()
+    weight: float = 1.0
+    message: str = ''
+    # Toplu çalıştırmada aşamanın hangi ortak havuzda yürüyeceği ('' : varsayılan havuz)
+    lane: str = ''
+    status: str = field(default=PENDING, init=False)
+    percent: float = field(default=0.0, init=False)
+    speed: float | None = field(default=None, init=False)
+    eta: float | None = field(default=None, init=False)
+
+    def info(self) -> dict:
+        bilgi = {'status': self.status, 'progress': int(self.percent)}
+        if self.status == RUNNING:
+            if self.speed is not None:
+                bilgi['speed'] = round(self.speed, 2)
+            if self.eta is not None:
+                bilgi['eta_sec'] = int(self.eta)
+        return bilgi
+
+
+def _progress(stages: list) -> int:
+    toplam = sum(s.weight for s in stages) or 1.0
+    biten = sum(s.weight * (1.0 if s.status == DONE else s.percent / 100.0 if s.status == RUNNING else 0.0) for s in stages)
+    return int(100 * biten / toplam)
+
+
+def _dogrula(stages: list) -> dict:
+    by_name = {s.name: s for s in stages}
+    for s in stages:
+        for d in s.deps:
+            if d not in by_name:
+                raise ValueError(f"'{s.name}' aşaması bilinmeyen '{d}' aşamasına bağlı.")
+    return by_name
+
+
+def run_stages(stages: list, on_update: Callable[[dict], None] | None = None, max_workers: int | None = None) -> dict:
+    """Aşamaları bağımlılık sırasına uyarak, mümkün olduğunca paralel çalıştırır.
+
+    on_update her durum değişikliğinde {'stages': {ad: {'status', 'progress', 'speed', 'eta_sec'}},
+    'progress': int, 'message': str} ile çağrılır. Bir aşama hata verirse henüz başlamamış aşamalar atlanır, çalışanların
+    bitmesi beklenir ve ilk hata yeniden fırlatılır.
+    Dönüş: {aşama_adı: sonuç}
+    """
+    sonuc = run_graphs(
+        {None: stages},
+        on_update=(lambda key, update: on_update(update)) if on_update else None,
+        default_workers=max_workers or len(stages) or 1,
+    )[None]
+    if isinstance(sonuc, Exception):
+        raise sonuc
+    return sonuc
+
+
+def run_graphs(graphs: dict, lanes: dict | None = None,
+               on_update: Callable[[object, dict], None] | None = None,
+               on_done: Callable[[object, object], None] | None = None,
+               default_workers: int = 1) -> dict:
+    """Birden çok aşama grafiğini (ör. toplu işteki her video) ortak havuzlarda çalıştırır.
+
+    Her aşama kendi lane'inin havuzunda yürür; lanes {lane: worker sayısı} havuz boyutlarını
+    verir, listede olmayan lane'ler default_workers boyutlu havuzu paylaşır. Hazır olan
+    aşamalar grafik sırasıyla kuyruğa girer: öndeki işin kodlaması, arkadakilerin
+    transkripsiyonu sürerken başlar ve havuzlar boş beklemez.
+
+    Hatalar grafik başınadır: bir grafiğin aşaması hata verirse yalnızca o grafiğin
+    başlamamış aşamaları atlanır, diğerleri çalışmaya devam eder.
+    on_update(key, update) run_stages'teki biçimle, on_done(key, sonuç) grafik bittiğinde
+    çağrılır. Dönüş: {key: {aşama_adı: sonuç} ya da ilk hata (Exception)}
+    """
+    lanes = lanes or {}
+    durumlar = {key: {'stages': stages, 'by_name': _dogrula(stages), 'results': {}, 'error': None}
+                for key, stages in graphs.items()}
+    sonuclar = {}
+    lock = threading.Lock()
+    pools = {}
+    futures = {}
+
+    def havuz(lane):
+        if lane not in pools:
+            boyut = lanes.get(lane) or default_workers
+            pools[lane] = ThreadPoolExecutor(max_workers=max(1, int(boyut)), thread_name_prefix=f"stage-{lane or 'default'}")
+        return pools[lane]
+
+    def bildir(key):
+        if not on_update:
+            return
+        stages = durumlar[key]['stages']
+        calisan = [s.message for s in stages if s.status == RUNNING and s.message]
+        on_update(key, {
+            'stages': {s.name: s.info() for s in stages},
+            'progress': _progress(stages),
+            'message': ' / '.join(calisan),
+        })
+
+    def raporlayici(key, s):
+        def report(percent, speed=None, eta=None):
+            with lock:
+                if s.status != RUNNING:
+                    return
+                if percent is not None:
+                    s.percent = max(s.percent, min(100.0, float(percent)))
+                s.speed = speed
+                s.eta = eta
+                bildir(key)
+        return report
+
+    def baslat(key):
+        durum = durumlar[key]
+        for s in durum['stages']:
+            if s.status == PENDING and all(durum['by_name'][d].status == DONE for d in s.deps):
+                s.status = RUNNING
+                girdiler = {d: durum['results'][d] for d in s.deps}
+                futures[havuz(s.lane).submit(s.func, girdiler, raporlayici(key, s))] = (key, s)
+
+    def bitti_mi(key):
+        """Grafikte çalışan aşama kalmadıysa sonucunu kaydeder; bittiyse True döner."""
+        durum = durumlar[key]
+        if any(s.status == RUNNING for s in durum['stages']):
+            return False
+        kalan = [s.name for s in durum['stages'] if s.status == PENDING]
+        if durum['error'] is None and kalan:
+            # Bağımlılığı hiç karşılanamayan aşama kaldıysa (döngü) bunu bildir
+            durum['error'] = ValueError(f"Aşama grafiğinde döngü var: {', '.join(kalan)}")
+        sonuclar[key] = durum['error'] if durum['error'] is not None else durum['results']
+        return True
+
+    try:
+        bitenler_sirali = []
+        with lock:
+            for key in durumlar:
+                baslat(key)
+                bildir(key)
+                if bitti_mi(key):
+                    bitenler_sirali.append(key)
+        while True:
+            for key in bitenler_sirali:
+                if on_done:
+                    on_done(key, sonuclar[key])
+            if not futures:
+                break
+            bitenler, _ = wait(list(futures), return_when=FIRST_COMPLETED)
+            bitenler_sirali = []
+            with lock:
+                degisen = []
+                for fut in bitenler:
+                    key, s = futures.pop(fut)
+                    durum = durumlar[key]
+                    try:
+                        durum['results'][s.name] = fut.result()
+                        s.status = DONE
+                        s.percent = 100.0
+                    except Exception as e:
+                        s.status = ERROR
+                        if durum['error'] is None:
+                            durum['error'] = e
+                    if key not in degisen:
+                        degisen.append(key)
+                for key in degisen:
+                    durum = durumlar[key]
+                    if durum['error'] is None:
+                        baslat(key)
+                    else:
+                        for s in durum['stages']:
+                            if s.status == PENDING:
+                                s.status = SKIPPED
+                    bildir(key)
+                    if bitti_mi(key):
+                        bitenler_sirali.append(key)
+    finally:
+        for pool in pools.values():
+            pool.shutdown(wait=True)
+    return sonuclar
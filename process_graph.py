@@ -0,0 +1,154 @@
+"""Bir videonun işleme akışı: ses -> transkripsiyon -> (ölçekleme) -> altyazı basma.
+
+Web uygulaması (app.py) ve komut satırı (cli.py) aynı aşama grafiğini buradan kurar; adım
+sırası, zaman esnetme ve tek/iki geçiş seçimi tek yerde tanımlıdır. Ortama özgü işler
+(kodlama/transkripsiyon slotları, disk kaydı, ilerleme duyurusu) kanca olarak verilir.
+"""
+import os
+from contextlib import nullcontext
+
+import pipeline
+import video_processor
+
+
+def style_kwargs(style_options, font_path=None):
+    """Altyazı basma fonksiyonlarına geçilecek ortak stil parametreleri."""
+    return dict(
+        font_path=font_path,
+        is_bold=style_options['is_bold'],
+        has_background=style_options['has_background'],
+        bg_opacity=style_options['bg_opacity'],
+        has_animation=style_options['has_animation'],
+        margin_v=style_options['margin_v'],
+        font_size=style_options.get('font_size', 60),
+        outline_px=style_options.get('outline_px', 3),
+        shadow_px=style_options.get('shadow_px', 2),
+        alignment=style_options.get('alignment', 2),
+        crf=style_options.get('crf', 20),
+        fps=style_options.get('fps', None),
+        margin_l=style_options.get('margin_l', 80),
+        margin_r=style_options.get('margin_r', 80)
+    )
+
+
+def _slotsuz(func, parallel=False):
+    return func
+
+
+def _sesi_sil(path):
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def build_process_stages(video_path, output_folder, style_options, font_path=None, *,
+                         with_encode_slot=_slotsuz, transcribe_slot=nullcontext,
+                         on_audio=None, on_audio_stats=None, release_audio=_sesi_sil, render_report=None):
+    """İşleme akışını aşama grafiği olarak kurar.
+
+    Ses kopyalanarak taşındığı için doğrudan orijinal videodan ayıklanır; böylece
+    ses -> Gemini kolu, 9:16 ölçekleme ile paralel yürür. Kritik yol:
+    max(ölçekleme, transkripsiyon) + altyazı basma.
+    Aşamalar 'audio', 'transcribe' ve 'encode' lane'lerine ayrılır (toplu işlerde ortak havuzlar).
+
+    Kancalar:
+      with_encode_slot(func, parallel=False): kodlama aşamasını sarar; parallel=True ise
+        func'a parallel=<aralık sayısı> geçebilir.
+      transcribe_slot(): Gemini çağrısı süresince tutulan bağlam yöneticisi.
+      on_audio(audio): ayıklanan ses ve ölçümleri (ör. disk kaydı için).
+      on_audio_stats(stats): yüklenen bayt ve kırpılan süre (ses ayıklanınca), ardından
+        ölçülen Gemini süreleri ve kazanılan süre tahminleri (transkripsiyon bitince).
+      release_audio(path): transkripsiyondan sonra sesi siler.
+      render_report(output_path, report): progressive çıktıda altyazı basmanın ilerleme
+        geri çağrısını sarar (akış yolunun duyurulması için).
+    """
+    subtitle_mode = style_options.get('subtitle_mode', 'burn')
+    # Yumuşak altyazıda uzun bir kodlama olmadığı için kodlanırken izlemeye gerek yok
+    progressive = style_options.get('progressive', False) and subtitle_mode == 'burn'
+
+    def rapor(output_path, report):
+        return render_report(output_path, report) if progressive and render_report else report
+
+    def extract_audio(r, report):
+        audio = video_processor.transkripsiyon_sesi_hazirla(video_path, output_folder, on_progress=report)
+        if on_audio:
+            on_audio(audio)
+        if on_audio_stats:
+            on_audio_stats(video_processor.transkripsiyon_olcumleri(audio))
+        return audio
+
+    def transcribe(r, report):
+        audio = r['audio']
+        olcum = {}
+        try:
+            with transcribe_slot():
+                subtitles_data = video_processor.gemini_altyazi_olustur(audio['path'], olcum=olcum)
+        finally:
+            # Ses yalnızca transkripsiyon için gerekir
+            release_audio(audio['path'])
+        if on_audio_stats:
+            on_audio_stats(video_processor.transkripsiyon_olcumleri(audio, olcum))
+        subtitles_data = video_processor.zaman_haritasiyla_esle(subtitles_data, audio['time_map'])
+        # Zaman esnetme istenirse (ilk işlemde) uygula
+        if style_options.get('timing_relax'):
+            subtitles_data = video_processor.relax_timings(subtitles_data, start_pad_sec=0.0, end_pad_sec=0.5)
+        return subtitles_data
+
+    stages = [
+        pipeline.Stage('audio', extract_audio, weight=1, message='Ses ayrıştırılıyor...', lane='audio'),
+        pipeline.Stage('transcribe', transcribe, deps=('audio',),
+                       weight=4, message='Gemini AI ile altyazılar oluşturuluyor...', lane='transcribe'),
+    ]
+    if style_options.get('fused', True):
+        # Tek geçiş: ölçekleme + altyazı tek kodlamada yapılır
+        stages.append(pipeline.Stage(
+            'render',
+            with_encode_slot(lambda r, report, parallel=1: video_processor.videoyu_boyutlandir_ve_altyazi_ekle(
+                video_path, r['transcribe'], output_folder,
+                width=style_options.get('width', 1080),
+                height=style_options.get('height', 1920),
+                base_mode=style_options.get('base_mode', 'copy'),
+                on_progress=rapor(os.path.join(
+                    output_folder, f"{os.path.splitext(os.path.basename(video_path))[0]}_9x16_altyazili.mp4"), report),
+                parallel=parallel,
+                progressive=progressive,
+                subtitle_mode=subtitle_mode,
+                **style_kwargs(style_options, font_path)
+            )[0], parallel=True),
+            deps=('transcribe',), weight=4, message='Video 9:16 boyutuna getiriliyor ve altyazılar ekleniyor...', lane='encode'
+        ))
+        return stages
+    # İki geçiş: ölçekleme transkripsiyonla aynı anda yürür
+    stages.append(pipeline.Stage(
+        'resize',
+        with_encode_slot(lambda r, report: video_processor.videoyu_9_16_boyutuna_getir(
+            video_path, output_folder,
+            width=style_options.get('width', 1080),
+            height=style_options.get('height', 1920),
+            crf=style_options.get('crf', 20),
+            fps=style_options.get('fps', None),
+            on_progress=report
+        )),
+        weight=3, message='Video 9:16 boyutuna getiriliyor...', lane='encode'
+    ))
+    if subtitle_mode == 'soft':
+        # Ölçeklenmiş videoya altyazı izi eklenir; görüntü kopyalanır
+        stages.append(pipeline.Stage(
+            'render',
+            with_encode_slot(lambda r, report: video_processor.yumusak_altyazi_ekle(
+                r['resize'], r['transcribe'], output_folder, on_progress=report,
+                **style_kwargs(style_options, font_path)
+            )[0]),
+            deps=('resize', 'transcribe'), weight=1, message='Altyazı izi videoya ekleniyor...', lane='encode'
+        ))
+        return stages
+    stages.append(pipeline.Stage(
+        'render',
+        with_encode_slot(lambda r, report, parallel=1: video_processor.altyazilari_videoya_ekle(
+            r['resize'], r['transcribe'], output_folder, parallel=parallel, progressive=progressive,
+            on_progress=rapor(os.path.join(
+                output_folder, f"{os.path.splitext(os.path.basename(r['resize']))[0]}_altyazili.mp4"), report),
+            **style_kwargs(style_options, font_path)
+        ), parallel=True),
+        deps=('resize', 'transcribe'), weight=3, message='Altyazılar videoya ekleniyor...', lane='encode'
+    ))
+    return stages
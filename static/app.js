@@ -33,6 +33,77 @@ $(document).ready(function() {
         });
     }
     loadHostInfo();
+
+    // Tarayıcıda SHA-256 (yalnızca güvenli bağlamda ve makul boyutta; yoksa null)
+    const HASH_MAX_BYTES = 256 * 1024 * 1024;
+    function sha256Hex(file) {
+        if (!window.crypto || !window.crypto.subtle || file.size > HASH_MAX_BYTES) {
+            return Promise.resolve(null);
+        }
+        return file.arrayBuffer()
+            .then(function(buf) { return window.crypto.subtle.digest('SHA-256', buf); })
+            .then(function(digest) {
+                return Array.from(new Uint8Array(digest)).map(function(b) { return b.toString(16).padStart(2, '0'); }).join('');
+            })
+            .catch(function() { return null; });
+    }
+
+    // Videoyu parçalar halinde yükler; bağlantı koparsa sunucudaki konumdan devam eder.
+    // Aynı içerik sunucuda varsa hiç aktarım yapılmaz. Sonuç: video_id
+    function uploadVideoChunked(file, onProgress) {
+        const MAX_RETRIES = 5;
+        return sha256Hex(file).then(function(hash) {
+            return $.ajax({
+                url: api('/uploads'),
+                type: 'POST',
+                contentType: 'application/json',
+                data: JSON.stringify({ filename: file.name, size: file.size, sha256: hash })
+            });
+        }).then(function(init) {
+            if (!init.success) throw new Error(init.error || 'Yükleme başlatılamadı.');
+            if (init.complete) return init.video_id;
+            const chunkSize = init.chunk_size || (8 * 1024 * 1024);
+            let offset = init.offset || 0;
+            let retries = 0;
+
+            function sendNext() {
+                if (offset >= file.size) {
+                    return Promise.reject(new Error('Yükleme tamamlanamadı.'));
+                }
+                const chunk = file.slice(offset, Math.min(offset + chunkSize, file.size));
+                return fetch(api('/uploads/' + init.upload_id + '?offset=' + offset), {
+                    method: 'PUT',
+                    headers: { 'Content-Type': 'application/octet-stream' },
+                    body: chunk
+                }).then(function(resp) {
+                    return resp.json().then(function(data) { return { status: resp.status, data: data }; });
+                }).then(function(r) {
+                    if (r.status === 409 && r.data.offset !== undefined) {
+                        // Sunucu başka bir konumda: oradan devam et
+                        offset = r.data.offset;
+                        return sendNext();
+                    }
+                    if (!r.data.success) throw new Error(r.data.error || 'Parça yüklenemedi.');
+                    retries = 0;
+                    offset = r.data.offset;
+                    onProgress(offset / file.size);
+                    return r.data.complete ? r.data.video_id : sendNext();
+                }).catch(function(err) {
+                    if (++retries > MAX_RETRIES) throw err;
+                    // Ağ hatası: kısa bekleme, sunucudaki konumu sor ve devam et
+                    return new Promise(function(resolve) { setTimeout(resolve, 1000 * retries); })
+                        .then(function() { return $.get(api('/uploads/' + init.upload_id)); })
+                        .then(function(st) {
+                            if (st.complete) return st.video_id;
+                            offset = st.offset;
+                            return sendNext();
+                        });
+                });
+            }
+            return sendNext();
+        });
+    }
+
     $('#upload-form').on('submit', function(event) {
         event.preventDefault();
 
@@ -50,6 +121,7 @@ $(document).ready(function() {
         formData.append('has_animation', $('#animation-switch').is(':checked'));
         formData.append('is_bold', $('#bold-switch').is(':checked'));
         formData.append('timing_relax', $('#timing-relax-switch').is(':checked'));
+        formData.append('progressive', $('#progressive-switch').is(':checked'));
         formData.append('bg_opacity', $('#bg-opacity').val());
         formData.append('margin_v', $('#margin-v').val());
         // Yeni gelişmiş stil parametreleri
@@ -57,6 +129,7 @@ $(document).ready(function() {
         formData.append('outline_px', $('#outline-px').val() || 3);
         formData.append('shadow_px', $('#shadow-px').val() || 2);
         formData.append('resolution', $('#resolution').val() || '1080x1920');
+        formData.append('subtitle_mode', $('#subtitle-mode').val() || 'burn');
         formData.append('alignment', $('#alignment').val() || 2);
         formData.append('crf', $('#crf').val() || 20);
         formData.append('fps', $('#fps').val() || '');
@@ -79,70 +152,168 @@ $(document).ready(function() {
         $('.progress').show();
         $('#progress-bar').css('width', '5%').text('Yükleniyor...');
         $('#download-link').hide();
+        showSidecars(null);
         $('#editor-container').hide();
 
-        $.ajax({
-            url: api('/process'),
-            type: 'POST',
-            data: formData,
-            processData: false,
-            contentType: false,
-            success: function(response) {
-                if (response.success && response.task_id) {
-                    // Görev ID'si alındı, durumu kontrol etmeye başla
-                    checkStatus(response.task_id);
-                } else {
-                    handleError(response.error || "Sunucudan geçersiz yanıt alındı.");
+        const videoFile = fileInput.files[0];
+        uploadVideoChunked(videoFile, function(fraction) {
+            const pct = Math.round(fraction * 100);
+            $('#progress-bar').css('width', Math.max(5, pct) + '%').text('Yükleniyor ' + pct + '%');
+        }).then(function(videoId) {
+            // Video zaten sunucuda: /process yalnızca kimliği ve ayarları alır
+            formData.delete('video');
+            formData.append('video_id', videoId);
+            formData.append('filename', videoFile.name);
+            $('#status-message').text('Görev başlatılıyor...');
+            $.ajax({
+                url: api('/process'),
+                type: 'POST',
+                data: formData,
+                processData: false,
+                contentType: false,
+                success: function(response) {
+                    if (response.success && response.task_id) {
+                        // Görev ID'si alındı, durumu kontrol etmeye başla
+                        checkStatus(response.task_id);
+                    } else {
+                        handleError(response.error || "Sunucudan geçersiz yanıt alındı.");
+                    }
+                },
+                error: function(xhr, status, error) {
+                     if ((xhr.status === 429 || xhr.status === 400) && xhr.responseJSON && xhr.responseJSON.error) {
+                         handleError(xhr.responseJSON.error);
+                     } else {
+                         handleError("Sunucuyla iletişim kurulamadı: " + error);
+                     }
+                     $('#submit-btn').prop('disabled', false).text('Altyazı Oluşturmaya Başla');
+                     $('.progress').hide();
                 }
-            },
-            error: function(xhr, status, error) {
-                 handleError("Sunucuyla iletişim kurulamadı: " + error);
-                 $('#submit-btn').prop('disabled', false).text('Altyazı Oluşturmaya Başla');
-                 $('.progress').hide();
-            }
+            });
+        }).catch(function(err) {
+            const msg = (err && err.responseJSON && err.responseJSON.error) || (err && err.message) || 'bilinmeyen hata';
+            handleError('Video yüklenemedi: ' + msg);
+            $('#submit-btn').prop('disabled', false).text('Altyazı Oluşturmaya Başla');
         });
     });
 
     let originalSubtitles = []; // Orijinal altyazıları saklamak için
     let currentVideoPath = ""; // İşlenmiş video yolunu saklamak için
+    let streamingPath = null; // Kodlanırken oynatılan çıktının yolu
+
+    // Durum güncellemesini arayüze uygular; işlem bittiyse true döner
+    function applyStatus(response) {
+        // İlerleme çubuğunu ve mesajı güncelle
+        if (response.message !== undefined) {
+            $('#status-message').text(response.message || '');
+        }
+        if(response.progress) {
+            $('#progress-bar').css('width', response.progress + '%').text(response.progress + '%');
+        }
+        // Kodlanırken izleme: çıktı yazılmaya başladıysa büyüyen dosyayı oynat
+        if (response.stream_path && response.status !== 'complete' && response.stream_path !== streamingPath) {
+            streamingPath = response.stream_path;
+            const streamUrl = api('/stream/' + streamingPath.split('/').pop()) + '?t=' + new Date().getTime();
+            $('#video-preview').attr('src', streamUrl);
+        }
+
+        if (response.status === 'complete') {
+            // Akıştan izleniyorsa tamamlanmış dosyada aynı konumdan devam et
+            const resumeAt = streamingPath ? $('#video-preview')[0].currentTime : 0;
+            streamingPath = null;
+            $('#status-message').text('İşlem başarıyla tamamlandı!');
+            currentVideoPath = response.video_path; // Video yolunu sakla
+            
+            // Önbelleği atlatmak için URL'ye rastgele bir parametre ekle
+            const finalUrl = api('/' + currentVideoPath) + '?t=' + new Date().getTime();
+            $('#video-preview').attr('src', finalUrl);
+            if (resumeAt > 0) {
+                $('#video-preview').one('loadedmetadata', function() { this.currentTime = resumeAt; });
+            }
+            const fname = currentVideoPath.split('/').pop();
+            const dlUrl = api('/download/' + fname) + '?t=' + new Date().getTime();
+            $('#download-link').attr('href', dlUrl).attr('download','video.mp4').show();
+            showSidecars(response.sidecars);
+
+            if(response.subtitles && response.subtitles.length > 0) {
+                originalSubtitles = JSON.parse(JSON.stringify(response.subtitles)); // Derin kopya
+                populateSubtitlesTable(originalSubtitles);
+                populateColorPalette(originalSubtitles); // Renk paletini oluştur
+                $('#editor-container').show();
+            }
+            $('#submit-btn').prop('disabled', false).text('Yeni Video İşle');
+            return true;
+
+        } else if (response.status === 'error') {
+            streamingPath = null;
+            handleError(response.message || 'Bilinmeyen bir hata oluştu.');
+            $('#submit-btn').prop('disabled', false).text('Tekrar Dene');
+            return true;
+        }
+        return false;
+    }
+
+    // Ayrı iz modunda SRT/VTT/ASS indirme bağlantıları; VTT önizlemede <track> olarak gösterilir
+    function showSidecars(sidecars) {
+        const links = $('#sidecar-links').empty().hide();
+        $('#video-preview track').remove();
+        if (!sidecars) {
+            return;
+        }
+        const stamp = '?t=' + new Date().getTime();
+        Object.keys(sidecars).forEach(function(fmt) {
+            const fname = sidecars[fmt].split('/').pop();
+            $('<a class="btn btn-outline-success btn-sm"></a>')
+                .attr('href', api('/download/' + fname) + stamp)
+                .attr('download', 'subtitles.' + fmt)
+                .text('.' + fmt.toUpperCase())
+                .appendTo(links);
+        });
+        links.show();
+        if (sidecars.vtt) {
+            $('<track kind="subtitles" label="Altyazı" default>')
+                .attr('src', api('/' + sidecars.vtt) + stamp)
+                .appendTo('#video-preview');
+        }
+    }
 
+    // Önce SSE akışını dene; desteklenmiyor veya sunucu reddediyorsa sorgulamaya geç
     function checkStatus(taskId) {
+        if (!window.EventSource) {
+            pollStatus(taskId);
+            return;
+        }
+        var finished = false;
+        var source = new EventSource(api('/status/' + taskId + '/stream'));
+        function finish(data) {
+            finished = true;
+            source.close();
+            applyStatus(data);
+        }
+        source.addEventListener('status', function(e) {
+            applyStatus(JSON.parse(e.data));
+        });
+        source.addEventListener('complete', function(e) { finish(JSON.parse(e.data)); });
+        source.addEventListener('error', function(e) {
+            // Sunucunun gönderdiği 'error' olayının verisi vardır; bağlantı hatasının yoktur
+            if (e.data) {
+                finish(JSON.parse(e.data));
+                return;
+            }
+            if (!finished && source.readyState === EventSource.CLOSED) {
+                pollStatus(taskId);
+            }
+        });
+    }
+
+    function pollStatus(taskId) {
         var failures = 0;
         var interval = setInterval(function() {
             $.ajax({
                 url: api('/status/' + taskId),
                 type: 'GET',
                 success: function(response) {
-                    // İlerleme çubuğunu ve mesajı güncelle
-                    $('#status-message').text(response.message || '');
-                    if(response.progress) {
-                        $('#progress-bar').css('width', response.progress + '%').text(response.progress + '%');
-                    }
-
-                    if (response.status === 'complete') {
-                        clearInterval(interval); // Sorgulamayı durdur
-                        $('#status-message').text('İşlem başarıyla tamamlandı!');
-                        currentVideoPath = response.video_path; // Video yolunu sakla
-                        
-                        // Önbelleği atlatmak için URL'ye rastgele bir parametre ekle
-                        const finalUrl = api('/' + currentVideoPath) + '?t=' + new Date().getTime();
-                        $('#video-preview').attr('src', finalUrl);
-                        const fname = currentVideoPath.split('/').pop();
-                        const dlUrl = api('/download/' + fname) + '?t=' + new Date().getTime();
-                        $('#download-link').attr('href', dlUrl).attr('download','video.mp4').show();
-
-                        if(response.subtitles && response.subtitles.length > 0) {
-                            originalSubtitles = JSON.parse(JSON.stringify(response.subtitles)); // Derin kopya
-                            populateSubtitlesTable(originalSubtitles);
-                            populateColorPalette(originalSubtitles); // Renk paletini oluştur
-                            $('#editor-container').show();
-                        }
-                        $('#submit-btn').prop('disabled', false).text('Yeni Video İşle');
-
-                    } else if (response.status === 'error') {
+                    if (applyStatus(response)) {
                         clearInterval(interval); // Sorgulamayı durdur
-                        handleError(response.message || 'Bilinmeyen bir hata oluştu.');
-                        $('#submit-btn').prop('disabled', false).text('Tekrar Dene');
                     }
                 },
                 error: function() {
@@ -299,8 +470,8 @@ $(document).ready(function() {
         }
     });
 
-    // Değişiklikleri uygula butonu
-    $('#apply-changes-btn').on('click', function() {
+    // Editördeki altyazı ve stil alanlarından FormData oluşturur (/reprocess ve /preview için)
+    function buildEditorFormData() {
         const editedSubtitles = getSubtitlesFromTable();
         const colorMap = getColorMap();
         const fontFile = $('#font-file')[0].files[0];
@@ -314,6 +485,7 @@ $(document).ready(function() {
         formData.append('has_animation', $('#animation-switch').is(':checked'));
         formData.append('is_bold', $('#bold-switch').is(':checked'));
         formData.append('timing_relax', $('#timing-relax-switch').is(':checked'));
+        formData.append('progressive', $('#progressive-switch').is(':checked'));
         formData.append('bg_opacity', $('#bg-opacity').val());
         formData.append('margin_v', $('#margin-v').val()); // Dikey konumu ekle
         formData.append('font_size', $('#font-size').val() || 60);
@@ -322,6 +494,8 @@ $(document).ready(function() {
         formData.append('alignment', $('#alignment').val() || 2);
         formData.append('crf', $('#crf').val() || 20);
         formData.append('fps', $('#fps').val() || '');
+        formData.append('resolution', $('#resolution').val() || '1080x1920');
+        formData.append('subtitle_mode', $('#subtitle-mode').val() || 'burn');
         formData.append('margin_l', $('#margin-l').val() || 80);
         formData.append('margin_r', $('#margin-r').val() || 80);
         formData.append('selected_font', $('#font-select').val());
@@ -329,6 +503,12 @@ $(document).ready(function() {
         if (fontFile) {
             formData.append('font_file', fontFile);
         }
+        return formData;
+    }
+
+    // Değişiklikleri uygula butonu
+    $('#apply-changes-btn').on('click', function() {
+        const formData = buildEditorFormData();
 
         $(this).prop('disabled', true).text('Uygulanıyor...');
 
@@ -345,8 +525,12 @@ $(document).ready(function() {
                     handleError(response.error || 'Yeniden işleme başlatılamadı.');
                 }
             },
-            error: function() {
-                handleError('Yeniden işleme sırasında sunucu hatası.');
+            error: function(xhr) {
+                if (xhr.status === 429 && xhr.responseJSON && xhr.responseJSON.error) {
+                    handleError(xhr.responseJSON.error);
+                } else {
+                    handleError('Yeniden işleme sırasında sunucu hatası.');
+                }
             },
             complete: function() {
                 $('#apply-changes-btn').prop('disabled', false).text('Değişiklikleri Uygula ve Videoyu Yeniden Oluştur');
@@ -354,6 +538,47 @@ $(document).ready(function() {
         });
     });
 
+    // Stil önizlemesi: tüm videoyu kodlamadan birkaç altyazılı kare üretir
+    $('#preview-btn').on('click', function() {
+        const formData = buildEditorFormData();
+        formData.append('mode', 'stills');
+        formData.append('count', 4);
+
+        $(this).prop('disabled', true).text('Önizleniyor...');
+
+        $.ajax({
+            url: api('/preview'),
+            type: 'POST',
+            data: formData,
+            processData: false,
+            contentType: false,
+            success: function(response) {
+                if (response.success && response.stills) {
+                    const container = $('#preview-stills').empty();
+                    response.stills.forEach(function(item) {
+                        const img = $('<img class="img-fluid rounded" style="max-width: 24%;">');
+                        img.attr('src', api('/' + item.image_path) + '?t=' + Date.now());
+                        img.attr('title', item.time.toFixed(2) + ' sn');
+                        container.append(img);
+                    });
+                    container.removeClass('d-none').addClass('d-flex');
+                } else {
+                    handleError(response.error || 'Önizleme oluşturulamadı.');
+                }
+            },
+            error: function(xhr) {
+                if (xhr.status === 429 && xhr.responseJSON && xhr.responseJSON.error) {
+                    handleError(xhr.responseJSON.error);
+                } else {
+                    handleError('Önizleme sırasında sunucu hatası.');
+                }
+            },
+            complete: function() {
+                $('#preview-btn').prop('disabled', false).text('Stili Önizle');
+            }
+        });
+    });
+
     $('#export-srt-btn').on('click', function() {
         const subs = getSubtitlesFromTable();
         exportSRT(subs);
@@ -0,0 +1,382 @@
+"""Yüklemeler, ara dosyalar ve çıktılar için disk kotası yöneticisi.
+
+Her dosya/klasör (artifact) bir türle ve varsa iş kimliğiyle SQLite'ta kaydedilir.
+Yönetilen klasörler taranır; kaydı olmayan eski dosyalar da sahiplenilir. Süresi dolan
+(TTL) dosyalar silinir; toplam boyut kotayı aşarsa en uzun süredir kullanılmayanlardan
+başlanarak alt sınıra inilir (LRU). Bekleyen bir işin kullandığı dosyalar sabitlenir (pin)
+ve silinmez. Transkripsiyon sesi işi biter bitmez silinir.
+
+Yükleme deposundaki asıl dosya ile uploads/jobs/ altındaki hard link'leri aynı inode'u
+paylaşır: boyut bir kez sayılır ve kota için birlikte silinirler (biri kalırsa yer boşalmaz).
+"""
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+import task_store
+
+STORAGE_DB_PATH = os.environ.get('STORAGE_DB_PATH', os.path.join('cache', 'storage.sqlite3'))
+# Yönetilen klasörlerin toplam boyut sınırı (varsayılan 5 GB)
+STORAGE_QUOTA_BYTES = int(os.environ.get('STORAGE_QUOTA_BYTES', 5 * 1024 * 1024 * 1024))
+# Kota aşıldığında bu orana kadar silinir; her işte yeniden temizlik yapılmasın
+STORAGE_LOW_WATERMARK = float(os.environ.get('STORAGE_LOW_WATERMARK', 0.9))
+# Varsayılan saklama süresi (3 gün); türlere özel süreler KIND_TTL_SEC'te
+STORAGE_TTL_SEC = int(os.environ.get('STORAGE_TTL_SEC', 3 * 24 * 3600))
+# Bu süreden yeni dosyalar kota için silinmez (yazılmakta olabilir)
+MIN_AGE_SEC = 600
+# Çöken bir işin bıraktığı sabitlemeler bu süre sonunda yok sayılır
+PIN_MAX_SEC = 6 * 3600
+ENFORCE_INTERVAL_SEC = 60
+
+# Tür -> saklama süresi (None: STORAGE_TTL_SEC)
+KIND_TTL_SEC = {
+    'audio': 3600,
+    'preview': 3600,
+    'partial': 24 * 3600,
+    'job_dir': 6 * 3600,
+}
+# Kota aşımında LRU ile silinmeyen türler (yalnızca TTL ile silinir): yarım yüklemeler ve çalışan iş klasörleri
+NO_LRU_KINDS = ('partial', 'job_dir')
+# Tür -> LRU'ya girmeden önce beklenecek süre (None: MIN_AGE_SEC). Taban video, görevi
+# görev deposunda durduğu sürece editörden yeniden işlenebilir; bu sürede kota için silinmez.
+KIND_LRU_MIN_AGE_SEC = {
+    'base': task_store.TASK_TTL_SEC,
+}
+AUDIO_EXTENSIONS = ('.mp3', '.ogg', '.opus', '.wav', '.m4a', '.aac', '.flac')
+
+
+def _path_size(path: str) -> int:
+    try:
+        st = os.lstat(path)
+    except OSError:
+        return 0
+    if not os.path.isdir(path):
+        return st.st_size
+    toplam = 0
+    for kok, _, dosyalar in os.walk(path):
+        for ad in dosyalar:
+            try:
+                toplam += os.lstat(os.path.join(kok, ad)).st_size
+            except OSError:
+                pass
+    return toplam
+
+
+def _inode(path: str):
+    """Dosyanın 'cihaz:inode' kimliği; hard link'ler aynı kimliği paylaşır (klasörlerde None)."""
+    try:
+        st = os.lstat(path)
+    except OSError:
+        return None
+    if os.path.isdir(path):
+        return None
+    return f"{st.st_dev}:{st.st_ino}"
+
+
+class StorageManager:
+    """Yönetilen klasörlerdeki dosyaları izler, kota ve TTL'e göre siler."""
+
+    def __init__(self, upload_dir: str, output_dir: str, extra_roots: dict | None = None,
+                 path: str = STORAGE_DB_PATH, quota_bytes: int = STORAGE_QUOTA_BYTES, ttl_sec: int = STORAGE_TTL_SEC):
+        self.upload_dir = upload_dir
+        self.output_dir = output_dir
+        # tür -> klasör (klasördeki her girdi o türden bir artifact'tir)
+        self.extra_roots = dict(extra_roots or {})
+        self.path = path
+        self.quota_bytes = quota_bytes
+        self.ttl_sec = ttl_sec
+        self._local = threading.local()
+        self._enforce_lock = threading.Lock()
+        self._last_enforce = 0.0
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        conn = self._conn()
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS artifacts ('
+            ' path TEXT PRIMARY KEY, job_id TEXT, kind TEXT NOT NULL, size INTEGER NOT NULL DEFAULT 0,'
+            ' created_at REAL NOT NULL, last_access REAL NOT NULL, pins INTEGER NOT NULL DEFAULT 0, pinned_at REAL)'
+        )
+        try:
+            conn.execute('ALTER TABLE artifacts ADD COLUMN inode TEXT')
+        except sqlite3.OperationalError:
+            pass  # sütun zaten var
+        conn.execute('CREATE INDEX IF NOT EXISTS artifacts_job ON artifacts(job_id)')
+        conn.execute('CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL)')
+
+    def _conn(self) -> sqlite3.Connection:
+        # sqlite3 bağlantıları thread'ler arasında paylaşılmaz; her thread kendi bağlantısını açar
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _key(path: str) -> str:
+        return os.path.abspath(path)
+
+    # --- Kayıt ---
+
+    def register(self, path: str, kind: str, job_id: str | None = None) -> None:
+        """Bir işin ürettiği/kullandığı dosyayı kaydeder (varsa türünü ve işini günceller)."""
+        if not path or not os.path.exists(path):
+            return
+        now = time.time()
+        self._conn().execute(
+            'INSERT INTO artifacts (path, job_id, kind, size, inode, created_at, last_access) VALUES (?, ?, ?, ?, ?, ?, ?)'
+            ' ON CONFLICT(path) DO UPDATE SET job_id = COALESCE(excluded.job_id, job_id), kind = excluded.kind,'
+            ' size = excluded.size, inode = excluded.inode, last_access = excluded.last_access',
+            (self._key(path), job_id, kind, _path_size(path), _inode(path), now, now)
+        )
+
+    def touch(self, path: str) -> None:
+        """Dosya kullanıldı: LRU sırasında en sona alınır."""
+        self._conn().execute('UPDATE artifacts SET last_access = ? WHERE path = ?', (time.time(), self._key(path)))
+
+    def pin(self, paths) -> None:
+        """Dosyaları bekleyen/çalışan bir iş için sabitler; unpin edilene kadar silinmez."""
+        now = time.time()
+        conn = self._conn()
+        for path in paths:
+            if not path:
+                continue
+            key = self._key(path)
+            conn.execute(
+                'INSERT INTO artifacts (path, kind, size, inode, created_at, last_access, pins, pinned_at)'
+                ' VALUES (?, ?, ?, ?, ?, ?, 1, ?)'
+                ' ON CONFLICT(path) DO UPDATE SET pins = pins + 1, pinned_at = excluded.pinned_at, last_access = excluded.last_access',
+                (key, self._guess_kind(path) or 'output', _path_size(path), _inode(path), now, now, now)
+            )
+
+    def unpin(self, paths) -> None:
+        conn = self._conn()
+        for path in paths:
+            if path:
+                conn.execute('UPDATE artifacts SET pins = MAX(0, pins - 1), last_access = ? WHERE path = ?',
+                             (time.time(), self._key(path)))
+
+    @contextmanager
+    def in_use(self, *paths):
+        self.pin(paths)
+        try:
+            yield
+        finally:
+            self.unpin(paths)
+
+    # --- Silme ---
+
+    def delete(self, path: str, reason: str = 'manual') -> int:
+        """Dosyayı/klasörü ve kaydını siler; boşalan bayt sayısını döndürür.
+
+        Başka hard link'i kalan dosya silindiğinde yer boşalmaz; 0 sayılır.
+        """
+        conn = self._conn()
+        if not os.path.lexists(path):
+            conn.execute('DELETE FROM artifacts WHERE path = ?', (self._key(path),))
+            return 0
+        size = _path_size(path)
+        try:
+            if not os.path.isdir(path) and os.lstat(path).st_nlink > 1:
+                size = 0
+        except OSError:
+            pass
+        try:
+            if os.path.isdir(path) and not os.path.islink(path):
+                shutil.rmtree(path, ignore_errors=True)
+            elif os.path.exists(path):
+                os.remove(path)
+            if self._guess_kind(path) == 'partial':
+                # Yarım yüklemenin veri ve oturum dosyaları birlikte gider
+                kok = os.path.splitext(path)[0]
+                for ek in ('.part', '.json'):
+                    if os.path.exists(kok + ek):
+                        os.remove(kok + ek)
+        except OSError as e:
+            print("Dosya silinemedi:", path, e)
+            return 0
+        conn.execute('DELETE FROM artifacts WHERE path = ?', (self._key(path),))
+        self._count(conn, f'evicted_{reason}', 1)
+        self._count(conn, 'evicted_bytes', size)
+        return size
+
+    def release_job(self, job_id: str, kinds=('audio',)) -> int:
+        """İşin verilen türdeki dosyalarını (varsayılan: transkripsiyon sesi) hemen siler."""
+        marks = ','.join('?' * len(kinds))
+        rows = self._conn().execute(
+            f'SELECT path FROM artifacts WHERE job_id = ? AND kind IN ({marks})', (job_id, *kinds)
+        ).fetchall()
+        return sum(self.delete(row[0], reason='released') for row in rows)
+
+    def _count(self, conn, name: str, value: int) -> None:
+        conn.execute(
+            'INSERT INTO counters (name, value) VALUES (?, ?) ON CONFLICT(name) DO UPDATE SET value = value + excluded.value',
+            (name, int(value))
+        )
+
+    # --- Tarama ve temizlik ---
+
+    def _guess_kind(self, path: str):
+        """Yönetilen klasördeki bir yolun türünü konumundan ve adından çıkarır."""
+        ap = os.path.abspath(path)
+        up = os.path.abspath(self.upload_dir)
+        out = os.path.abspath(self.output_dir)
+        parent = os.path.dirname(ap)
+        for kind, root in self.extra_roots.items():
+            if parent == os.path.abspath(root):
+                return kind
+        if parent == os.path.join(up, '.partial'):
+            return 'partial'
+        if parent == os.path.join(up, 'jobs'):
+            return 'job_input'
+        if parent == up:
+            return 'upload'
+        if parent == os.path.join(out, 'previews'):
+            return 'preview'
+        if parent == out:
+            name = os.path.basename(ap)
+            if name.endswith('_altyazili.mp4'):
+                return 'output'
+            if name.endswith('_9x16.mp4'):
+                return 'base'
+            if name.lower().endswith(AUDIO_EXTENSIONS):
+                return 'audio'
+            return 'output'
+        return None
+
+    def _scan(self) -> dict:
+        """Yönetilen klasörlerdeki girdileri {mutlak_yol: (tür, boyut, mtime, inode)} olarak döndürür."""
+        girdiler = {}
+
+        def ekle(dizin, alt_klasorlere_in=()):
+            try:
+                liste = list(os.scandir(dizin))
+            except OSError:
+                return
+            for de in liste:
+                if de.is_dir(follow_symlinks=False) and de.name in alt_klasorlere_in:
+                    ekle(de.path)
+                    continue
+                kind = self._guess_kind(de.path)
+                if kind is None:
+                    continue
+                try:
+                    st = de.stat(follow_symlinks=False)
+                except OSError:
+                    continue
+                inode = None if de.is_dir(follow_symlinks=False) else f"{st.st_dev}:{st.st_ino}"
+                girdiler[os.path.abspath(de.path)] = (kind, _path_size(de.path), st.st_mtime, inode)
+
+        ekle(self.upload_dir, ('.partial', 'jobs'))
+        ekle(self.output_dir, ('previews',))
+        for root in self.extra_roots.values():
+            ekle(root)
+        return girdiler
+
+    def _sync(self) -> list:
+        """Diskteki durumu kayıtlarla eşitler; kayıtsız dosyaları sahiplenir, silinenleri unutur."""
+        girdiler = self._scan()
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            kayitlar = {row[0]: row for row in conn.execute('SELECT path, size, inode FROM artifacts')}
+            for path, (kind, size, mtime, inode) in girdiler.items():
+                if path in kayitlar:
+                    if kayitlar[path][1:] != (size, inode):
+                        conn.execute('UPDATE artifacts SET size = ?, inode = ? WHERE path = ?', (size, inode, path))
+                else:
+                    conn.execute(
+                        'INSERT INTO artifacts (path, kind, size, inode, created_at, last_access) VALUES (?, ?, ?, ?, ?, ?)',
+                        (path, kind, size, inode, mtime, mtime)
+                    )
+            for path in kayitlar:
+                if path not in girdiler and not os.path.exists(path):
+                    conn.execute('DELETE FROM artifacts WHERE path = ?', (path,))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        rows = conn.execute('SELECT path, kind, size, last_access, pins, pinned_at, inode FROM artifacts').fetchall()
+        # Yeni yazılan dosyaların mtime'ı son erişim sayılır
+        return [
+            (path, kind, size, max(last_access, girdiler.get(path, (None, None, 0, None))[2]), pins, pinned_at, inode)
+            for path, kind, size, last_access, pins, pinned_at, inode in rows
+        ]
+
+    def enforce(self) -> dict:
+        """TTL ve kota kurallarını uygular. Dönüş: {'deleted', 'freed_bytes', 'usage_bytes'}
+
+        Kota hesabında aynı inode'u paylaşan girdiler (asıl yükleme ve iş link'leri) tek grup
+        sayılır; grup bir kez sayılır ve ancak hiçbir üyesi korunmuyorsa birlikte silinir.
+        """
+        with self._enforce_lock:
+            now = time.time()
+            rows = self._sync()
+            silinen = 0
+            bosalan = 0
+            gruplar = {}
+            for path, kind, size, last_access, pins, pinned_at, inode in rows:
+                sabit = pins > 0 and pinned_at and now - pinned_at < PIN_MAX_SEC
+                ttl = KIND_TTL_SEC.get(kind) or self.ttl_sec
+                if not sabit and ttl and now - last_access > ttl:
+                    bosalan += self.delete(path, reason='ttl')
+                    silinen += 1
+                    continue
+                korunur = (sabit or kind in NO_LRU_KINDS
+                           or now - last_access <= KIND_LRU_MIN_AGE_SEC.get(kind, MIN_AGE_SEC))
+                grup = gruplar.setdefault(inode or path, {'paths': [], 'size': 0, 'last_access': 0.0, 'korunur': False})
+                grup['paths'].append(path)
+                grup['size'] = max(grup['size'], size)
+                grup['last_access'] = max(grup['last_access'], last_access)
+                grup['korunur'] = grup['korunur'] or korunur
+            toplam = sum(g['size'] for g in gruplar.values())
+            if self.quota_bytes and toplam > self.quota_bytes:
+                hedef = self.quota_bytes * STORAGE_LOW_WATERMARK
+                adaylar = sorted((g for g in gruplar.values() if not g['korunur']), key=lambda g: g['last_access'])
+                for grup in adaylar:
+                    if toplam <= hedef:
+                        break
+                    for path in grup['paths']:
+                        bosalan += self.delete(path, reason='quota')
+                        silinen += 1
+                    toplam -= grup['size']
+                if toplam > self.quota_bytes:
+                    print(f"Disk kotası aşıldı ({toplam} > {self.quota_bytes} bayt); kalan dosyalar kullanımda.")
+            self._last_enforce = now
+            return {'deleted': silinen, 'freed_bytes': bosalan, 'usage_bytes': toplam}
+
+    def maybe_enforce(self) -> None:
+        """Temizliği en fazla ENFORCE_INTERVAL_SEC'te bir çalıştırır (hatalar işi durdurmaz)."""
+        if time.time() - self._last_enforce < ENFORCE_INTERVAL_SEC:
+            return
+        try:
+            self.enforce()
+        except Exception as e:
+            print("Disk temizliği atlandı:", e)
+
+    def usage(self) -> dict:
+        """Tür bazında disk kullanımı ve silme sayaçları."""
+        conn = self._conn()
+        by_kind = {
+            kind: {'count': count, 'bytes': size or 0}
+            for kind, count, size in conn.execute('SELECT kind, COUNT(*), SUM(size) FROM artifacts GROUP BY kind')
+        }
+        counters = dict(conn.execute('SELECT name, value FROM counters').fetchall())
+        pinned = conn.execute('SELECT COUNT(*) FROM artifacts WHERE pins > 0').fetchone()[0]
+        # Hard link'ler türlerinde ayrı görünür, toplamda inode başına bir kez sayılır
+        usage_bytes = conn.execute(
+            'SELECT COALESCE(SUM(size), 0) FROM (SELECT MAX(size) AS size FROM artifacts GROUP BY COALESCE(inode, path))'
+        ).fetchone()[0]
+        return {
+            'usage_bytes': usage_bytes,
+            'quota_bytes': self.quota_bytes,
+            'ttl_sec': self.ttl_sec,
+            'by_kind': by_kind,
+            'pinned': pinned,
+            'evictions': {k[len('evicted_'):]: v for k, v in counters.items() if k.startswith('evicted_') and k != 'evicted_bytes'},
+            'evicted_bytes': counters.get('evicted_bytes', 0),
+        }
@@ -0,0 +1,297 @@
+"""Görev durumları için paylaşılan, kalıcı depo.
+
+Süreç içi bir sözlük yerine varsayılan olarak SQLite kullanılır; böylece görevler sunucu
+yeniden başlatıldığında da sorgulanabilir. Biten görevler TTL sonunda silinir. Altyazı
+listeleri ayrı tabloda tutulur; durum sorguları bu büyük yükü okumaz.
+
+Her görev, onu çalıştıran süreçle ('_owner': host:pid) işaretlenir. Süreç öldüğünde
+(zaman aşımı, OOM, yeniden dağıtım) yarım kalan görevler açılışta fail_orphaned ile
+hatalı olarak kapatılır; istemci sonsuza dek 'processing' görmez. Aynı TASK_DB_PATH'i
+paylaşan başka host'ların (konteynerlerin) görevleri denetlenemez; yalnızca
+FOREIGN_OWNER_STALE_SEC boyunca güncellenmemişlerse yetim sayılır.
+"""
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+
+TASK_STORE = os.environ.get('TASK_STORE', 'sqlite')
+TASK_DB_PATH = os.environ.get('TASK_DB_PATH', os.path.join('cache', 'tasks.sqlite3'))
+# Tamamlanan/hatalı görevler bu süre sonunda silinir (varsayılan 24 saat)
+TASK_TTL_SEC = int(os.environ.get('TASK_TTL_SEC', 24 * 3600))
+# Süresi dolan görevler en fazla bu aralıkla taranır
+EVICT_INTERVAL_SEC = 60
+
+FINISHED_STATUSES = ('complete', 'error')
+OWNER_FIELD = '_owner'
+# Başka host'taki sahibin süreci denetlenemez; görev/çıktı bu süre boyunca güncellenmediyse
+# sahibi ölmüş sayılır (ilerleme bildirimleri görevi sürekli günceller)
+FOREIGN_OWNER_STALE_SEC = int(os.environ.get('FOREIGN_OWNER_STALE_SEC', 6 * 3600))
+
+
+def current_owner() -> str:
+    """Bu sürecin sahiplik damgası (host:pid); görevler ve çıktı işaretleri için."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def owner_alive(owner, updated_at: float | None = None) -> bool:
+    """host:pid damgalı sahip süreç hâlâ çalışıyor mu.
+
+    Başka host'taki sahip denetlenemez: son güncellemesi (updated_at, epoch) verilmişse
+    FOREIGN_OWNER_STALE_SEC'ten eskiyse ölü, aksi halde canlı sayılır.
+    """
+    host, _, pid = str(owner or '').rpartition(':')
+    if not host or not pid.isdigit():
+        return False
+    if host != socket.gethostname():
+        return updated_at is None or time.time() - updated_at < FOREIGN_OWNER_STALE_SEC
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class MemoryTaskStore:
+    """Tek süreçli kullanım için bellek içi depo (aynı arayüz)."""
+
+    def __init__(self, ttl_sec: int = TASK_TTL_SEC):
+        self.ttl_sec = ttl_sec
+        self._tasks = {}
+        self._subtitles = {}
+        self._finished_at = {}
+        self._lock = threading.Lock()
+        self._last_evict = 0.0
+
+    def get(self, task_id: str, default=None, include_subtitles: bool = False):
+        with self._lock:
+            task = self._tasks.get(task_id)
+            if task is None:
+                return default
+            task = dict(task)
+            task.pop(OWNER_FIELD, None)
+            if include_subtitles and task_id in self._subtitles:
+                task['subtitles'] = self._subtitles[task_id]
+            return task
+
+    def get_subtitles(self, task_id: str):
+        with self._lock:
+            return self._subtitles.get(task_id)
+
+    def set(self, task_id: str, task: dict) -> None:
+        with self._lock:
+            self._write(task_id, {**task, OWNER_FIELD: current_owner()})
+        self._maybe_evict()
+
+    def update(self, task_id: str, **fields) -> dict:
+        """Görevi atomik olarak günceller ve yeni halini (altyazısız) döndürür."""
+        with self._lock:
+            task = dict(self._tasks.get(task_id, {}))
+            task.update(fields)
+            self._write(task_id, task)
+            result = dict(self._tasks[task_id])
+        result.pop(OWNER_FIELD, None)
+        self._maybe_evict()
+        return result
+
+    def _write(self, task_id, task):
+        if 'subtitles' in task:
+            self._subtitles[task_id] = task.pop('subtitles')
+        self._tasks[task_id] = task
+        if task.get('status') in FINISHED_STATUSES:
+            self._finished_at.setdefault(task_id, time.time())
+        else:
+            self._finished_at.pop(task_id, None)
+
+    def delete(self, task_id: str) -> None:
+        with self._lock:
+            self._tasks.pop(task_id, None)
+            self._subtitles.pop(task_id, None)
+            self._finished_at.pop(task_id, None)
+
+    def evict_expired(self) -> int:
+        limit = time.time() - self.ttl_sec
+        with self._lock:
+            expired = [tid for tid, t in self._finished_at.items() if t < limit]
+            for tid in expired:
+                self._tasks.pop(tid, None)
+                self._subtitles.pop(tid, None)
+                self._finished_at.pop(tid, None)
+        return len(expired)
+
+    def _maybe_evict(self):
+        if self.ttl_sec and time.time() - self._last_evict > EVICT_INTERVAL_SEC:
+            self._last_evict = time.time()
+            self.evict_expired()
+
+    def fail_orphaned(self, message: str) -> int:
+        # Bellek içi görevler süreçle birlikte kaybolur; yetim kalan görev olmaz
+        return 0
+
+
+class SQLiteTaskStore:
+    """Birden fazla süreç tarafından paylaşılabilen SQLite tabanlı depo (WAL kipi)."""
+
+    def __init__(self, path: str = TASK_DB_PATH, ttl_sec: int = TASK_TTL_SEC):
+        self.path = path
+        self.ttl_sec = ttl_sec
+        self._local = threading.local()
+        self._last_evict = 0.0
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        conn = self._conn()
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS tasks ('
+            ' id TEXT PRIMARY KEY, status TEXT, data TEXT NOT NULL,'
+            ' updated_at REAL NOT NULL, finished_at REAL)'
+        )
+        conn.execute('CREATE INDEX IF NOT EXISTS tasks_finished_at ON tasks(finished_at)')
+        conn.execute('CREATE TABLE IF NOT EXISTS task_subtitles (task_id TEXT PRIMARY KEY, data TEXT NOT NULL)')
+
+    def _conn(self) -> sqlite3.Connection:
+        # sqlite3 bağlantıları thread'ler arasında paylaşılmaz; her thread kendi bağlantısını açar
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def get(self, task_id: str, default=None, include_subtitles: bool = False):
+        conn = self._conn()
+        row = conn.execute('SELECT data FROM tasks WHERE id = ?', (task_id,)).fetchone()
+        if row is None:
+            return default
+        task = json.loads(row[0])
+        task.pop(OWNER_FIELD, None)
+        if include_subtitles:
+            subtitles = self.get_subtitles(task_id)
+            if subtitles is not None:
+                task['subtitles'] = subtitles
+        return task
+
+    def get_subtitles(self, task_id: str):
+        row = self._conn().execute('SELECT data FROM task_subtitles WHERE task_id = ?', (task_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, task_id: str, task: dict) -> None:
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            self._write(conn, task_id, {**task, OWNER_FIELD: current_owner()}, None)
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        self._maybe_evict()
+
+    def update(self, task_id: str, **fields) -> dict:
+        """Görevi atomik olarak günceller ve yeni halini (altyazısız) döndürür.
+
+        BEGIN IMMEDIATE yazma kilidini okumadan önce aldığı için eşzamanlı güncellemeler
+        (farklı thread veya süreçlerden) birbirinin alanlarını ezmez.
+        """
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute('SELECT data, finished_at FROM tasks WHERE id = ?', (task_id,)).fetchone()
+            task = json.loads(row[0]) if row else {}
+            task.update(fields)
+            task = self._write(conn, task_id, task, row[1] if row else None)
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        self._maybe_evict()
+        task.pop(OWNER_FIELD, None)
+        return task
+
+    def _write(self, conn, task_id, task, finished_at):
+        if 'subtitles' in task:
+            conn.execute(
+                'INSERT OR REPLACE INTO task_subtitles (task_id, data) VALUES (?, ?)',
+                (task_id, json.dumps(task.pop('subtitles'), ensure_ascii=False))
+            )
+        now = time.time()
+        status = task.get('status')
+        if status in FINISHED_STATUSES:
+            finished_at = finished_at or now
+        else:
+            finished_at = None
+        conn.execute(
+            'INSERT OR REPLACE INTO tasks (id, status, data, updated_at, finished_at) VALUES (?, ?, ?, ?, ?)',
+            (task_id, status, json.dumps(task, ensure_ascii=False), now, finished_at)
+        )
+        return task
+
+    def delete(self, task_id: str) -> None:
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        conn.execute('DELETE FROM tasks WHERE id = ?', (task_id,))
+        conn.execute('DELETE FROM task_subtitles WHERE task_id = ?', (task_id,))
+        conn.execute('COMMIT')
+
+    def evict_expired(self) -> int:
+        """Süresi dolmuş biten görevleri ve altyazılarını siler."""
+        limit = time.time() - self.ttl_sec
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            cur = conn.execute('DELETE FROM tasks WHERE finished_at IS NOT NULL AND finished_at < ?', (limit,))
+            conn.execute('DELETE FROM task_subtitles WHERE task_id NOT IN (SELECT id FROM tasks)')
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return cur.rowcount
+
+    def _maybe_evict(self):
+        if self.ttl_sec and time.time() - self._last_evict > EVICT_INTERVAL_SEC:
+            self._last_evict = time.time()
+            try:
+                self.evict_expired()
+            except sqlite3.OperationalError as e:
+                # Başka bir süreç kilitliyse bir sonraki turda tekrar denenir
+                print("Görev temizliği atlandı:", e)
+
+    def fail_orphaned(self, message: str) -> int:
+        """Sahibi süreç ölmüş, bitmemiş görevleri hatalı olarak işaretler; sayısını döndürür.
+
+        Açılışta çağrılır: bu sürecin damgasını taşıyan görevler de yetimdir (konteynerde
+        yeniden başlayan süreç aynı pid'i alabilir ve henüz hiçbir görev çalıştırmıyordur).
+        Başka host'ların görevleri yalnızca uzun süre güncellenmemişse kapatılır.
+        """
+        benim = current_owner()
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            rows = conn.execute(
+                'SELECT id, data, updated_at, finished_at FROM tasks WHERE status IS NULL OR status NOT IN (?, ?)', FINISHED_STATUSES
+            ).fetchall()
+            failed = 0
+            for task_id, data, updated_at, finished_at in rows:
+                task = json.loads(data)
+                owner = task.get(OWNER_FIELD)
+                if owner != benim and owner_alive(owner, updated_at):
+                    continue
+                task.update(status='error', message=message)
+                self._write(conn, task_id, task, finished_at)
+                failed += 1
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return failed
+
+
+def create_store(kind: str = TASK_STORE):
+    if kind == 'memory':
+        return MemoryTaskStore()
+    if kind == 'sqlite':
+        return SQLiteTaskStore()
+    raise ValueError(f"Bilinmeyen TASK_STORE: {kind} (geçerli: sqlite, memory)")
@@ -0,0 +1,146 @@
+"""Gemini transkripsiyon sonuçları için içerik adresli disk önbelleği.
+
+Anahtar: ayıklanan ses dosyasının SHA-256 özeti + model adı + prompt sürümü.
+Değer: _split_long_sentences sonrası altyazı listesi (JSON).
+Aynı klip farklı stil/çözünürlükle tekrar işlendiğinde Gemini'ye hiç gidilmez.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+
+DEFAULT_CACHE_DIR = os.environ.get('TRANSCRIPT_CACHE_DIR', os.path.join('cache', 'transcripts'))
+# Varsayılan sınırlar: 200 MB ve 30 gün
+DEFAULT_MAX_BYTES = int(os.environ.get('TRANSCRIPT_CACHE_MAX_BYTES', 200 * 1024 * 1024))
+DEFAULT_TTL_SEC = int(os.environ.get('TRANSCRIPT_CACHE_TTL_SEC', 30 * 24 * 3600))
+
+
+def file_sha256(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """Dosyanın SHA-256 özetini parça parça okuyarak hesaplar."""
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class TranscriptCache:
+    """Boyut ve TTL sınırlı, JSON dosyalarıyla tutulan transkripsiyon önbelleği."""
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES, ttl_sec: int = DEFAULT_TTL_SEC):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.ttl_sec = ttl_sec
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(audio_sha256: str, model_name: str, prompt_version) -> str:
+        raw = f"{audio_sha256}|{model_name}|{prompt_version}"
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key: str):
+        """Önbellekte varsa altyazı listesini döndürür, yoksa None."""
+        path = self._path(key)
+        with self._lock:
+            try:
+                st = os.stat(path)
+                if self.ttl_sec and time.time() - st.st_mtime > self.ttl_sec:
+                    os.remove(path)
+                    self.evictions += 1
+                    self.misses += 1
+                    return None
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                # LRU için erişim zamanını güncelle
+                os.utime(path, None)
+                self.hits += 1
+                return data
+            except (OSError, ValueError):
+                self.misses += 1
+                return None
+
+    def put(self, key: str, data: list) -> None:
+        path = self._path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with self._lock:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            # Yarım yazılmış dosya okunmasın diye atomik yer değiştirme
+            os.replace(tmp_path, path)
+            self._evict()
+
+    def _evict(self) -> None:
+        """Süresi dolanları siler; toplam boyut sınırı aşılıyorsa en eski erişilenden başlayarak siler."""
+        now = time.time()
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith('.json'):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            if self.ttl_sec and now - st.st_mtime > self.ttl_sec:
+                try:
+                    os.remove(path)
+                    self.evictions += 1
+                except OSError:
+                    pass
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+        total = sum(e[1] for e in entries)
+        if not self.max_bytes or total <= self.max_bytes:
+            return
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+                self.evictions += 1
+            except OSError:
+                pass
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = 0
+            size = 0
+            for name in os.listdir(self.cache_dir):
+                if name.endswith('.json'):
+                    entries += 1
+                    try:
+                        size += os.path.getsize(os.path.join(self.cache_dir, name))
+                    except OSError:
+                        pass
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': entries,
+                'bytes': size,
+                'max_bytes': self.max_bytes,
+                'ttl_sec': self.ttl_sec,
+            }
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_cache() -> TranscriptCache:
+    """Süreç genelinde paylaşılan önbellek örneği (ilk kullanımda oluşturulur)."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = TranscriptCache()
+        return _default_cache
@@ -0,0 +1,270 @@
+"""Parçalı, devam ettirilebilir ve içerik adresli video yüklemeleri.
+
+Video tek bir multipart istek yerine sıralı parçalar halinde gelir ve yarım dosyaya eklenir;
+SHA-256 özeti son parça geldiğinde dosya bir kez baştan sona okunarak hesaplanır. Bağlantı koparsa istemci sunucudaki konumu
+sorup kaldığı yerden devam eder. Tamamlanan dosya özetiyle adlandırılır
+(uploads/<sha256><uzantı>): aynı içerik ikinci kez saklanmaz, istemci özeti baştan
+bildirirse aktarım hiç yapılmaz.
+"""
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: yalnızca süreç içi kilit kullanılır
+    fcntl = None
+
+UPLOAD_DIR = os.environ.get('UPLOAD_DIR', 'uploads')
+# Yarım kalan yüklemelerin tutulduğu klasör
+PARTIAL_DIR_NAME = '.partial'
+# Tek bir parça isteğinin en büyük boyutu (istek süresini kısa tutar)
+MAX_CHUNK_BYTES = int(os.environ.get('UPLOAD_MAX_CHUNK_BYTES', 16 * 1024 * 1024))
+MAX_UPLOAD_BYTES = int(os.environ.get('UPLOAD_MAX_BYTES', 4 * 1024 * 1024 * 1024))
+ALLOWED_EXTENSIONS = ('.mp4', '.mov', '.m4v', '.mkv', '.webm', '.avi', '.3gp')
+_READ_SIZE = 1024 * 1024
+
+_SHA256_RE = re.compile(r'^[0-9a-f]{64}$')
+_ID_RE = re.compile(r'^[0-9a-f]{32}$')
+
+
+class UploadError(Exception):
+    """Geçersiz yükleme isteği (istemci hatası)."""
+
+
+class OffsetMismatch(UploadError):
+    """Parça beklenen konumdan başlamıyor; istemci güncel konumdan devam etmeli."""
+
+    def __init__(self, expected: int):
+        super().__init__(f"Parça {expected}. bayttan başlamalı.")
+        self.expected = expected
+
+
+def _extension(filename: str) -> str:
+    ext = os.path.splitext(filename or '')[1].lower()
+    return ext if ext in ALLOWED_EXTENSIONS else '.mp4'
+
+
+class UploadStore:
+    """Yükleme oturumlarını ve içerik adresli video dosyalarını yönetir.
+
+    Oturum bilgisi diske yazıldığı için herhangi bir süreç yüklemeye devam edebilir. Aynı
+    yüklemeye eşzamanlı parça eklemeleri, yarım dosya üzerindeki flock kilidiyle (süreçler
+    arası) sıraya girer; kilit alındıktan sonra konum yeniden okunur.
+    """
+
+    def __init__(self, upload_dir: str = UPLOAD_DIR):
+        self.upload_dir = upload_dir
+        self.partial_dir = os.path.join(upload_dir, PARTIAL_DIR_NAME)
+        os.makedirs(self.partial_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._locks = {}
+
+    # --- Yol yardımcıları ---
+
+    def blob_path(self, sha256: str, ext: str) -> str:
+        return os.path.join(self.upload_dir, f"{sha256}{ext}")
+
+    def find_blob(self, sha256: str):
+        """Özeti verilen video daha önce yüklendiyse yolunu döndürür."""
+        if not _SHA256_RE.match(sha256 or ''):
+            return None
+        for ext in ALLOWED_EXTENSIONS:
+            path = self.blob_path(sha256, ext)
+            if os.path.exists(path):
+                return path
+        return None
+
+    def _meta_path(self, upload_id: str) -> str:
+        return os.path.join(self.partial_dir, f"{upload_id}.json")
+
+    def _part_path(self, upload_id: str) -> str:
+        return os.path.join(self.partial_dir, f"{upload_id}.part")
+
+    def _id_lock(self, upload_id: str) -> threading.Lock:
+        with self._lock:
+            return self._locks.setdefault(upload_id, threading.Lock())
+
+    @contextmanager
+    def _upload_lock(self, upload_id: str):
+        """Yüklemeye özel kilit: süreç içinde thread kilidi, süreçler arasında .part üzerinde flock.
+
+        Dönen dosya nesnesi yarım dosyaya yazmak için kullanılır ('r+b').
+        """
+        if not _ID_RE.match(upload_id or ''):
+            raise UploadError("Geçersiz yükleme kimliği.")
+        with self._id_lock(upload_id):
+            try:
+                f = open(self._part_path(upload_id), 'r+b')
+            except OSError:
+                raise UploadError("Yükleme bulunamadı veya süresi doldu.")
+            with f:
+                if fcntl is not None:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+                try:
+                    yield f
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+    def _read_meta(self, upload_id: str) -> dict:
+        if not _ID_RE.match(upload_id or ''):
+            raise UploadError("Geçersiz yükleme kimliği.")
+        try:
+            with open(self._meta_path(upload_id), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            raise UploadError("Yükleme bulunamadı veya süresi doldu.")
+
+    def _write_meta(self, upload_id: str, meta: dict) -> None:
+        path = self._meta_path(upload_id)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+    # --- Oturum akışı ---
+
+    def create(self, filename: str, size: int, sha256: str | None = None) -> dict:
+        """Yeni bir yükleme başlatır.
+
+        İstemci özeti bildirdiyse ve aynı içerik zaten varsa aktarım atlanır.
+        Dönüş: {'upload_id', 'offset', 'size', 'complete', 'video_id'?}
+        """
+        size = int(size)
+        if size <= 0 or size > MAX_UPLOAD_BYTES:
+            raise UploadError(f"Geçersiz dosya boyutu (en fazla {MAX_UPLOAD_BYTES} bayt).")
+        sha256 = (sha256 or '').lower() or None
+        if sha256:
+            mevcut = self.find_blob(sha256)
+            if mevcut and os.path.getsize(mevcut) == size:
+                return {'upload_id': None, 'offset': size, 'size': size, 'complete': True,
+                        'video_id': os.path.basename(mevcut), 'deduplicated': True}
+        upload_id = uuid.uuid4().hex
+        meta = {
+            'filename': os.path.basename(filename or 'video.mp4'),
+            'size': size,
+            'offset': 0,
+            'expected_sha256': sha256,
+            'created_at': time.time(),
+        }
+        open(self._part_path(upload_id), 'wb').close()
+        self._write_meta(upload_id, meta)
+        return {'upload_id': upload_id, 'offset': 0, 'size': size, 'complete': False}
+
+    def status(self, upload_id: str) -> dict:
+        meta = self._read_meta(upload_id)
+        return {'upload_id': upload_id, 'offset': meta['offset'], 'size': meta['size'],
+                'complete': bool(meta.get('video_id')), 'video_id': meta.get('video_id')}
+
+    def append(self, upload_id: str, offset: int, stream, length: int | None = None) -> dict:
+        """Parçayı akıştan okuyup yarım dosyanın sonuna ekler.
+
+        Parça bellekte tutulmaz; okunan her blok doğrudan diske yazılır. Son parça geldiğinde
+        dosya özetlenir ve içerik adresli dosyaya taşınır.
+        """
+        if self._read_meta(upload_id).get('video_id'):
+            return self.status(upload_id)
+        with self._upload_lock(upload_id) as f:
+            # Konum kilit alındıktan sonra okunur; aynı konuma iki eşzamanlı yazım olmaz
+            meta = self._read_meta(upload_id)
+            if meta.get('video_id'):
+                return self.status(upload_id)
+            if int(offset) != meta['offset']:
+                raise OffsetMismatch(meta['offset'])
+            kalan_izin = min(MAX_CHUNK_BYTES, meta['size'] - meta['offset'])
+            if length is not None and length > kalan_izin:
+                raise UploadError(f"Parça çok büyük (en fazla {kalan_izin} bayt).")
+            yazilan = 0
+            # Önceki yarım kalmış bir yazımın artığı varsa üzerine yazılır
+            f.seek(meta['offset'])
+            while True:
+                chunk = stream.read(min(_READ_SIZE, kalan_izin - yazilan + 1))
+                if not chunk:
+                    break
+                yazilan += len(chunk)
+                if yazilan > kalan_izin:
+                    f.truncate(meta['offset'])
+                    raise UploadError(f"Parça çok büyük (en fazla {kalan_izin} bayt).")
+                f.write(chunk)
+            f.truncate()
+            f.flush()
+            meta['offset'] += yazilan
+            if meta['offset'] == meta['size']:
+                meta['video_id'] = self._finalize(upload_id, meta, f)
+            self._write_meta(upload_id, meta)
+            return self.status(upload_id)
+
+    def _finalize(self, upload_id: str, meta: dict, f) -> str:
+        """Tamamlanan dosyayı bir kez, sırayla okuyarak özetler ve içerik adresli ada taşır.
+
+        Özet istemcinin bildirdiğiyle karşılaştırılır (tarayıcı büyük dosyalarda özet
+        göndermese de içerik adresi her zaman gerçek içerikten hesaplanır).
+        """
+        h = hashlib.sha256()
+        f.seek(0)
+        for chunk in iter(lambda: f.read(_READ_SIZE), b''):
+            h.update(chunk)
+        digest = h.hexdigest()
+        part_path = self._part_path(upload_id)
+        beklenen = meta.get('expected_sha256')
+        if beklenen and beklenen != digest:
+            os.remove(part_path)
+            os.remove(self._meta_path(upload_id))
+            raise UploadError("Yüklenen dosyanın özeti bildirilenle uyuşmuyor; yükleme baştan yapılmalı.")
+        hedef = self.blob_path(digest, _extension(meta['filename']))
+        if os.path.exists(hedef):
+            # Aynı içerik zaten var: yeni kopya tutulmaz
+            os.remove(part_path)
+        else:
+            os.replace(part_path, hedef)
+        return os.path.basename(hedef)
+
+    def save_stream(self, stream, filename: str) -> str:
+        """Tek istekte gelen dosyayı (eski multipart /process) aynı içerik adresli depoya yazar."""
+        h = hashlib.sha256()
+        tmp = os.path.join(self.partial_dir, f"{uuid.uuid4().hex}.part")
+        try:
+            with open(tmp, 'wb') as f:
+                for chunk in iter(lambda: stream.read(_READ_SIZE), b''):
+                    f.write(chunk)
+                    h.update(chunk)
+            hedef = self.blob_path(h.hexdigest(), _extension(filename))
+            if os.path.exists(hedef):
+                os.remove(tmp)
+            else:
+                os.replace(tmp, hedef)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        return hedef
+
+    def resolve(self, video_id: str):
+        """video_id'yi ('<sha256><uzantı>') dosya yoluna çevirir; yoksa None."""
+        sha, ext = os.path.splitext(video_id or '')
+        if not _SHA256_RE.match(sha) or ext not in ALLOWED_EXTENSIONS:
+            return None
+        path = self.blob_path(sha, ext)
+        return path if os.path.exists(path) else None
+
+    def link_for_job(self, video_path: str, job_name: str) -> str:
+        """Paylaşılan video için işe özel bir ad oluşturur (hard link; olmazsa kopya).
+
+        Çıktı dosyaları girdinin adından türetildiği için aynı içeriği işleyen iki iş
+        birbirinin çıktısını ezmesin diye her iş kendi adını kullanır.
+        """
+        job_dir = os.path.join(self.upload_dir, 'jobs')
+        os.makedirs(job_dir, exist_ok=True)
+        hedef = os.path.join(job_dir, f"{job_name}{os.path.splitext(video_path)[1]}")
+        try:
+            os.link(video_path, hedef)
+        except OSError:
+            shutil.copyfile(video_path, hedef)
+        return hedef
+
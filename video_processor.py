@@ -1,21 +1,18 @@
 import os
 import json
+import hashlib
+import shutil
 import subprocess
-import google.generativeai as genai
+import threading
+import time
+from contextlib import contextmanager
 import math
-
-# Opsiyonel: font ailesi adını dosyadan okuyabilmek için fontTools
-try:
-    from fontTools.ttLib import TTFont  # type: ignore
-    _HAS_FONTTOOLS = True
-except Exception:
-    _HAS_FONTTOOLS = False
-
-# Debug: fontTools mevcut mu?
-try:
-    print(f"fontTools durumu: {_HAS_FONTTOOLS}")
-except Exception:
-    pass
+import transcript_cache
+import cue_timing
+import font_registry
+import font_store
+import media_probe
+import task_store
 
 # API anahtarları listesi yalnızca çevre değişkenlerinden okunur (üretim güvenliği)
 ENV_KEYS = os.environ.get('GEMINI_API_KEYS') or os.environ.get('GOOGLE_API_KEYS') or ''
@@ -26,31 +23,188 @@ else:
     API_KEYS = []
 aktif_api_key_index = 0
 
-def run_ffmpeg_command(command):
-    """FFmpeg komutunu çalıştırır ve hataları kontrol eder."""
+# google.generativeai'nin içe aktarılması (grpc, protobuf) saniyeler sürebilir; her worker
+# açılışında ödenmesin diye SDK yalnızca tek seferde transkripsiyon ilk kez çağrıldığında yüklenir.
+# fontTools da font_registry/font_store içinde ilk kullanımda yüklenir.
+_genai = None
+_genai_lock = threading.Lock()
+
+
+def _genai_sdk():
+    """google.generativeai modülünü ilk kullanımda içe aktarır."""
+    global _genai
+    if _genai is None:
+        with _genai_lock:
+            if _genai is None:
+                import google.generativeai as genai
+                _genai = genai
+    return _genai
+
+
+# Hata mesajları için saklanan son stderr satırı sayısı (tüm log bellekte tutulmaz)
+FFMPEG_STDERR_TAIL_LINES = 200
+# libx264 kodlamalarının thread sınırı (0: ffmpeg varsayılanı, çekirdek sayısı kadar). Aynı
+# anda birçok kodlama çalıştıran süreçler (ör. cli.py --jobs, app.py'nin slot politikası)
+# toplamı çekirdeklere göre ayarlar.
+FFMPEG_THREADS = int(os.environ.get('FFMPEG_THREADS', 0))
+_thread_yerel = threading.local()
+
+
+@contextmanager
+def kodlama_thread_siniri(threads: int):
+    """Bu thread'den başlatılan libx264 kodlamalarına FFMPEG_THREADS yerine 'threads' sınırını uygular.
+
+    Birden fazla kodlama slotu tutan bir iş tek komutla kodladığında slotları kadar thread kullanır.
+    """
+    onceki = getattr(_thread_yerel, 'threads', None)
+    _thread_yerel.threads = max(1, int(threads))
+    try:
+        yield
+    finally:
+        _thread_yerel.threads = onceki
+
+
+def _thread_siniri_uygula(command: list) -> list:
+    """Thread sınırı ayarlıysa, kendi '-threads' ayarı olmayan komutta her libx264 çıktısına sınır ekler."""
+    sinir = getattr(_thread_yerel, 'threads', None) or FFMPEG_THREADS
+    if sinir <= 0 or '-threads' in command:
+        return command
+    sonuc = []
+    for i, arg in enumerate(command):
+        sonuc.append(arg)
+        if arg == 'libx264' and i > 0 and command[i - 1] == '-c:v':
+            sonuc += ['-threads', str(sinir)]
+    return sonuc
+
+
+def _ffmpeg_zamani_saniye(deger: str) -> float | None:
+    """'HH:MM:SS.xx' biçimindeki süreyi saniyeye çevirir."""
     try:
-        env = os.environ.copy()
-        # Windows'ta libass'ın fontconfig sağlayıcısını kullanması için zorla
-        env['LIBASS_FONT_PROVIDER'] = 'fontconfig'
-        # Daha detaylı log isterseniz: command = ['ffmpeg', '-loglevel', 'info', ...]
-        result = subprocess.run(command, check=True, capture_output=True, text=True, encoding='utf-8', env=env)
-        print("FFmpeg komutu başarıyla çalıştı:", " ".join(command))
-    except subprocess.CalledProcessError as e:
+        saat, dakika, saniye = deger.strip().split(':')
+        return int(saat) * 3600 + int(dakika) * 60 + float(saniye)
+    except (ValueError, AttributeError):
+        return None
+
+
+def run_ffmpeg_command(command, on_progress=None, duration: float | None = None, stderr_callback=None):
+    """FFmpeg komutunu çalıştırır ve hataları kontrol eder.
+
+    ffmpeg '-progress pipe:1' ile çalıştırılır; ilerleme akarken ayrıştırılır ve varsa
+    on_progress(percent, speed, eta_sec) çağrılır. duration verilmezse ilk girdinin
+    'Duration:' satırından okunur. stderr yalnızca son FFMPEG_STDERR_TAIL_LINES satırlık
+    bir halka tamponda tutulur; tüm satırlara ihtiyaç duyan çağıran stderr_callback verir.
+    Dönüş: stderr'i tampon içeriği olan subprocess.CompletedProcess.
+    """
+    from collections import deque
+
+    env = os.environ.copy()
+    # Windows'ta libass'ın fontconfig sağlayıcısını kullanması için zorla
+    env['LIBASS_FONT_PROVIDER'] = 'fontconfig'
+    if command and os.path.basename(command[0]) == 'ffmpeg':
+        command = [command[0], '-progress', 'pipe:1', '-nostats'] + _thread_siniri_uygula(list(command[1:]))
+
+    tail = deque(maxlen=FFMPEG_STDERR_TAIL_LINES)
+    durum = {'duration': duration}
+
+    process = subprocess.Popen(
+        command, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        text=True, encoding='utf-8', errors='replace', env=env
+    )
+
+    def stderr_oku():
+        for line in process.stderr:
+            line = line.rstrip('\n')
+            tail.append(line)
+            if durum['duration'] is None and 'Duration:' in line:
+                durum['duration'] = _ffmpeg_zamani_saniye(line.split('Duration:')[1].split(',')[0])
+            if stderr_callback:
+                stderr_callback(line)
+
+    okuyucu = threading.Thread(target=stderr_oku, daemon=True)
+    okuyucu.start()
+
+    # -progress çıktısı key=value blokları halinde gelir; her blok 'progress=' ile biter
+    blok = {}
+    for line in process.stdout:
+        key, _, value = line.strip().partition('=')
+        if not key:
+            continue
+        blok[key] = value
+        if key != 'progress':
+            continue
+        if on_progress:
+            out_us = blok.get('out_time_us') or blok.get('out_time_ms')
+            try:
+                gecen = int(out_us) / 1_000_000 if out_us and out_us != 'N/A' else None
+            except ValueError:
+                gecen = None
+            try:
+                speed = float(blok.get('speed', '').rstrip('x'))
+            except ValueError:
+                speed = None
+            toplam = durum['duration']
+            percent = None
+            eta = None
+            if gecen is not None and toplam:
+                percent = max(0.0, min(100.0, 100.0 * gecen / toplam))
+                if speed:
+                    eta = max(0.0, (toplam - gecen) / speed)
+            if value == 'end':
+                percent, eta = 100.0, 0.0
+            try:
+                on_progress(percent, speed, eta)
+            except Exception as e:
+                print("İlerleme bildirimi hatası:", e)
+        blok = {}
+    returncode = process.wait()
+    okuyucu.join()
+    stderr_tail = "\n".join(tail)
+    if returncode != 0:
         print("FFmpeg Hatası:")
-        print("Komut:", " ".join(e.cmd))
-        print("Çıktı:", e.stdout)
-        print("Hata Çıktısı:", e.stderr)
-        raise Exception(f"FFmpeg hatası: {e.stderr}")
+        print("Komut:", " ".join(command))
+        print("Hata Çıktısı:", stderr_tail)
+        raise Exception(f"FFmpeg hatası: {stderr_tail}")
+    print("FFmpeg komutu başarıyla çalıştı:", " ".join(command))
+    return subprocess.CompletedProcess(command, returncode, stdout=None, stderr=stderr_tail)
+
+def _scale_pad_filter(width: int, height: int) -> str:
+    """En boy oranını koruyarak ölçekleyen ve siyah bant ekleyen filtre zinciri."""
+    return f'scale={width}:{height}:force_original_aspect_ratio=decrease,pad={width}:{height}:(ow-iw)/2:(oh-ih)/2:color=black'
+
+def _zaten_uygun_mu(video_yolu, width: int, height: int, fps: int | None = None) -> bool:
+    """Girdi ölçekleme/yeniden kodlama gerektirmiyorsa True (medya bilgisi önbellekten okunur)."""
+    try:
+        return media_probe.is_conforming(media_probe.probe(video_yolu), width, height, fps)
+    except Exception as e:
+        # ffprobe okuyamadıysa güvenli yol: her zamanki gibi yeniden kodla
+        print("Medya bilgisi okunamadı:", e)
+        return False
 
-def videoyu_9_16_boyutuna_getir(video_yolu, output_folder, width: int = 1080, height: int = 1920, crf: int = 20, fps: int | None = None):
-    """Videoyu verilen genişlik x yükseklik boyutuna getirir, en boy oranını korur ve siyah bant ekler."""
+
+def videoyu_9_16_boyutuna_getir(video_yolu, output_folder, width: int = 1080, height: int = 1920, crf: int = 20, fps: int | None = None, on_progress=None):
+    """Videoyu verilen genişlik x yükseklik boyutuna getirir, en boy oranını korur ve siyah bant ekler.
+
+    Girdi zaten istenen biçimdeyse (H.264, yuv420p, aynı boyut ve fps) yeniden kodlanmaz, kopyalanır.
+    """
     dosya_adi = os.path.basename(video_yolu)
     cikti_yolu = os.path.join(output_folder, f"{os.path.splitext(dosya_adi)[0]}_9x16.mp4")
+
+    if _zaten_uygun_mu(video_yolu, width, height, fps):
+        run_ffmpeg_command([
+            'ffmpeg',
+            '-i', video_yolu,
+            '-map', '0:v:0', '-map', '0:a?',
+            '-c', 'copy',
+            '-movflags', '+faststart',
+            '-y',
+            cikti_yolu
+        ], on_progress=on_progress)
+        return cikti_yolu
     
     command = [
         'ffmpeg',
         '-i', video_yolu,
-        '-vf', f'scale={width}:{height}:force_original_aspect_ratio=decrease,pad={width}:{height}:(ow-iw)/2:(oh-ih)/2:color=black'
+        '-vf', _scale_pad_filter(width, height)
     ]
     if fps:
         # ÇIKTI FPS'i ayarla (output option). '-vf' sonrasında, codec ayarlarından önce konumlandır.
@@ -65,210 +219,118 @@ def videoyu_9_16_boyutuna_getir(video_yolu, output_folder, width: int = 1080, he
         '-y',
         cikti_yolu
     ]
-    run_ffmpeg_command(command)
+    run_ffmpeg_command(command, on_progress=on_progress)
     return cikti_yolu
 
-def sesi_ayikla(video_yolu, output_folder):
-    """Videodan sesi ayıklar ve mp3 olarak kaydeder."""
+# Transkripsiyon için ses profilleri. Konuşma tanıma için mono 16 kHz düşük bit hızı yeterlidir;
+# Gemini'ye yüklenen her bayt hem yükleme süresi hem token maliyetidir.
+TRANSCRIBE_AUDIO_PROFILES = {
+    # Eski davranış: stereo VBR mp3, en yüksek kalite
+    'mp3_hq': {'ext': '.mp3', 'args': ['-q:a', '0']},
+    'mp3_16k': {'ext': '.mp3', 'args': ['-ac', '1', '-ar', '16000', '-b:a', '32k']},
+    'opus_16k': {'ext': '.ogg', 'args': ['-ac', '1', '-ar', '16000', '-c:a', 'libopus', '-b:a', '24k', '-application', 'voip']},
+}
+TRANSCRIBE_AUDIO_PROFILE = os.environ.get('TRANSCRIBE_AUDIO_PROFILE', 'opus_16k')
+# Konuşma olmayan uzun bölümleri kırpma (zaman damgaları sonra orijinal zaman çizelgesine eşlenir)
+TRANSCRIBE_STRIP_SILENCE = os.environ.get('TRANSCRIBE_STRIP_SILENCE', '').lower() in ('1', 'true', 'yes')
+STRIP_MIN_SILENCE_SEC = 1.5
+STRIP_KEEP_PAD_SEC = 0.3
+# Komut satırı uzunluğunu sınırlamak için en fazla bu kadar sessizlik kırpılır (en uzunlar seçilir)
+STRIP_MAX_GAPS = 1500
+# Transkripsiyon sesi her ayıklamada bayt bayt aynı olmalı (transcript_cache dosya özetiyle anahtarlar):
+# Ogg rastgele seri numarası ve kodlayıcı sürüm etiketleri bitexact ile, kaynak metadatası -map_metadata ile atılır
+_BITEXACT_ARGS = ['-fflags', '+bitexact', '-flags:a', '+bitexact', '-map_metadata', '-1']
+# Karşılaştırma için mp3_hq (-q:a 0) ortalama bit hızı tahmini
+_MP3_HQ_BITRATE = 245_000
+
+
+def sesi_ayikla(video_yolu, output_folder, profile: str | None = None, on_progress=None):
+    """Videodan sesi ayıklar ve seçilen transkripsiyon profiline göre kaydeder."""
+    profile = profile or TRANSCRIBE_AUDIO_PROFILE
+    if profile not in TRANSCRIBE_AUDIO_PROFILES:
+        raise ValueError(f"Bilinmeyen ses profili: {profile}. Geçerli değerler: {', '.join(TRANSCRIBE_AUDIO_PROFILES)}")
+    ayar = TRANSCRIBE_AUDIO_PROFILES[profile]
     dosya_adi = os.path.basename(video_yolu)
-    ses_cikti_yolu = os.path.join(output_folder, f"{os.path.splitext(dosya_adi)[0]}.mp3")
+    ses_cikti_yolu = os.path.join(output_folder, f"{os.path.splitext(dosya_adi)[0]}{ayar['ext']}")
+
+    # Ses akışı yoksa '-map a' hatasını beklemeden anlaşılır bir hatayla dur
+    try:
+        media_probe.require_audio(video_yolu)
+    except media_probe.NoAudioStream:
+        raise
+    except Exception as e:
+        print("Medya bilgisi okunamadı, ses kontrolü atlandı:", e)
     
     # -vn: video yok (sadece ses)
-    # -q:a 0: en iyi mp3 kalitesi
     command = [
         'ffmpeg',
         '-i', video_yolu,
         '-vn',
-        '-q:a', '0',
         '-map', 'a',
+    ] + ayar['args'] + _BITEXACT_ARGS + [
         '-y',
         ses_cikti_yolu
     ]
-    run_ffmpeg_command(command)
+    run_ffmpeg_command(command, on_progress=on_progress)
     return ses_cikti_yolu
 
 def saniye_to_ass_time(saniye):
-    """Saniyeyi ASS formatındaki Saat:Dakika:Saniye.Salise formatına çevirir."""
-    saat = int(saniye // 3600)
-    saniye %= 3600
-    dakika = int(saniye // 60)
-    saniye %= 60
-    saniye_tam = int(saniye)
-    salise = int((saniye - saniye_tam) * 100)
-    return f"{saat:01}:{dakika:02}:{saniye_tam:02}.{salise:02}"
-
-def relax_timings(subs: list, start_pad_sec: float = 0.0, end_pad_sec: float = 0.5) -> list:
+    """Saniyeyi ASS formatındaki Saat:Dakika:Saniye.Salise formatına çevirir.
+
+    Tamsayı salise üzerinden hesaplanır; kayan noktalı mod işlemlerinin 0.01 sn'lik
+    aşağı yuvarlama hataları (1.15 -> 1.14 gibi) oluşmaz.
+    """
+    salise = int(saniye * 100 + 1e-6)
+    saniye_tam, salise = divmod(salise, 100)
+    dakika, saniye_tam = divmod(saniye_tam, 60)
+    saat, dakika = divmod(dakika, 60)
+    return f"{saat}:{dakika:02}:{saniye_tam:02}.{salise:02}"
+
+def relax_timings(subs: list, start_pad_sec: float = 0.0, end_pad_sec: float = 0.5, min_duration_sec: float = 0.0) -> list:
     """Altyazı aralıklarını (start_pad_sec, end_pad_sec) kadar genişletir; çakışmayı komşularla sınırlar.
-    Kurallar:
-      - start = max(0, start - start_pad_sec)
-      - end   = end + end_pad_sec
-      - Bir sonraki satırla çakışırsa, end = min(end, next.start)
-      - Bir öncekiyle çakışırsa, start = max(start, prev.end)
+
+    Sütunlu uygulama için bkz. cue_timing.relax_timings.
     """
-    if not subs:
-        return subs
-    # Önce zamanlanan sıraya koy
-    items = sorted([dict(s) for s in subs], key=lambda s: (float(s.get('start', 0)), float(s.get('end', 0))))
-    n = len(items)
-    for i in range(n):
-        s = items[i]
-        s['start'] = max(0.0, float(s['start']) - float(start_pad_sec))
-        s['end'] = float(s['end']) + float(end_pad_sec)
-    # Komşularla çakışmayı azalt
-    for i in range(n):
-        if i > 0:
-            prev = items[i-1]
-            if items[i]['start'] < prev['end']:
-                items[i]['start'] = prev['end']
-        if i < n-1:
-            nxt = items[i+1]
-            if items[i]['end'] > float(nxt['start']):
-                items[i]['end'] = float(nxt['start'])
-        # start <= end güvenliği
-        if items[i]['end'] < items[i]['start']:
-            items[i]['end'] = items[i]['start']
-    return items
-
-def _guess_family_from_filename(file_path: str) -> str:
-    """Font dosya adından aile ismini tahmin eder (fontTools yoksa)."""
-    base = os.path.splitext(os.path.basename(file_path))[0]
-    # Yaygın ağırlık/stil eklerini temizle
-    tokens = base.replace('_', '-').split('-')
-    if len(tokens) > 1:
-        family = tokens[0]
-    else:
-        family = base
-    # Bazı son ekleri kaldır
-    endings = [
-        'Regular', 'Bold', 'Italic', 'Oblique', 'Medium', 'SemiBold', 'ExtraBold',
-        'Light', 'Thin', 'Black', 'Book', 'Roman', 'ExtraLight', 'DemiBold'
-    ]
-    for end in endings:
-        if family.endswith(end):
-            family = family[: -len(end)]
-    return family.strip() or base
+    return cue_timing.relax_timings(subs, start_pad_sec, end_pad_sec, min_duration_sec)
 
 
 def _read_font_family_name(font_path: str) -> str:
     """Font dosyasının gerçek family adını döndürür; mümkün değilse dosya adına göre tahmin eder.
 
-    Not: Çalışan süreçte fontTools sonradan yüklenmiş olabilir. Bu yüzden her çağrıda
-    dinamik import denemesi yapıyoruz ki yeniden başlatmaya gerek kalmadan doğru
-    aile ismi okunabilsin.
+    Sonuç font_registry üzerinden (yol, boyut, mtime) anahtarıyla önbelleklenir.
     """
-    global _HAS_FONTTOOLS
-    TTFontLocal = None
-
-    # Dinamik import denemesi
-    if not _HAS_FONTTOOLS:
-        try:
-            from importlib import import_module
-            TTFontLocal = import_module('fontTools.ttLib').TTFont  # type: ignore
-            _HAS_FONTTOOLS = True
-        except Exception:
-            TTFontLocal = None
-    else:
-        try:
-            TTFontLocal = TTFont  # type: ignore
-        except Exception:
-            TTFontLocal = None
-
-    if font_path and TTFontLocal:
-        try:
-            font = TTFontLocal(font_path)
-            # nameID 1: Family Name; nameID 4: Full Name
-            family_name = None
-            full_name = None
-            for rec in font['name'].names:
-                try:
-                    text = rec.toUnicode()
-                except Exception:
-                    try:
-                        text = rec.string.decode(rec.getEncoding(), errors='ignore')
-                    except Exception:
-                        text = None
-                if not text:
-                    continue
-                if rec.nameID == 1 and not family_name:
-                    family_name = text
-                if rec.nameID == 4 and not full_name:
-                    full_name = text
-                if family_name and full_name:
-                    break
-            font.close()
-            # Önce family (1), yoksa full (4)
-            if family_name:
-                return family_name
-            if full_name:
-                return full_name
-        except Exception:
-            pass
-    # fontTools yoksa veya okunamadıysa dosya adına göre tahmin et
-    return _guess_family_from_filename(font_path) if font_path else 'Arial'
+    if not font_path:
+        return 'Arial'
+    return font_registry.get_default_registry().get(font_path)['family']
 
 
 def _detect_font_style_flags(font_path: str) -> dict:
     """Seçili font dosyasından bold/italic destek durumunu tahmin eder.
     Dönüş: { 'supports_bold': bool, 'is_italic_face': bool }
     """
-    info = { 'supports_bold': False, 'is_italic_face': False }
     if not font_path:
-        return info
-    lower_name = os.path.basename(font_path).lower()
-    if 'italic' in lower_name or 'ital' in lower_name:
-        info['is_italic_face'] = True
+        return { 'supports_bold': False, 'is_italic_face': False }
+    meta = font_registry.get_default_registry().get(font_path)
+    return { 'supports_bold': meta['supports_bold'], 'is_italic_face': meta['is_italic_face'] }
 
-    # Dinamik fontTools ile daha sağlam tespit
-    try:
-        from importlib import import_module
-        TTFontLocal = import_module('fontTools.ttLib').TTFont  # type: ignore
-        font = TTFontLocal(font_path)
-        try:
-            # OS/2 tablosu ağırlık ve italic bayrağı içerir
-            if 'OS/2' in font:
-                os2 = font['OS/2']
-                weight = getattr(os2, 'usWeightClass', 400)
-                info['supports_bold'] = bool(weight and weight >= 700)
-                # ItalicAngle bazı fontlarda post tablosunda olur
-                if 'post' in font:
-                    italic_angle = getattr(font['post'], 'italicAngle', 0)
-                    if italic_angle and float(italic_angle) != 0.0:
-                        info['is_italic_face'] = True
-        finally:
-            font.close()
-    except Exception:
-        # Dosya adına göre kaba tahmin
-        if any(t in lower_name for t in ['bold', 'black', 'heavy']):
-            info['supports_bold'] = True
-    return info
 
+ASS_SCRIPT_INFO = (
+    "[Script Info]\nTitle: Generated Subtitles\nScriptType: v4.00+\nWrapStyle: 0\n"
+    "ScaledBorderAndShadow: yes\nPlayResX: 1080\nPlayResY: 1920\n\n"
+)
+ASS_STYLE_FORMAT = "Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, Alignment, MarginL, MarginR, MarginV, Encoding\n"
+ASS_EVENT_FORMAT = "Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text\n"
+ASS_SPEAKER_COLORS = ('&H00FFFF', '&HFFFFFF', '&H00FF00', '&HFF00FF', '&HFFFF00')
 
-def generate_ass_file(altyazilar_data, output_path, color_map=None, font_path=None, has_background=False, has_animation=False, is_bold=False, bg_opacity=0.5, margin_v=450, font_size: int = 60, outline_px: int = 3, shadow_px: int = 2, alignment: int = 2, margin_l: int = 80, margin_r: int = 80):
-    """Verilen altyazı verisinden bir .ass altyazı dosyası oluşturur."""
-    konusmaci_stilleri = {}
-    renk_listesi = ['&H00FFFF', '&HFFFFFF', '&H00FF00', '&HFF00FF', '&HFFFF00']
 
-    stiller = "[V4+ Styles]\n"
-    stiller += "Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, Alignment, MarginL, MarginR, MarginV, Encoding\n"
-    
-    olaylar = "\n[Events]\n"
-    olaylar += "Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text\n"
-    
-    # Varsayılan fontu ve font klasörünü kontrol et
+def ass_stilini_coz(font_path=None, has_background=False, is_bold=False, bg_opacity=0.5, margin_v=450, font_size: int = 60, outline_px: int = 3, shadow_px: int = 2, alignment: int = 2, margin_l: int = 80, margin_r: int = 80) -> dict:
+    """Font ve stil ayarlarını render başına bir kez çözer.
+
+    Konuşmacıya göre değişen tek alan renktir; Style satırının geri kalanı burada hazırlanır.
+    Dönüş: {'font_path', 'fontname', 'bas': 'Fontname,Fontsize', 'kuyruk': renkten sonraki alanlar}
+    """
+    active_font_path = _aktif_font_yolunu_bul(font_path)
     fontname = "Arial"  # Varsayılan
-    default_font_path = None
-    fonts_dir = 'fonts'
-    if os.path.exists(fonts_dir):
-        font_files = [
-            os.path.join(fonts_dir, f)
-            for f in os.listdir(fonts_dir)
-            if f.lower().endswith(('.ttf', '.otf'))
-        ]
-        if font_files:
-            # En son eklenen/değiştirilen fontu seç
-            default_font_path = max(font_files, key=lambda p: os.path.getmtime(p))
-    
-    active_font_path = font_path if font_path else default_font_path
     italic_flag = 0
     supports_bold = True
     if active_font_path:
@@ -283,186 +345,842 @@ def generate_ass_file(altyazilar_data, output_path, color_map=None, font_path=No
             pass
 
     bg_opacity_hex = format(math.floor(255 * (1 - bg_opacity)), '02X')
+    border_style = 1 if not has_background else 3
+    # Seçilen font bold desteklemiyorsa bold'u zorlamayalım (fallback tetikleyebilir)
+    bold_flag = -1 if (is_bold and supports_bold) else 0
+    back_color = f"&H{bg_opacity_hex}000000"
+    # SecondaryColour beyaz, OutlineColour siyah
+    secondary = '&H00FFFFFF'
+    outline_colour = '&H00000000'
+    return {
+        'font_path': active_font_path,
+        'fontname': fontname,
+        'bas': f"{fontname},{int(font_size)}",
+        'kuyruk': (
+            f"{secondary},{outline_colour},{back_color},{bold_flag},{italic_flag},0,0,100,100,0,0,"
+            f"{border_style},{max(0, int(outline_px))},{max(0, int(shadow_px))},{int(alignment)},"
+            f"{int(margin_l)},{int(margin_r)},{int(margin_v)},1"
+        ),
+    }
 
+
+# Pop-up efektinde altyazı 80 ms erken başlar, 120 ms'lik geçişle görünür
+ANIMATION_LEAD_SEC = 0.08
+
+
+def _ass_olay_satirlari(altyazilar_data, stil_adlari: dict, has_animation: bool = False):
+    """Dialogue satırlarını tek tek üretir; dosyaya yazılırken bellekte birikmez."""
+    kayma = ANIMATION_LEAD_SEC if has_animation else 0.0
+    efekt = "{\\fad(120,120)}" if has_animation else ""
+    varsayilan_konusmaci = "Konuşmacı 1"
     for altyazi in altyazilar_data:
-        konusmaci = altyazi.get("speaker", "Konuşmacı 1").replace(" ", "")
-        if konusmaci not in konusmaci_stilleri:
-            renk = color_map.get(altyazi.get("speaker", "Konuşmacı 1"), renk_listesi[len(konusmaci_stilleri) % len(renk_listesi)]) if color_map else renk_listesi[len(konusmaci_stilleri) % len(renk_listesi)]
-            konusmaci_stilleri[konusmaci] = renk
-            
-            border_style = 1 if not has_background else 3
-            outline = max(0, int(outline_px))
-            # Seçilen font bold desteklemiyorsa bold'u zorlamayalım (fallback tetikleyebilir)
-            bold_flag = -1 if (is_bold and supports_bold) else 0
-            back_color = f"&H{bg_opacity_hex}000000"
-
-            # SecondaryColour ve OutlineColour'u daha mantıklı yapalım: Secondary beyaz, Outline siyah
-            secondary = '&H00FFFFFF'
-            outline_colour = '&H00000000'
-            shadow = max(0, int(shadow_px))
-
-            stiller += f"Style: {konusmaci},{fontname},{int(font_size)},{renk},{secondary},{outline_colour},{back_color},{bold_flag},{italic_flag},0,0,100,100,0,0,{border_style},{outline},{shadow},{int(alignment)},{int(margin_l)},{int(margin_r)},{int(margin_v)},1\n"
-        
-        start_sec = max(0.0, float(altyazi['start']) - (0.08 if has_animation else 0.0))
-        end_sec = float(altyazi['end'])
-        start_time = saniye_to_ass_time(start_sec)
-        end_time = saniye_to_ass_time(end_sec)
+        start_time = saniye_to_ass_time(max(0.0, float(altyazi['start']) - kayma))
+        end_time = saniye_to_ass_time(float(altyazi['end']))
+        konusmaci = stil_adlari[altyazi.get("speaker", varsayilan_konusmaci)]
         text = altyazi['text'].replace('\n', '\\N')
-        
-        effect = ""
-        if has_animation:
-            # Daha hızlı pop-up (120ms)
-            text = f"{{\\fad(120,120)}}{text}"
+        yield f"Dialogue: 0,{start_time},{end_time},{konusmaci},,0,0,0,,{efekt}{text}\n"
+
+
+def generate_ass_file(altyazilar_data, output_path, color_map=None, font_path=None, has_background=False, has_animation=False, is_bold=False, bg_opacity=0.5, margin_v=450, font_size: int = 60, outline_px: int = 3, shadow_px: int = 2, alignment: int = 2, margin_l: int = 80, margin_r: int = 80, stil: dict | None = None):
+    """Verilen altyazı verisinden bir .ass altyazı dosyası oluşturur.
 
-        olaylar += f"Dialogue: 0,{start_time},{end_time},{konusmaci},,0,0,0,{effect},{text}\n"
+    Olaylar tek bir metinde biriktirilmeden dosyaya akıtılır. Font ve stil çözümü
+    (ass_stilini_coz) render başına bir kez yapılıp 'stil' ile verilebilir; verilmezse burada çözülür.
+    """
+    if stil is None:
+        stil = ass_stilini_coz(font_path, has_background, is_bold, bg_opacity, margin_v, font_size=font_size, outline_px=outline_px,
+                               shadow_px=shadow_px, alignment=alignment, margin_l=margin_l, margin_r=margin_r)
+
+    # Stiller olaylardan önce yazılır: önce yalnızca konuşmacılar toplanır
+    stil_adlari = {}  # ham konuşmacı adı -> stil adı
+    renkler = {}  # stil adı -> birincil renk
+    for altyazi in altyazilar_data:
+        ham = altyazi.get("speaker", "Konuşmacı 1")
+        if ham in stil_adlari:
+            continue
+        ad = ham.replace(" ", "")
+        stil_adlari[ham] = ad
+        if ad not in renkler:
+            varsayilan = ASS_SPEAKER_COLORS[len(renkler) % len(ASS_SPEAKER_COLORS)]
+            renkler[ad] = color_map.get(ham, varsayilan) if color_map else varsayilan
 
     with open(output_path, 'w', encoding='utf-8') as f:
-        f.write("[Script Info]\nTitle: Generated Subtitles\nScriptType: v4.00+\nWrapStyle: 0\nScaledBorderAndShadow: yes\nPlayResX: 1080\nPlayResY: 1920\n\n")
-        f.write(stiller)
-        f.write(olaylar)
-    
+        f.write(ASS_SCRIPT_INFO)
+        f.write("[V4+ Styles]\n")
+        f.write(ASS_STYLE_FORMAT)
+        for ad, renk in renkler.items():
+            f.write(f"Style: {ad},{stil['bas']},{renk},{stil['kuyruk']}\n")
+        f.write("\n[Events]\n")
+        f.write(ASS_EVENT_FORMAT)
+        f.writelines(_ass_olay_satirlari(altyazilar_data, stil_adlari, has_animation))
+
     return output_path
 
-def altyazilari_videoya_ekle(video_yolu, altyazilar_data, output_folder, color_map=None, font_path=None, has_background=False, has_animation=False, is_bold=False, bg_opacity=0.5, margin_v=450, font_size: int = 60, outline_px: int = 3, shadow_px: int = 2, alignment: int = 2, crf: int = 20, fps: int | None = None, margin_l: int = 80, margin_r: int = 80):
-    """Altyazı dosyası oluşturur ve FFmpeg'in subtitles filtresi ile videoya basar."""
-    dosya_adi = os.path.basename(video_yolu)
-    altyazili_video_yolu = os.path.join(output_folder, f"{os.path.splitext(dosya_adi)[0]}_altyazili.mp4")
-    altyazi_dosya_yolu = os.path.join(output_folder, f"{os.path.splitext(dosya_adi)[0]}.ass")
+def _milisaniye_zamani(saniye, ayirici: str) -> str:
+    """Saniyeyi SRT (',') / WebVTT ('.') biçimindeki SS:DD:ss<ayırıcı>mmm zamanına çevirir."""
+    ms = int(round(max(0.0, float(saniye)) * 1000))
+    saniye_tam, ms = divmod(ms, 1000)
+    dakika, saniye_tam = divmod(saniye_tam, 60)
+    saat, dakika = divmod(dakika, 60)
+    return f"{saat:02}:{dakika:02}:{saniye_tam:02}{ayirici}{ms:03}"
+
+
+def generate_srt_file(altyazilar_data, output_path):
+    """Altyazıları SRT olarak yazar (mov_text izinin kaynağı ve indirilebilir yan dosya)."""
+    def bloklar():
+        for i, altyazi in enumerate(altyazilar_data, 1):
+            yield (f"{i}\n{_milisaniye_zamani(altyazi['start'], ',')} --> {_milisaniye_zamani(altyazi['end'], ',')}\n"
+                   f"{altyazi['text'].strip()}\n\n")
+    with open(output_path, 'w', encoding='utf-8') as f:
+        f.writelines(bloklar())
+    return output_path
 
+
+def generate_vtt_file(altyazilar_data, output_path):
+    """Altyazıları WebVTT olarak yazar; konuşmacı <v> etiketiyle korunur (tarayıcı <track> için)."""
+    def bloklar():
+        for altyazi in altyazilar_data:
+            konusmaci = altyazi.get('speaker')
+            # WebVTT'de '-->' ve '<' metin içinde kaçırılmalı
+            text = altyazi['text'].strip().replace('&', '&amp;').replace('<', '&lt;').replace('-->', '--&gt;')
+            ses = f"<v {konusmaci.replace('>', '')}>" if konusmaci else ''
+            yield f"{_milisaniye_zamani(altyazi['start'], '.')} --> {_milisaniye_zamani(altyazi['end'], '.')}\n{ses}{text}\n\n"
+    with open(output_path, 'w', encoding='utf-8') as f:
+        f.write("WEBVTT\n\n")
+        f.writelines(bloklar())
+    return output_path
+
+
+def _aktif_font_yolunu_bul(font_path=None):
+    """Kullanılacak fontu belirler (yüklenen > fonts/ içindeki en yeni)."""
+    if font_path:
+        return font_path
+    return font_registry.get_default_registry().newest_font_path()
+
+
+def _altyazi_filtresi_hazirla(altyazilar_data, ad, color_map=None, font_path=None, has_background=False, has_animation=False, is_bold=False, bg_opacity=0.5, margin_v=450, font_size: int = 60, outline_px: int = 3, shadow_px: int = 2, alignment: int = 2, margin_l: int = 80, margin_r: int = 80):
+    """İşe özel klasörde fontu ve .ass dosyasını hazırlar, 'subtitles=' filtresini döndürür.
+
+    Font kopyalanmaz: içerik adresli depodaki dosyaya iş klasöründen bağlantı verilir.
+    Eşzamanlı işler aynı fontu kullansa da her birinin klasörü ayrıdır.
+    Dönüş: (filtre_metni, temizlenecek_yollar)
+    """
     # Adım 1: Kullanılacak fontu belirle (yüklenen > varsayılan)
-    active_font_path = None
-    default_font_path = None
-    fonts_dir = 'fonts'
-    if os.path.exists(fonts_dir):
-        font_files = [
-            os.path.join(fonts_dir, f)
-            for f in os.listdir(fonts_dir)
-            if f.lower().endswith(('.ttf', '.otf'))
-        ]
-        if font_files:
-            # En son eklenen/değiştirilen fontu seç
-            default_font_path = max(font_files, key=lambda p: os.path.getmtime(p))
-    active_font_path = font_path if font_path else default_font_path
+    active_font_path = _aktif_font_yolunu_bul(font_path)
 
-    # Adım 2: Fontu .ass dosyasının yanına kopyala ki FFmpeg bulsun
-    temp_font_path_in_output = None
+    # Adım 2: İşe özel klasörü aç ve fontu buraya bağla ki FFmpeg bulsun
+    is_klasoru = font_store.create_job_dir(ad)
+    altyazi_dosya_yolu = os.path.join(is_klasoru, f"{ad}.ass")
     if active_font_path and os.path.exists(active_font_path):
-        import shutil
-        temp_font_path_in_output = os.path.join(output_folder, os.path.basename(active_font_path))
-        shutil.copy(active_font_path, temp_font_path_in_output)
+        # Büyük fontlar yalnızca altyazıda geçen karakterlerin glifleriyle bağlanır
+        metin = ''.join((a.get('text') or '') for a in altyazilar_data)
+        font_store.link_font_into(is_klasoru, active_font_path, text=metin)
         try:
             print(f"Kullanılan font dosyası: {active_font_path}")
-            print(f"ASS içinde kullanılacak aile adı: {_read_font_family_name(active_font_path)}")
         except Exception:
             pass
 
-    # Adım 3: .ass altyazı dosyasını oluştur
-    generate_ass_file(altyazilar_data, altyazi_dosya_yolu, color_map, active_font_path, has_background, has_animation, is_bold, bg_opacity, margin_v, font_size=font_size, outline_px=outline_px, shadow_px=shadow_px, alignment=alignment, margin_l=margin_l, margin_r=margin_r)
+    # Adım 3: .ass altyazı dosyasını oluştur (font ve stil bu render için bir kez çözülür)
+    try:
+        stil = ass_stilini_coz(active_font_path, has_background, is_bold, bg_opacity, margin_v, font_size=font_size, outline_px=outline_px,
+                               shadow_px=shadow_px, alignment=alignment, margin_l=margin_l, margin_r=margin_r)
+        generate_ass_file(altyazilar_data, altyazi_dosya_yolu, color_map, has_animation=has_animation, stil=stil)
+    except Exception:
+        font_store.remove_job_dir(is_klasoru)
+        raise
 
-    # Adım 4: Altyazıyı videoya bas (fontsdir ile kopyaladığımız klasörü ve fallback olarak fonts/ klasörünü göster)
+    # Adım 4: Filtreyi kur. fontsdir yalnızca iş klasörünü gösterir: libass bu klasördeki
+    # her fontu belleğe yükler, fonts/ klasörünün tamamını eklemek alt kümenin faydasını siler.
     altyazi_dosya_yolu_ffmpeg = altyazi_dosya_yolu.replace('\\', '/')
-    output_folder_rel = output_folder.replace('\\', '/')
-    fonts_dir_rel = 'fonts'
-    # Bazı ffmpeg derlemeleri birden fazla dizini '|' ile ayırarak kabul eder
-    vf_fontsdir = f"{output_folder_rel}|{fonts_dir_rel}"
+    vf_fontsdir = is_klasoru.replace('\\', '/')
     # Shell kullanılmadığı için tırnak gerekmez; relatif yollar boşluk içermiyor
-    vf_filter = f"subtitles=filename={altyazi_dosya_yolu_ffmpeg}:fontsdir={vf_fontsdir}"
+    return f"subtitles=filename={altyazi_dosya_yolu_ffmpeg}:fontsdir={vf_fontsdir}", [is_klasoru]
+
+
+def _gecici_dosyalari_temizle(yollar):
+    for yol in yollar:
+        if yol and os.path.isdir(yol):
+            font_store.remove_job_dir(yol)
+        elif yol and os.path.exists(yol):
+            os.remove(yol)
+
+
+
+# --- Kodlanırken izlenebilen çıktı ---
+# Fragmented MP4'te moov kutusu başta boş yazılır, görüntü her anahtar karede kendi
+# moof/mdat parçasıyla dosyaya eklenir. +faststart'ın sondaki ikinci yazım geçişi olmadığı
+# için dosya kodlama sürerken oynatılabilir.
+PROGRESSIVE_OUTPUT = os.environ.get('PROGRESSIVE_OUTPUT', '0').lower() in ('1', 'true', 'yes')
+PROGRESSIVE_FRAGMENT_SEC = float(os.environ.get('PROGRESSIVE_FRAGMENT_SEC', 2))
+# Çıktı yazılırken yanında duran işaret dosyasının eki
+WRITING_MARKER_SUFFIX = '.writing'
+
+
+def _cikti_bayraklari(progressive: bool = False) -> list:
+    """Çıktı kabı bayrakları: +faststart ya da parça parça yazılan fragmented MP4."""
+    if not progressive:
+        return ['-movflags', '+faststart']
+    # Anahtar kare aralığı parça süresini belirler; ilk parça birkaç saniyede diske düşer
+    return [
+        '-force_key_frames', f"expr:gte(t,n_forced*{PROGRESSIVE_FRAGMENT_SEC:g})",
+        '-movflags', '+frag_keyframe+empty_moov+default_base_moof',
+    ]
+
+
+@contextmanager
+def _yaziliyor(cikti_yolu, progressive: bool = False):
+    """progressive ise çıktı yazıldığı sürece yanına işaret dosyası koyar.
+
+    Akış uç noktası işaret varken dosyayı büyüdükçe gönderir, yoksa tamamlanmış sayar.
+    İşarete yazan sürecin host:pid damgası yazılır; süreç öldürülürse işaret bayat sayılır.
+    """
+    isaret = f"{cikti_yolu}{WRITING_MARKER_SUFFIX}"
+    if progressive:
+        with open(isaret, 'w') as f:
+            f.write(task_store.current_owner())
+    try:
+        yield
+    finally:
+        if progressive:
+            try:
+                os.remove(isaret)
+            except OSError:
+                pass
+
+
+def _isaret_sahibi(isaret) -> str | None:
+    """İşarete yazılmış host:pid damgası (okunamazsa None)."""
+    try:
+        with open(isaret) as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def _son_yazim(isaret) -> float | None:
+    """İşaretin ya da büyüyen çıktının en son değiştirilme zamanı (başka host'taki sahip için)."""
+    zamanlar = []
+    for yol in (isaret, isaret[:-len(WRITING_MARKER_SUFFIX)]):
+        try:
+            zamanlar.append(os.path.getmtime(yol))
+        except OSError:
+            pass
+    return max(zamanlar) if zamanlar else None
+
+
+def _isaret_bayat_mi(isaret) -> bool:
+    """İşareti yazan süreç artık çalışmıyorsa True (boş işaret de bayattır).
+
+    Başka host'un işareti, çıktı uzun süredir büyümüyorsa bayat sayılır.
+    """
+    sahip = _isaret_sahibi(isaret)
+    if sahip is None:
+        return False
+    return not task_store.owner_alive(sahip, _son_yazim(isaret))
+
+
+def yaziliyor_mu(cikti_yolu) -> bool:
+    """Çıktı hâlâ kodlanıyorsa (işaret duruyor ve yazan süreç yaşıyorsa) True.
+
+    Yazan süreci ölmüş bayat işaret silinir ve çıktı tamamlanmış sayılır.
+    """
+    isaret = f"{cikti_yolu}{WRITING_MARKER_SUFFIX}"
+    if not os.path.exists(isaret):
+        return False
+    if _isaret_bayat_mi(isaret):
+        try:
+            os.remove(isaret)
+        except OSError:
+            pass
+        return False
+    return True
+
+
+def yarim_isaretleri_temizle(klasor) -> int:
+    """Başlangıçta önceki süreçlerden kalan yazım işaretlerini siler; silinen sayısını verir.
+
+    Bu sürecin damgasını taşıyan işaretler de silinir: konteynerde yeniden başlayan süreç
+    aynı pid'i alabilir ve başlangıçta henüz hiçbir çıktı yazmıyordur. Çıktı klasörünü
+    paylaşan başka host'ların işaretleri, çıktıları uzun süredir büyümüyorsa silinir.
+    """
+    silinen = 0
+    benim = task_store.current_owner()
+    try:
+        adlar = os.listdir(klasor)
+    except OSError:
+        return 0
+    for ad in adlar:
+        if not ad.endswith(WRITING_MARKER_SUFFIX):
+            continue
+        isaret = os.path.join(klasor, ad)
+        sahip = _isaret_sahibi(isaret)
+        if sahip is None:
+            continue
+        if sahip == benim or not task_store.owner_alive(sahip, _son_yazim(isaret)):
+            try:
+                os.remove(isaret)
+                silinen += 1
+            except OSError:
+                pass
+    return silinen
+
+# Paralel altyazı basmada bir aralık bundan kısa olmaz (kısa videolar bölünmez)
+PARALLEL_MIN_RANGE_SEC = float(os.environ.get('PARALLEL_MIN_RANGE_SEC', 20))
+
+
+def _toplu_ilerleme(on_progress, sureler: list):
+    """Aynı anda çalışan ffmpeg'lerin ilerlemesini süreye göre ağırlıklı tek yüzdeye çevirir.
+
+    Dönüş: aralık indeksi alıp o aralığın on_progress geri çağrısını veren fonksiyon.
+    """
+    toplam = sum(sureler) or 1.0
+    yuzdeler = [0.0] * len(sureler)
+    kilit = threading.Lock()
+
+    def aralik(i):
+        def report(percent, speed=None, eta=None):
+            if not on_progress or percent is None:
+                return
+            with kilit:
+                yuzdeler[i] = percent
+                genel = sum(y * d for y, d in zip(yuzdeler, sureler)) / toplam
+            on_progress(genel, speed, None)
+        return report
+    return aralik
+
+
+def _paralel_altyazi_bas(video_yolu, vf_filter, cikti_yolu, aralik_sayisi: int, crf: int = 20, fps: int | None = None, on_progress=None):
+    """Videoyu eşit zaman aralıklarına bölüp her aralığa altyazıyı ayrı bir ffmpeg ile basar.
+
+    Her süreç girdide aralığın başına arar; -copyts ile asıl zaman damgaları korunduğu için
+    tek .ass dosyası her aralıkta doğru satırları çizer, sınırı aşan altyazılar da iki tarafta
+    kesintisiz görünür. trim [başlangıç, bitiş) aralığını kesin keser. Aralıklar yalnızca
+    görüntü olarak kodlanır; concat demuxer ile yeniden kodlamadan birleştirilirken ses
+    orijinal girdiden tek parça kopyalanır.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    sure = media_probe.probe(video_yolu)['duration']
+    sinirlar = [sure * i / aralik_sayisi for i in range(aralik_sayisi + 1)]
+    is_klasoru = font_store.create_job_dir(f"{os.path.splitext(os.path.basename(cikti_yolu))[0]}_aralik")
+    ilerleme = _toplu_ilerleme(on_progress, [sinirlar[i + 1] - sinirlar[i] for i in range(aralik_sayisi)])
+
+    def aralik_bas(i):
+        bas, son = sinirlar[i], sinirlar[i + 1]
+        cikti = os.path.join(is_klasoru, f"aralik_{i:03d}.mp4")
+        # Son aralık açık uçlu bırakılır; süre yuvarlamasıyla son kare kaybolmasın
+        trim = f"trim=start={bas:.6f}" + (f":end={son:.6f}" if i < aralik_sayisi - 1 else '')
+        command = [
+            'ffmpeg',
+            '-ss', f'{bas:.6f}', '-copyts',
+            '-i', video_yolu,
+            '-vf', f"{trim},{vf_filter},setpts=PTS-STARTPTS",
+            '-an',
+            '-threads', '1'
+        ]
+        if fps:
+            command += ['-r', str(int(fps))]
+        command += [
+            '-c:v', 'libx264',
+            '-preset', 'ultrafast',
+            '-crf', str(int(crf)),
+            '-pix_fmt', 'yuv420p',
+            '-y', cikti
+        ]
+        run_ffmpeg_command(command, on_progress=ilerleme(i), duration=son - bas)
+        return cikti
+
+    try:
+        with ThreadPoolExecutor(max_workers=aralik_sayisi) as pool:
+            parcalar = list(pool.map(aralik_bas, range(aralik_sayisi)))
+        liste = os.path.join(is_klasoru, 'concat.txt')
+        with open(liste, 'w', encoding='utf-8') as f:
+            for yol in parcalar:
+                f.write(f"file '{os.path.abspath(yol).replace(chr(92), '/')}'\n")
+        run_ffmpeg_command([
+            'ffmpeg',
+            '-f', 'concat', '-safe', '0',
+            '-i', liste,
+            '-i', video_yolu,
+            '-map', '0:v:0', '-map', '1:a?',
+            '-c', 'copy',
+            '-movflags', '+faststart',
+            '-y', cikti_yolu
+        ])
+    finally:
+        font_store.remove_job_dir(is_klasoru)
+    return cikti_yolu
+
+
+def altyazilari_videoya_ekle(video_yolu, altyazilar_data, output_folder, color_map=None, font_path=None, has_background=False, has_animation=False, is_bold=False, bg_opacity=0.5, margin_v=450, font_size: int = 60, outline_px: int = 3, shadow_px: int = 2, alignment: int = 2, crf: int = 20, fps: int | None = None, margin_l: int = 80, margin_r: int = 80, width: int | None = None, height: int | None = None, on_progress=None, parallel: int = 1, progressive: bool = False):
+    """Altyazı dosyası oluşturur ve FFmpeg'in subtitles filtresi ile videoya basar.
+
+    width/height verilirse altyazıdan önce ölçekleme/bant zinciri de uygulanır; bu sayede
+    stream-copy ile saklanmış (henüz 9:16'ya getirilmemiş) taban videolar da işlenebilir.
+    Girdi zaten bu boyuttaysa scale filtresi kareleri dokunmadan geçirir.
+    parallel > 1 ise video zaman aralıklarına bölünüp aralıklar aynı anda kodlanır
+    (bkz. _paralel_altyazi_bas). progressive=True ise çıktı fragmented MP4 olarak tek süreçte
+    yazılır ve kodlama sürerken oynatılabilir; aralıklar ancak sonda birleştiği için bu
+    modda paralel kodlama kullanılmaz.
+    """
+    dosya_adi = os.path.basename(video_yolu)
+    altyazili_video_yolu = os.path.join(output_folder, f"{os.path.splitext(dosya_adi)[0]}_altyazili.mp4")
+
+    vf_filter, temizlenecekler = _altyazi_filtresi_hazirla(
+        altyazilar_data, os.path.splitext(dosya_adi)[0], color_map, font_path, has_background, has_animation, is_bold, bg_opacity, margin_v,
+        font_size=font_size, outline_px=outline_px, shadow_px=shadow_px, alignment=alignment, margin_l=margin_l, margin_r=margin_r
+    )
+    if width and height:
+        vf_filter = f"{_scale_pad_filter(width, height)},{vf_filter}"
+
+    if parallel > 1 and not progressive:
+        try:
+            aralik_sayisi = min(int(parallel), int(media_probe.probe(video_yolu)['duration'] // PARALLEL_MIN_RANGE_SEC))
+        except Exception as e:
+            print("Süre okunamadı, paralel kodlama atlanıyor:", e)
+            aralik_sayisi = 1
+        if aralik_sayisi > 1:
+            try:
+                _paralel_altyazi_bas(video_yolu, vf_filter, altyazili_video_yolu, aralik_sayisi, crf=crf, fps=fps, on_progress=on_progress)
+            finally:
+                _gecici_dosyalari_temizle(temizlenecekler)
+            return altyazili_video_yolu
 
     command = [
         'ffmpeg',
         '-i', video_yolu,
         '-vf', vf_filter,
-        '-threads', '1'
     ]
+    # Thread sayısını FFMPEG_THREADS / slot politikası belirler (run_ffmpeg_command ekler)
     if fps:
         command += ['-r', str(int(fps))]
     command += [
         '-c:v', 'libx264',
         '-preset', 'ultrafast',
         '-crf', str(int(crf)),
-        '-threads', '1',
-        '-movflags', '+faststart',
+        # Taban stream-copy ile saklandığında 10-bit/4:2:2 kaynaklar da tarayıcıda oynasın
+        '-pix_fmt', 'yuv420p'
+    ] + _cikti_bayraklari(progressive) + [
         '-c:a', 'copy',
         '-y',
         altyazili_video_yolu
     ]
-    run_ffmpeg_command(command)
-    
-    # Adım 5: Geçici dosyaları temizle
-    os.remove(altyazi_dosya_yolu)
-    if temp_font_path_in_output and os.path.exists(temp_font_path_in_output):
-        os.remove(temp_font_path_in_output)
+    try:
+        with _yaziliyor(altyazili_video_yolu, progressive):
+            run_ffmpeg_command(command, on_progress=on_progress)
+    finally:
+        # Geçici dosyaları temizle
+        _gecici_dosyalari_temizle(temizlenecekler)
 
     return altyazili_video_yolu
 
 
-def _split_long_sentences(entries: list, max_chars_per_entry: int = 90) -> list:
-    """Uzun metinleri nokta/soru/ünlem ve uygun bağlaçlara göre 2-3 parçaya böler.
-    Çok uzun cümlede yaklaşık 80-100 karakteri geçmeyecek şekilde parçalara ayırır.
-    Zamanı orantısal paylaştırır.
+# Altyazı çıktı biçimleri:
+#   'burn' -> altyazı görüntüye basılır (libx264 ile yeniden kodlama)
+#   'soft' -> altyazı mov_text izi olarak eklenir, görüntü kopyalanır; SRT/VTT/ASS yan dosyaları yazılır
+SUBTITLE_MODES = ('burn', 'soft')
+SIDECAR_FORMATS = ('srt', 'vtt', 'ass')
+
+
+def yan_dosya_yollari(altyazili_video_yolu) -> dict:
+    """Yumuşak altyazılı çıktının yan dosya yolları: {'srt': ..., 'vtt': ..., 'ass': ...}."""
+    kok = os.path.splitext(altyazili_video_yolu)[0]
+    return {ext: f"{kok}.{ext}" for ext in SIDECAR_FORMATS}
+
+
+def yumusak_altyazi_ekle(video_yolu, altyazilar_data, output_folder, color_map=None, font_path=None, has_background=False, has_animation=False, is_bold=False, bg_opacity=0.5, margin_v=450, font_size: int = 60, outline_px: int = 3, shadow_px: int = 2, alignment: int = 2, crf: int = 20, fps: int | None = None, margin_l: int = 80, margin_r: int = 80, width: int | None = None, height: int | None = None, on_progress=None, kok: str | None = None):
+    """Altyazıyı basmak yerine videoya ayrı bir altyazı izi (mov_text) olarak ekler.
+
+    Aynı altyazı verisinden SRT, WebVTT ve (stil ayarlarıyla) ASS yan dosyaları yazılır.
+    Girdi zaten width x height biçimindeyse (ya da boyut verilmediyse) akışlar yeniden
+    kodlanmadan kopyalanır; iş saniyeler süren bir remux'a iner. Değilse yalnızca ölçekleme
+    için kodlanır, altyazı filtresi çalışmaz. MP4 kabı yalnızca mov_text taşıyabildiği için
+    VTT/ASS yan dosya olarak verilir.
+    Dönüş: (altyazili_video_yolu, {'srt', 'vtt', 'ass'} yan dosya yolları)
     """
-    out = []
-    for e in entries:
-        text = (e.get('text') or '').strip()
-        if not text:
-            continue
-        length = len(text)
-        start = float(e.get('start', 0))
-        end = float(e.get('end', start))
-        dur = max(0.0, end - start)
-        if length <= max_chars_per_entry or dur <= 0.4:
-            out.append(e)
-            continue
-        # Cümle sınırlarına göre bölmeyi dene
-        import re
-        parts = re.split(r'(?<=[\.!?])\s+', text)
-        parts = [p for p in parts if p]
-        if len(parts) == 1:
-            # Noktalama yoksa kabaca karakter sayısına göre 2-3 parçaya böl
-            chunk = max_chars_per_entry
-            parts = [text[i:i+chunk] for i in range(0, length, chunk)]
-        total_chars = sum(len(p) for p in parts)
-        t = start
-        for p in parts:
-            frac = (len(p) / total_chars) if total_chars else 1.0/len(parts)
-            seg = max(0.3, dur * frac)
-            seg_end = min(end, t + seg)
-            out.append({
-                'speaker': e.get('speaker', 'Konuşmacı 1'),
-                'start': t,
-                'end': seg_end,
-                'text': p.strip()
-            })
-            t = seg_end
-    return out
+    kok = kok or os.path.splitext(os.path.basename(video_yolu))[0]
+    altyazili_video_yolu = os.path.join(output_folder, f"{kok}_altyazili.mp4")
+    yan_dosyalar = yan_dosya_yollari(altyazili_video_yolu)
+    generate_srt_file(altyazilar_data, yan_dosyalar['srt'])
+    generate_vtt_file(altyazilar_data, yan_dosyalar['vtt'])
+    generate_ass_file(altyazilar_data, yan_dosyalar['ass'], color_map, font_path, has_background, has_animation, is_bold, bg_opacity, margin_v,
+                      font_size=font_size, outline_px=outline_px, shadow_px=shadow_px, alignment=alignment, margin_l=margin_l, margin_r=margin_r)
 
-def gemini_altyazi_olustur(ses_dosya_yolu):
-    """Gemini API'sini kullanarak sesten altyazı verisi oluşturur."""
-    global aktif_api_key_index
-    if not API_KEYS:
-        raise Exception("GEMINI_API_KEYS çevre değişkeni ayarlanmadı. Lütfen Render/Vercel/yerel ortamınızda GEMINI_API_KEYS=key1,key2 şeklinde tanımlayın.")
-    while aktif_api_key_index < len(API_KEYS):
-        api_key = API_KEYS[aktif_api_key_index]
-        try:
-            genai.configure(api_key=api_key)
+    command = ['ffmpeg', '-i', video_yolu]
+    # Boş SRT ffmpeg tarafından okunamaz; altyazı yoksa iz eklenmez
+    if altyazilar_data:
+        command += ['-i', yan_dosyalar['srt']]
+    command += ['-map', '0:v:0', '-map', '0:a?']
+    if altyazilar_data:
+        command += ['-map', '1:0']
+    if not (width and height) or _zaten_uygun_mu(video_yolu, width, height, fps):
+        command += ['-c', 'copy']
+    else:
+        command += ['-vf', _scale_pad_filter(width, height)]
+        if fps:
+            command += ['-r', str(int(fps))]
+        command += [
+            '-c:v', 'libx264',
+            '-preset', 'ultrafast',
+            '-crf', str(int(crf)),
+            '-pix_fmt', 'yuv420p',
+            '-c:a', 'copy'
+        ]
+    if altyazilar_data:
+        command += ['-c:s', 'mov_text', '-disposition:s:0', 'default']
+    command += ['-movflags', '+faststart', '-y', altyazili_video_yolu]
+    run_ffmpeg_command(command, on_progress=on_progress)
+    return altyazili_video_yolu, yan_dosyalar
 
-            # Güvenlik ayarlarını daha esnek hale getir
-            safety_settings = [
-                {"category": "HARM_CATEGORY_HARASSMENT", "threshold": "BLOCK_NONE"},
-                {"category": "HARM_CATEGORY_HATE_SPEECH", "threshold": "BLOCK_NONE"},
-                {"category": "HARM_CATEGORY_SEXUALLY_EXPLICIT", "threshold": "BLOCK_NONE"},
-                {"category": "HARM_CATEGORY_DANGEROUS_CONTENT", "threshold": "BLOCK_NONE"},
-            ]
 
-            model = genai.GenerativeModel(
-                'gemini-2.5-flash', # Model ismi kullanıcının isteğine göre güncellendi.
-                safety_settings=safety_settings
+# --- Artımlı yeniden işleme ---
+# Taban video anahtar karelerde kesilmiş parçalar halinde saklanır. Her parçanın altyazılı
+# hali, o parçaya değen altyazıların ve stilin özetiyle birlikte tutulur; yeniden işlemede
+# yalnızca özeti değişen parçalar kodlanır, diğerleri olduğu gibi birleştirilir.
+REPROCESS_INCREMENTAL = os.environ.get('REPROCESS_INCREMENTAL', '1').lower() not in ('0', 'false', 'no')
+SEGMENT_TARGET_SEC = float(os.environ.get('REPROCESS_SEGMENT_SEC', 10))
+SEGMENT_CACHE_DIR = os.environ.get('SEGMENT_CACHE_DIR', os.path.join('cache', 'segments'))
+_SEGMENT_MANIFEST_VERSION = 1
+
+_segment_kilitleri = {}
+_segment_kilitleri_lock = threading.Lock()
+
+
+def _segment_kilidi(klasor: str) -> threading.Lock:
+    # Aynı taban için eşzamanlı iki yeniden işleme parça dosyalarını birbirinin elinden silmesin
+    with _segment_kilitleri_lock:
+        return _segment_kilitleri.setdefault(os.path.abspath(klasor), threading.Lock())
+
+
+def _segment_klasoru(taban_yolu: str) -> str:
+    ad = hashlib.sha256(os.path.abspath(taban_yolu).encode('utf-8')).hexdigest()[:24]
+    return os.path.join(SEGMENT_CACHE_DIR, ad)
+
+
+def _manifest_oku(klasor: str) -> dict | None:
+    try:
+        with open(os.path.join(klasor, 'manifest.json'), 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return data if data.get('version') == _SEGMENT_MANIFEST_VERSION else None
+    except (OSError, ValueError):
+        return None
+
+
+def _manifest_yaz(klasor: str, manifest: dict) -> None:
+    yol = os.path.join(klasor, 'manifest.json')
+    tmp = f"{yol}.{os.getpid()}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False)
+    os.replace(tmp, yol)
+
+
+def taban_parcalarini_hazirla(taban_yolu: str) -> tuple:
+    """Taban videoyu (yeniden kodlamadan) anahtar karelerde parçalara ayırır.
+
+    Parçalar taban değişmediği sürece yeniden kullanılır.
+    Dönüş: (klasör, manifest). manifest['segments'] = [{'file', 'start', 'end'}]
+    """
+    klasor = _segment_klasoru(taban_yolu)
+    st = os.stat(taban_yolu)
+    stamp = [st.st_size, st.st_mtime_ns]
+    manifest = _manifest_oku(klasor)
+    if manifest and manifest.get('base_stamp') == stamp and manifest.get('segment_sec') == SEGMENT_TARGET_SEC:
+        if all(os.path.exists(os.path.join(klasor, s['file'])) for s in manifest['segments']):
+            return klasor, manifest
+
+    # Taban değişti (ya da ilk kez): eski parçaları ve altyazılı halleri at
+    if os.path.isdir(klasor):
+        shutil.rmtree(klasor, ignore_errors=True)
+    os.makedirs(klasor, exist_ok=True)
+    liste = os.path.join(klasor, 'segments.csv')
+    # segment muxer'ı yalnızca anahtar karelerde keser; -c copy olduğu için işlem disk hızında biter
+    run_ffmpeg_command([
+        'ffmpeg',
+        '-i', taban_yolu,
+        '-map', '0:v:0', '-map', '0:a?',
+        '-c', 'copy',
+        '-f', 'segment',
+        '-segment_time', str(SEGMENT_TARGET_SEC),
+        '-reset_timestamps', '1',
+        '-segment_list', liste,
+        '-segment_list_type', 'csv',
+        '-y', os.path.join(klasor, 'seg_%05d.mp4')
+    ])
+    parcalar = []
+    with open(liste, 'r', encoding='utf-8') as f:
+        for satir in f:
+            alanlar = satir.strip().split(',')
+            if len(alanlar) >= 3:
+                parcalar.append({'file': alanlar[0], 'start': float(alanlar[1]), 'end': float(alanlar[2])})
+    if not parcalar:
+        raise Exception("Taban video parçalara ayrılamadı.")
+    manifest = {
+        'version': _SEGMENT_MANIFEST_VERSION,
+        'base_stamp': stamp,
+        'segment_sec': SEGMENT_TARGET_SEC,
+        'segments': parcalar,
+        'burned': {},
+    }
+    _manifest_yaz(klasor, manifest)
+    return klasor, manifest
+
+
+def _parca_anahtari(parca: dict, altyazilar_data, stil: dict) -> str:
+    """Parçanın altyazılı halini belirleyen her şeyin özeti (parçaya değen altyazılar + stil).
+
+    Animasyonda altyazı ANIMATION_LEAD_SEC erken çizildiği için parçaya değip değmediğine
+    kaydırılmış başlangıçla bakılır; sınırın hemen ötesindeki altyazı da parçayı kirletir.
+    """
+    kayma = ANIMATION_LEAD_SEC if stil.get('has_animation') else 0.0
+    degenler = [
+        [round(float(a['start']), 3), round(float(a['end']), 3), a.get('speaker'), a.get('text')]
+        for a in altyazilar_data
+        if float(a['start']) - kayma < parca['end'] and float(a['end']) > parca['start']
+    ]
+    ham = json.dumps({'parca': [parca['start'], parca['end']], 'altyazilar': degenler, 'stil': stil}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(ham.encode('utf-8')).hexdigest()
+
+
+def artimli_altyazi_ekle(video_yolu, altyazilar_data, output_folder, color_map=None, font_path=None, has_background=False, has_animation=False, is_bold=False, bg_opacity=0.5, margin_v=450, font_size: int = 60, outline_px: int = 3, shadow_px: int = 2, alignment: int = 2, crf: int = 20, fps: int | None = None, margin_l: int = 80, margin_r: int = 80, width: int | None = None, height: int | None = None, on_progress=None, parallel: int = 1):
+    """altyazilari_videoya_ekle ile aynı çıktıyı, yalnızca değişen parçaları kodlayarak üretir.
+
+    Tüm parçalar tek bir .ass dosyasını kullanır: parçanın zaman damgaları önce asıl
+    konumuna kaydırılır, altyazı basılır, sonra yeniden sıfırlanır. Böylece parça sınırını
+    aşan altyazılar da doğru çizilir. Bir altyazı değişirse değdiği bütün parçalar yeniden kodlanır.
+    parallel > 1 ise değişen parçalar aynı anda kodlanır.
+    Dönüş: (altyazili_video_yolu, {'segments', 'reencoded', 'reused'})
+    """
+    dosya_adi = os.path.basename(video_yolu)
+    altyazili_video_yolu = os.path.join(output_folder, f"{os.path.splitext(dosya_adi)[0]}_altyazili.mp4")
+    klasor = _segment_klasoru(video_yolu)
+
+    aktif_font = _aktif_font_yolunu_bul(font_path)
+    stil = {
+        'color_map': color_map, 'has_background': has_background, 'has_animation': has_animation,
+        'is_bold': is_bold, 'bg_opacity': bg_opacity, 'margin_v': margin_v, 'font_size': font_size,
+        'outline_px': outline_px, 'shadow_px': shadow_px, 'alignment': alignment, 'margin_l': margin_l,
+        'margin_r': margin_r, 'crf': int(crf), 'fps': fps, 'width': width, 'height': height,
+        # Eski (piksel biçimi zorlanmamış) parçalar yeni parçalarla birleştirilmesin
+        'pix_fmt': 'yuv420p',
+        # Aynı adla üzerine yazılan font da parçaları geçersiz kılar
+        'font': font_registry.get_default_registry().content_hash(aktif_font) if aktif_font and os.path.exists(aktif_font) else None,
+    }
+
+    with _segment_kilidi(klasor):
+        klasor, manifest = taban_parcalarini_hazirla(video_yolu)
+        parcalar = manifest['segments']
+        yakilmis = manifest.setdefault('burned', {})
+        anahtarlar = [_parca_anahtari(p, altyazilar_data, stil) for p in parcalar]
+        kirli = [
+            i for i, p in enumerate(parcalar)
+            if yakilmis.get(str(i), {}).get('key') != anahtarlar[i]
+            or not os.path.exists(os.path.join(klasor, yakilmis[str(i)]['file']))
+        ]
+
+        if kirli:
+            # Font yukarıda zaten çözüldü; fonts/ yeniden taranmaz
+            vf_filter, temizlenecekler = _altyazi_filtresi_hazirla(
+                altyazilar_data, os.path.splitext(dosya_adi)[0], color_map, aktif_font, has_background, has_animation, is_bold, bg_opacity, margin_v,
+                font_size=font_size, outline_px=outline_px, shadow_px=shadow_px, alignment=alignment, margin_l=margin_l, margin_r=margin_r
             )
-            
-            print("Ses dosyası Gemini'ye yükleniyor...")
-            audio_file = genai.upload_file(path=ses_dosya_yolu)
-            
-            prompt = """
+            if width and height:
+                vf_filter = f"{_scale_pad_filter(width, height)},{vf_filter}"
+            ilerleme = _toplu_ilerleme(on_progress, [parcalar[i]['end'] - parcalar[i]['start'] for i in kirli])
+            manifest_kilidi = threading.Lock()
+
+            def parca_bas(sira_i):
+                sira, i = sira_i
+                p = parcalar[i]
+                cikti = f"burn_{i:05d}_{anahtarlar[i][:16]}.mp4"
+                command = [
+                    'ffmpeg',
+                    '-i', os.path.join(klasor, p['file']),
+                    '-vf', f"setpts=PTS+{p['start']:.6f}/TB,{vf_filter},setpts=PTS-STARTPTS",
+                ]
+                if fps:
+                    command += ['-r', str(int(fps))]
+                command += [
+                    '-c:v', 'libx264',
+                    '-preset', 'ultrafast',
+                    '-crf', str(int(crf)),
+                    # Parçalar concat ile yeniden kodlanmadan birleşir; hepsi aynı biçimde olmalı
+                    '-pix_fmt', 'yuv420p',
+                ]
+                if parallel > 1:
+                    command += ['-threads', '1']
+                command += [
+                    '-c:a', 'copy',
+                    '-y', os.path.join(klasor, cikti)
+                ]
+                run_ffmpeg_command(command, on_progress=ilerleme(sira), duration=p['end'] - p['start'])
+                with manifest_kilidi:
+                    yakilmis[str(i)] = {'key': anahtarlar[i], 'file': cikti}
+                    # Yarıda kalan bir işte bile biten parçalar sonraki denemede yeniden kullanılır
+                    _manifest_yaz(klasor, manifest)
+
+            try:
+                from concurrent.futures import ThreadPoolExecutor
+                with ThreadPoolExecutor(max_workers=max(1, min(int(parallel), len(kirli)))) as pool:
+                    list(pool.map(parca_bas, enumerate(kirli)))
+            finally:
+                _gecici_dosyalari_temizle(temizlenecekler)
+
+        # Concat demuxer ile birleştir: tüm parçalar aynı ayarlarla kodlandığı için yeniden kodlama gerekmez
+        liste = os.path.join(klasor, 'concat.txt')
+        with open(liste, 'w', encoding='utf-8') as f:
+            for i in range(len(parcalar)):
+                yol = os.path.abspath(os.path.join(klasor, yakilmis[str(i)]['file'])).replace('\\', '/')
+                f.write(f"file '{yol}'\n")
+        run_ffmpeg_command([
+            'ffmpeg',
+            '-f', 'concat', '-safe', '0',
+            '-i', liste,
+            '-c', 'copy',
+            '-movflags', '+faststart',
+            '-y', altyazili_video_yolu
+        ])
+
+        # Artık kullanılmayan eski altyazılı parçaları sil
+        kullanilan = {v['file'] for v in yakilmis.values()}
+        for ad in os.listdir(klasor):
+            if ad.startswith('burn_') and ad not in kullanilan:
+                try:
+                    os.remove(os.path.join(klasor, ad))
+                except OSError:
+                    pass
+
+    return altyazili_video_yolu, {'segments': len(parcalar), 'reencoded': len(kirli), 'reused': len(parcalar) - len(kirli)}
+
+
+# Tek geçişli işlemde _9x16.mp4 tabanının nasıl üretileceği:
+#   'copy'     -> orijinal akışlar yeniden kodlanmadan kopyalanır (en ucuz; /reprocess ölçeklemeyi kendisi uygular)
+#   'lossless' -> ölçeklenmiş görüntü aynı çözümden kayıpsız (qp 0) ikinci çıktı olarak yazılır
+#   'none'     -> taban üretilmez (/reprocess kullanılmayacaksa)
+BASE_MODES = ('copy', 'lossless', 'none')
+
+
+def videoyu_boyutlandir_ve_altyazi_ekle(video_yolu, altyazilar_data, output_folder, width: int = 1080, height: int = 1920, base_mode: str = 'copy', color_map=None, font_path=None, has_background=False, has_animation=False, is_bold=False, bg_opacity=0.5, margin_v=450, font_size: int = 60, outline_px: int = 3, shadow_px: int = 2, alignment: int = 2, crf: int = 20, fps: int | None = None, margin_l: int = 80, margin_r: int = 80, on_progress=None, parallel: int = 1, progressive: bool = False, subtitle_mode: str = 'burn'):
+    """9:16 ölçekleme ve altyazı basmayı tek filtre grafiğinde, tek kodlamayla yapar.
+
+    Çıktı adları iki geçişli akışla aynıdır (<ad>_9x16_altyazili.mp4 ve isteğe bağlı <ad>_9x16.mp4),
+    böylece /reprocess tabanı aynı yerde bulur.
+    parallel > 1 ve base_mode='copy' ise taban önce kopyalanır, altyazı tabana paralel aralıklarla basılır.
+    progressive=True ise altyazılı çıktı kodlanırken oynatılabilir fragmented MP4 olarak yazılır.
+    subtitle_mode='soft' ise altyazı basılmaz, ayrı iz olarak eklenir (bkz. yumusak_altyazi_ekle).
+    Dönüş: (altyazili_video_yolu, taban_video_yolu | None)
+    """
+    if base_mode not in BASE_MODES:
+        raise ValueError(f"Geçersiz base_mode: {base_mode}. Geçerli değerler: {', '.join(BASE_MODES)}")
+    if subtitle_mode not in SUBTITLE_MODES:
+        raise ValueError(f"Geçersiz subtitle_mode: {subtitle_mode}. Geçerli değerler: {', '.join(SUBTITLE_MODES)}")
+    kok = f"{os.path.splitext(os.path.basename(video_yolu))[0]}_9x16"
+    altyazili_video_yolu = os.path.join(output_folder, f"{kok}_altyazili.mp4")
+    taban_video_yolu = os.path.join(output_folder, f"{kok}.mp4") if base_mode != 'none' else None
+
+    if subtitle_mode == 'soft':
+        # Görüntü kodlanmadığı için kayıpsız taban gereksiz: taban her zaman kopyadır
+        if taban_video_yolu:
+            run_ffmpeg_command([
+                'ffmpeg',
+                '-i', video_yolu,
+                '-map', '0:v:0', '-map', '0:a?',
+                '-c', 'copy',
+                '-movflags', '+faststart',
+                '-y', taban_video_yolu
+            ])
+        altyazili_video_yolu, _ = yumusak_altyazi_ekle(
+            video_yolu, altyazilar_data, output_folder, color_map, font_path, has_background, has_animation, is_bold, bg_opacity, margin_v,
+            font_size=font_size, outline_px=outline_px, shadow_px=shadow_px, alignment=alignment, crf=crf, fps=fps,
+            margin_l=margin_l, margin_r=margin_r, width=width, height=height, on_progress=on_progress, kok=kok
+        )
+        return altyazili_video_yolu, taban_video_yolu
+    uygun = _zaten_uygun_mu(video_yolu, width, height, fps)
+    if uygun and base_mode == 'lossless':
+        # Girdi zaten hedef biçimde: kayıpsız yeniden kodlama yerine kopya aynı tabanı verir
+        base_mode = 'copy'
+
+    if parallel > 1 and base_mode == 'copy' and not progressive:
+        # Taban stream-copy olduğu için ayrı bir kopyalama ucuzdur; çıktı adı altyazilari_videoya_ekle ile aynı çıkar
+        run_ffmpeg_command([
+            'ffmpeg',
+            '-i', video_yolu,
+            '-map', '0:v:0', '-map', '0:a?',
+            '-c', 'copy',
+            '-movflags', '+faststart',
+            '-y', taban_video_yolu
+        ])
+        altyazili_video_yolu = altyazilari_videoya_ekle(
+            taban_video_yolu, altyazilar_data, output_folder, color_map, font_path, has_background, has_animation, is_bold, bg_opacity, margin_v,
+            font_size=font_size, outline_px=outline_px, shadow_px=shadow_px, alignment=alignment, crf=crf, fps=fps,
+            margin_l=margin_l, margin_r=margin_r, width=width, height=height, on_progress=on_progress, parallel=parallel
+        )
+        return altyazili_video_yolu, taban_video_yolu
+
+    subtitles_filter, temizlenecekler = _altyazi_filtresi_hazirla(
+        altyazilar_data, kok, color_map, font_path, has_background, has_animation, is_bold, bg_opacity, margin_v,
+        font_size=font_size, outline_px=outline_px, shadow_px=shadow_px, alignment=alignment, margin_l=margin_l, margin_r=margin_r
+    )
+    rate = ['-r', str(int(fps))] if fps else []
+
+    if base_mode == 'lossless':
+        # Tek çözme + tek ölçekleme; görüntü ikiye ayrılıp biri altyazıya, biri kayıpsız tabana gider
+        filter_graph = f"[0:v]{_scale_pad_filter(width, height)},split=2[vsub][vbase];[vsub]{subtitles_filter}[vout]"
+    elif uygun:
+        # Ölçekleme gereksiz; yalnızca altyazı basılır
+        filter_graph = f"[0:v]{subtitles_filter}[vout]"
+    else:
+        filter_graph = f"[0:v]{_scale_pad_filter(width, height)},{subtitles_filter}[vout]"
+
+    command = [
+        'ffmpeg',
+        '-i', video_yolu,
+        '-filter_complex', filter_graph,
+        '-map', '[vout]', '-map', '0:a?'
+    ]
+    command += rate + [
+        '-c:v', 'libx264',
+        '-preset', 'ultrafast',
+        '-crf', str(int(crf)),
+        '-pix_fmt', 'yuv420p'
+    ] + _cikti_bayraklari(progressive) + [
+        '-c:a', 'copy',
+        '-y',
+        altyazili_video_yolu
+    ]
+    if base_mode == 'lossless':
+        command += ['-map', '[vbase]', '-map', '0:a?'] + rate + [
+            '-c:v', 'libx264',
+            '-preset', 'ultrafast',
+            '-qp', '0',
+            '-c:a', 'copy',
+            '-y',
+            taban_video_yolu
+        ]
+    elif base_mode == 'copy':
+        # Aynı süreçte ikinci çıktı: akışlar yeniden kodlanmadan kopyalanır
+        command += ['-map', '0:v:0', '-map', '0:a?', '-c', 'copy', '-y', taban_video_yolu]
+    try:
+        with _yaziliyor(altyazili_video_yolu, progressive):
+            run_ffmpeg_command(command, on_progress=on_progress)
+    finally:
+        _gecici_dosyalari_temizle(temizlenecekler)
+
+    return altyazili_video_yolu, taban_video_yolu
+
+
+def _split_long_sentences(entries: list, max_chars_per_entry: int = 90) -> list:
+    """Uzun metinleri cümle sonlarından, gerekirse kelime sınırlarından parçalara böler.
+
+    Zaman karakter sayısıyla orantılı paylaştırılır; bkz. cue_timing.split_long_sentences.
+    """
+    return cue_timing.split_long_sentences(entries, max_chars_per_entry)
+
+
+# Transkripsiyon modeli ve prompt sürümü; prompt değiştirildiğinde PROMPT_VERSION artırılmalı
+# (önbellek anahtarının parçasıdır, eski sonuçlar böylece geçersiz olur)
+GEMINI_MODEL = 'gemini-2.5-flash'
+PROMPT_VERSION = 1
+TRANSCRIBE_PROMPT = """
             SENARYO: Sen, bir video için altyazı oluşturan profesyonel bir çevirmensin. Görevin, bir ses dosyasındaki konuşmaları analiz edip, bunları konuşmacılarına göre ayırarak akıcı ve doğal bir Türkçe ile altyazıya dönüştürmektir.
 
             ADIMLAR:
@@ -487,9 +1205,121 @@ def gemini_altyazi_olustur(ses_dosya_yolu):
               }
             ]
             """
+
+def gemini_altyazi_olustur(ses_dosya_yolu, use_cache: bool = True, olcum: dict | None = None):
+    """Gemini API'sini kullanarak sesten altyazı verisi oluşturur.
+
+    use_cache açıksa sonuç, ses içeriği + model + prompt sürümüne göre diskte önbelleklenir.
+    olcum sözlüğü verilirse doldurulur: 'cached', 'transcribe_sec' (Gemini'de geçen süre,
+    yükleme dahil) ve tek istekte yüklenen seste 'upload_sec'.
+    """
+    olcum = olcum if olcum is not None else {}
+    olcum['cached'] = False
+    if use_cache:
+        cache = transcript_cache.get_default_cache()
+        key = cache.make_key(transcript_cache.file_sha256(ses_dosya_yolu), GEMINI_MODEL, PROMPT_VERSION)
+        cached = cache.get(key)
+        if cached is not None:
+            print("Transkripsiyon önbellekten alındı:", key)
+            olcum['cached'] = True
+            return cached
+    basla = time.monotonic()
+    data = _gemini_altyazi_olustur(ses_dosya_yolu, olcum)
+    olcum['transcribe_sec'] = round(time.monotonic() - basla, 2)
+    if use_cache:
+        cache.put(key, data)
+    return data
+
+
+def transkripsiyon_olcumleri(audio: dict, olcum: dict | None = None) -> dict:
+    """Görev durumunda raporlanan ses ölçümleri ve kazanılan süre tahminleri.
+
+    Ölçülen süreler ayıklanan ses üzerinden orantılanır: yükleme süresi bayta, Gemini süresi
+    ses süresine göre. upload_sec_saved_est, mp3_hq tabanına göre yüklenmeyen baytların
+    ölçülen hızla yükleme süresidir; transcribe_sec_saved_est, kırpılan sessizliğin ölçülen
+    saniye başı işleme süresiyle karşılığıdır. Önbellekten gelen sonuçta tahmin yapılmaz.
+    """
+    stats = {k: v for k, v in audio.items() if k not in ('path', 'time_map')}
+    if not olcum:
+        return stats
+    stats['cached'] = olcum.get('cached', False)
+    if stats['cached']:
+        return stats
+    yuklenen = stats.get('upload_bytes') or 0
+    if olcum.get('upload_sec') is not None:
+        stats['upload_sec'] = olcum['upload_sec']
+        if yuklenen:
+            fazla = max(0, stats.get('baseline_bytes_est', 0) - yuklenen)
+            stats['upload_sec_saved_est'] = round(olcum['upload_sec'] * fazla / yuklenen, 2)
+    if olcum.get('transcribe_sec') is not None:
+        stats['transcribe_sec'] = olcum['transcribe_sec']
+        korunan = (stats.get('duration_sec') or 0) - (stats.get('stripped_sec') or 0)
+        if korunan > 0:
+            stats['transcribe_sec_saved_est'] = round(olcum['transcribe_sec'] * stats['stripped_sec'] / korunan, 2)
+    return stats
+
+def _gemini_json_ayikla(response_text: str, ham_yanit: str = '') -> list:
+    """Model yanıtındaki ```json bloğunu ayıklayıp altyazı listesine çevirir."""
+    json_response_text = response_text.strip().lstrip("```json").rstrip("```")
+
+    if not json_response_text:
+        # Eğer hiç konuşma yoksa model boş bir dizi döndürmeli, bu bir hata değil.
+        if "[]" in response_text:
+            return []
+        raise ValueError("Gemini'den gelen yanıt metni boş. Ham yanıt: " + (ham_yanit or response_text))
+
+    print("Ayıklanmış JSON Metni:", json_response_text)
+    return json.loads(json_response_text)
+
+
+def _gemini_altyazi_olustur(ses_dosya_yolu, olcum: dict | None = None):
+    """Uzun sesleri parçalara bölüp paralel, kısa sesleri tek istekte yazıya döker."""
+    if API_KEYS and CHUNK_MAX_SEC > 0:
+        try:
+            sure = medya_suresi(ses_dosya_yolu)
+        except Exception as e:
+            print("Ses süresi okunamadı, parçalama atlanıyor:", e)
+            sure = 0.0
+        if sure > CHUNK_MAX_SEC:
+            return _gemini_parcali_altyazi_olustur(ses_dosya_yolu, sure)
+    return _gemini_tek_seferde(ses_dosya_yolu, olcum)
+
+
+def _gemini_tek_seferde(ses_dosya_yolu, olcum: dict | None = None):
+    """Tüm sesi tek istekte gönderir; hata olursa sıradaki API anahtarına geçer.
+
+    olcum verilirse dosya yükleme süresi 'upload_sec' olarak yazılır.
+    """
+    global aktif_api_key_index
+    if not API_KEYS:
+        raise Exception("GEMINI_API_KEYS çevre değişkeni ayarlanmadı. Lütfen Render/Vercel/yerel ortamınızda GEMINI_API_KEYS=key1,key2 şeklinde tanımlayın.")
+    genai = _genai_sdk()
+    while aktif_api_key_index < len(API_KEYS):
+        api_key = API_KEYS[aktif_api_key_index]
+        try:
+            genai.configure(api_key=api_key)
+
+            # Güvenlik ayarlarını daha esnek hale getir
+            safety_settings = [
+                {"category": "HARM_CATEGORY_HARASSMENT", "threshold": "BLOCK_NONE"},
+                {"category": "HARM_CATEGORY_HATE_SPEECH", "threshold": "BLOCK_NONE"},
+                {"category": "HARM_CATEGORY_SEXUALLY_EXPLICIT", "threshold": "BLOCK_NONE"},
+                {"category": "HARM_CATEGORY_DANGEROUS_CONTENT", "threshold": "BLOCK_NONE"},
+            ]
+
+            model = genai.GenerativeModel(
+                GEMINI_MODEL, # Model ismi kullanıcının isteğine göre güncellendi.
+                safety_settings=safety_settings
+            )
+            
+            print("Ses dosyası Gemini'ye yükleniyor...")
+            yukleme_basla = time.monotonic()
+            audio_file = genai.upload_file(path=ses_dosya_yolu)
+            if olcum is not None:
+                olcum['upload_sec'] = round(time.monotonic() - yukleme_basla, 2)
             
             print("Gemini'den yanıt bekleniyor...")
-            response = model.generate_content([prompt, audio_file])
+            response = model.generate_content([TRANSCRIBE_PROMPT, audio_file])
             
             # Debug için yanıtı ve olası engelleme sebebini yazdır
             print("--- Gemini Ham Yanıtı ---")
@@ -500,16 +1330,7 @@ def gemini_altyazi_olustur(ses_dosya_yolu):
                 feedback = response.prompt_feedback
                 raise ValueError(f"Gemini'den boş yanıt alındı. Engellenme sebebi: {feedback.block_reason.name if feedback.block_reason else 'Bilinmiyor'}")
 
-            json_response_text = response.text.strip().lstrip("```json").rstrip("```")
-            
-            if not json_response_text:
-                 # Eğer hiç konuşma yoksa model boş bir dizi döndürmeli, bu bir hata değil.
-                if "[]" in response.text:
-                    return []
-                raise ValueError("Gemini'den gelen yanıt metni boş. Ham yanıt: " + str(response))
-
-            print("Ayıklanmış JSON Metni:", json_response_text)
-            data = json.loads(json_response_text)
+            data = _gemini_json_ayikla(response.text, str(response))
             # Uzun cümleleri 2-3 parçaya böl
             data = _split_long_sentences(data, max_chars_per_entry=90)
             return data
@@ -520,3 +1341,398 @@ def gemini_altyazi_olustur(ses_dosya_yolu):
             if aktif_api_key_index >= len(API_KEYS):
                  raise Exception(f"Tüm API anahtarları denendi ve başarısız oldu. Son hata: {e}")
     raise Exception("Tüm API anahtarları denendi ve başarısız oldu.")
+
+
+
+# --- Parçalı (chunked) transkripsiyon ---
+# Bu süreden uzun sesler sessizlik noktalarından bölünür (0 = kapalı)
+CHUNK_TARGET_SEC = float(os.environ.get('TRANSCRIBE_CHUNK_SEC', 240))
+CHUNK_MAX_SEC = float(os.environ.get('TRANSCRIBE_CHUNK_MAX_SEC', 300))
+CHUNK_TIMEOUT_SEC = 300
+GEMINI_REST_URL = 'https://generativelanguage.googleapis.com/v1beta/models/{model}:generateContent'
+_AUDIO_MIME = {'.mp3': 'audio/mp3', '.ogg': 'audio/ogg', '.opus': 'audio/ogg', '.wav': 'audio/wav', '.m4a': 'audio/aac', '.aac': 'audio/aac', '.flac': 'audio/flac'}
+
+
+def medya_suresi(dosya_yolu) -> float:
+    """ffprobe ile medya süresini saniye cinsinden döndürür."""
+    result = subprocess.run(
+        ['ffprobe', '-v', 'error', '-show_entries', 'format=duration', '-of', 'default=noprint_wrappers=1:nokey=1', dosya_yolu],
+        check=True, capture_output=True, text=True
+    )
+    return float(result.stdout.strip() or 0)
+
+
+def _sessizlikleri_bul(ses_dosya_yolu, noise_db: int = -35, min_sessizlik_sn: float = 0.4) -> list:
+    """ffmpeg silencedetect ile sessiz aralıkları [(başlangıç, bitiş), ...] olarak döndürür."""
+    command = [
+        'ffmpeg', '-hide_banner', '-nostats',
+        '-i', ses_dosya_yolu,
+        '-af', f'silencedetect=noise={noise_db}dB:d={min_sessizlik_sn}',
+        '-f', 'null', '-'
+    ]
+    satirlar = []
+    # Uzun seslerde sessizlik satırları halka tampondan taşabilir; hepsini ayrıca topla
+    run_ffmpeg_command(command, stderr_callback=lambda line: satirlar.append(line) if 'silence_' in line else None)
+    aralik = []
+    baslangic = None
+    for line in satirlar:
+        if 'silence_start:' in line:
+            try:
+                baslangic = float(line.split('silence_start:')[1].split()[0])
+            except (IndexError, ValueError):
+                baslangic = None
+        elif 'silence_end:' in line and baslangic is not None:
+            try:
+                bitis = float(line.split('silence_end:')[1].split()[0])
+                aralik.append((baslangic, bitis))
+            except (IndexError, ValueError):
+                pass
+            baslangic = None
+    return aralik
+
+
+def _parca_sinirlarini_hesapla(sure: float, sessizlikler: list, hedef_sn: float = CHUNK_TARGET_SEC, max_sn: float = CHUNK_MAX_SEC) -> list:
+    """Sesi en fazla max_sn uzunluğunda parçalara ayıracak kesim noktalarını seçer.
+
+    Her kesim, hedef_sn'ye en yakın sessizliğin ortasına konur; uygun sessizlik yoksa max_sn'de
+    sert kesim yapılır. Dönüş: [(başlangıç, bitiş), ...]
+    """
+    ortalar = [(a + b) / 2.0 for a, b in sessizlikler]
+    parcalar = []
+    bas = 0.0
+    while sure - bas > max_sn:
+        adaylar = [m for m in ortalar if bas + hedef_sn * 0.5 <= m <= bas + max_sn]
+        kesim = min(adaylar, key=lambda m: abs(m - (bas + hedef_sn))) if adaylar else bas + max_sn
+        parcalar.append((bas, kesim))
+        bas = kesim
+    parcalar.append((bas, sure))
+    return parcalar
+
+
+def _ses_parcalarini_yaz(ses_dosya_yolu, parcalar: list, output_folder) -> list:
+    """Her parçayı yeniden kodlamadan ayrı dosyaya keser."""
+    kok, uzanti = os.path.splitext(os.path.basename(ses_dosya_yolu))
+    yollar = []
+    for i, (bas, bit) in enumerate(parcalar):
+        yol = os.path.join(output_folder, f"{kok}_parca{i:03d}{uzanti}")
+        run_ffmpeg_command([
+            'ffmpeg', '-ss', f'{bas:.3f}', '-i', ses_dosya_yolu,
+            '-t', f'{bit - bas:.3f}', '-c', 'copy', '-y', yol
+        ])
+        yollar.append(yol)
+    return yollar
+
+
+def _gemini_rest_istegi(ses_dosya_yolu, api_key: str) -> list:
+    """Tek bir ses parçasını verilen anahtarla REST üzerinden (satır içi veri) yazıya döker.
+
+    SDK'daki genai.configure süreç geneli olduğundan, farklı anahtarlarla eşzamanlı istekler
+    için doğrudan REST kullanılır.
+    """
+    import base64
+    import requests
+
+    with open(ses_dosya_yolu, 'rb') as f:
+        audio_b64 = base64.b64encode(f.read()).decode('ascii')
+    mime = _AUDIO_MIME.get(os.path.splitext(ses_dosya_yolu)[1].lower(), 'audio/mp3')
+    payload = {
+        'contents': [{'parts': [
+            {'text': TRANSCRIBE_PROMPT},
+            {'inline_data': {'mime_type': mime, 'data': audio_b64}},
+        ]}],
+        'safetySettings': [
+            {'category': c, 'threshold': 'BLOCK_NONE'}
+            for c in ('HARM_CATEGORY_HARASSMENT', 'HARM_CATEGORY_HATE_SPEECH', 'HARM_CATEGORY_SEXUALLY_EXPLICIT', 'HARM_CATEGORY_DANGEROUS_CONTENT')
+        ],
+    }
+    resp = requests.post(GEMINI_REST_URL.format(model=GEMINI_MODEL), params={'key': api_key}, json=payload, timeout=CHUNK_TIMEOUT_SEC)
+    if resp.status_code != 200:
+        raise ValueError(f"Gemini HTTP {resp.status_code}: {resp.text[:500]}")
+    body = resp.json()
+    candidates = body.get('candidates') or []
+    parts = (candidates[0].get('content') or {}).get('parts') if candidates else None
+    if not parts:
+        block = (body.get('promptFeedback') or {}).get('blockReason', 'Bilinmiyor')
+        raise ValueError(f"Gemini'den boş yanıt alındı. Engellenme sebebi: {block}")
+    text = ''.join(p.get('text', '') for p in parts)
+    return _gemini_json_ayikla(text)
+
+
+def _parcayi_yaziya_dok(ses_dosya_yolu, ilk_anahtar_index: int) -> list:
+    """Parçayı atanan anahtarla dener; başarısız olursa yalnızca bu parçayı diğer anahtarlarla tekrarlar."""
+    son_hata = None
+    for deneme in range(len(API_KEYS)):
+        index = (ilk_anahtar_index + deneme) % len(API_KEYS)
+        try:
+            return _gemini_rest_istegi(ses_dosya_yolu, API_KEYS[index])
+        except Exception as e:
+            print(f"Parça {os.path.basename(ses_dosya_yolu)} API anahtarı (index {index}) ile hata: {e}")
+            son_hata = e
+    raise Exception(f"Parça tüm API anahtarlarıyla başarısız oldu: {os.path.basename(ses_dosya_yolu)}. Son hata: {son_hata}")
+
+
+def _konusmacilari_uzlastir(parca_sonuclari: list) -> list:
+    """Parçalar bağımsız etiketlendiği için konuşmacı etiketlerini parçalar arasında eşler.
+
+    Sezgisel yöntem: her parçadaki konuşmacılar konuşma süresine göre sıralanır ve o ana kadarki
+    genel sıralamadaki konuşmacılarla eşlenir (en çok konuşan -> en çok konuşan). Yeni
+    konuşmacılar yeni genel etiket alır. İlk parçanın etiketleri aynen korunur.
+    """
+    genel_sure = {}
+    sonuc = []
+    for i, cues in enumerate(parca_sonuclari):
+        yerel_sure = {}
+        for c in cues:
+            sp = c.get('speaker', 'Konuşmacı 1')
+            yerel_sure[sp] = yerel_sure.get(sp, 0.0) + max(0.0, float(c.get('end', 0)) - float(c.get('start', 0)))
+        if i == 0 or not genel_sure:
+            esleme = {sp: sp for sp in yerel_sure}
+        else:
+            genel_sira = sorted(genel_sure, key=lambda sp: -genel_sure[sp])
+            yerel_sira = sorted(yerel_sure, key=lambda sp: -yerel_sure[sp])
+            esleme = {}
+            for k, sp in enumerate(yerel_sira):
+                if k < len(genel_sira):
+                    esleme[sp] = genel_sira[k]
+                else:
+                    esleme[sp] = f"Konuşmacı {len(genel_sure) + 1 + (k - len(genel_sira))}"
+        for c in cues:
+            c = dict(c)
+            c['speaker'] = esleme.get(c.get('speaker', 'Konuşmacı 1'), c.get('speaker', 'Konuşmacı 1'))
+            sonuc.append(c)
+        for sp, t in yerel_sure.items():
+            hedef = esleme.get(sp, sp)
+            genel_sure[hedef] = genel_sure.get(hedef, 0.0) + t
+    return sonuc
+
+
+def _gemini_parcali_altyazi_olustur(ses_dosya_yolu, sure: float) -> list:
+    """Uzun sesi sessizliklerden bölüp parçaları API anahtarları arasında paralel yazıya döker."""
+    from concurrent.futures import ThreadPoolExecutor
+
+    sessizlikler = _sessizlikleri_bul(ses_dosya_yolu)
+    parcalar = _parca_sinirlarini_hesapla(sure, sessizlikler)
+    print(f"Ses {len(parcalar)} parçaya bölündü ({len(API_KEYS)} API anahtarı ile paralel işlenecek).")
+    parca_yollari = _ses_parcalarini_yaz(ses_dosya_yolu, parcalar, os.path.dirname(ses_dosya_yolu) or '.')
+    try:
+        with ThreadPoolExecutor(max_workers=min(len(API_KEYS), len(parca_yollari))) as pool:
+            futures = [pool.submit(_parcayi_yaziya_dok, yol, i % len(API_KEYS)) for i, yol in enumerate(parca_yollari)]
+            ham_sonuclar = [f.result() for f in futures]
+    finally:
+        for yol in parca_yollari:
+            if os.path.exists(yol):
+                os.remove(yol)
+
+    # Zamanları parça başlangıcına göre kaydır ve parça sınırına kırp
+    kaydirilmis = []
+    for (bas, bit), cues in zip(parcalar, ham_sonuclar):
+        parca_suresi = bit - bas
+        out = []
+        for c in cues or []:
+            try:
+                s0 = min(max(0.0, float(c.get('start', 0))), parca_suresi)
+                e0 = min(max(s0, float(c.get('end', s0))), parca_suresi)
+            except (TypeError, ValueError):
+                continue
+            out.append({**c, 'start': round(bas + s0, 3), 'end': round(bas + e0, 3)})
+        kaydirilmis.append(out)
+
+    data = _konusmacilari_uzlastir(kaydirilmis)
+    data.sort(key=lambda c: (c['start'], c['end']))
+    return _split_long_sentences(data, max_chars_per_entry=90)
+
+
+
+# --- Transkripsiyon sesinden sessizlik kırpma ---
+
+def sessizlikleri_kirp(ses_dosya_yolu, output_folder, min_sessizlik_sn: float = STRIP_MIN_SILENCE_SEC, pad_sn: float = STRIP_KEEP_PAD_SEC):
+    """Uzun sessizlikleri sesten çıkarır ve zaman haritasını döndürür.
+
+    Her sessizliğin iki ucunda pad_sn kadar pay bırakılır. Harita, korunan bölümlerin
+    [(orijinal_baslangic, orijinal_bitis, yeni_baslangic), ...] listesidir.
+    Kırpılacak kayda değer sessizlik yoksa (orijinal yol, None) döner.
+    """
+    sure = medya_suresi(ses_dosya_yolu)
+    bosluklar = [
+        (a + pad_sn, b - pad_sn)
+        for a, b in _sessizlikleri_bul(ses_dosya_yolu, min_sessizlik_sn=min_sessizlik_sn)
+        if b - a > 2 * pad_sn
+    ]
+    if len(bosluklar) > STRIP_MAX_GAPS:
+        bosluklar = sorted(sorted(bosluklar, key=lambda g: g[0] - g[1])[:STRIP_MAX_GAPS])
+    if sum(b - a for a, b in bosluklar) < 1.0:
+        return ses_dosya_yolu, None
+
+    harita = []
+    bas = 0.0
+    yeni = 0.0
+    for a, b in bosluklar:
+        if a > bas:
+            harita.append((bas, a, yeni))
+            yeni += a - bas
+        bas = max(bas, b)
+    if sure > bas:
+        harita.append((bas, sure, yeni))
+
+    secim = '+'.join(f"between(t\\,{a:.3f}\\,{b:.3f})" for a, b, _ in harita)
+    kok, uzanti = os.path.splitext(os.path.basename(ses_dosya_yolu))
+    cikti = os.path.join(output_folder, f"{kok}_kirpik{uzanti}")
+    # Kodlayıcı ayarları kaynak dosyanın profiliyle aynı olsun
+    profil_args = next((p['args'] for p in TRANSCRIBE_AUDIO_PROFILES.values() if p['ext'] == uzanti.lower()), [])
+    run_ffmpeg_command([
+        'ffmpeg', '-i', ses_dosya_yolu,
+        '-af', f"aselect={secim},asetpts=N/SR/TB",
+    ] + profil_args + _BITEXACT_ARGS + ['-y', cikti])
+    return cikti, harita
+
+
+def zaman_haritasiyla_esle(subs: list, harita) -> list:
+    """Kırpılmış ses zaman çizelgesindeki altyazı zamanlarını orijinal zamanlara çevirir."""
+    if not harita:
+        return subs
+    import bisect
+    yeni_baslar = [h[2] for h in harita]
+
+    def esle(t: float) -> float:
+        i = max(0, bisect.bisect_right(yeni_baslar, t) - 1)
+        o_bas, o_bit, y_bas = harita[i]
+        return min(o_bit, o_bas + max(0.0, t - y_bas))
+
+    out = []
+    for s in subs:
+        s = dict(s)
+        s['start'] = round(esle(float(s.get('start', 0))), 3)
+        s['end'] = round(max(s['start'], esle(float(s.get('end', 0)))), 3)
+        out.append(s)
+    return out
+
+
+def transkripsiyon_sesi_hazirla(video_yolu, output_folder, profile: str | None = None, strip_silence: bool | None = None, on_progress=None) -> dict:
+    """Transkripsiyona gidecek sesi hazırlar ve iş başına ölçümleri döndürür.
+
+    Dönüş: {'path', 'time_map', 'profile', 'upload_bytes', 'baseline_bytes_est',
+            'duration_sec', 'stripped_sec'}
+    """
+    profile = profile or TRANSCRIBE_AUDIO_PROFILE
+    strip_silence = TRANSCRIBE_STRIP_SILENCE if strip_silence is None else strip_silence
+    ses_yolu = sesi_ayikla(video_yolu, output_folder, profile=profile, on_progress=on_progress)
+    try:
+        sure = medya_suresi(ses_yolu)
+    except Exception:
+        sure = 0.0
+    harita = None
+    yuklenecek = ses_yolu
+    if strip_silence:
+        try:
+            yuklenecek, harita = sessizlikleri_kirp(ses_yolu, output_folder)
+        except Exception as e:
+            print("Sessizlik kırpma başarısız, tam ses kullanılacak:", e)
+            yuklenecek, harita = ses_yolu, None
+        if yuklenecek != ses_yolu and os.path.exists(ses_yolu):
+            os.remove(ses_yolu)
+    korunan = sum(b - a for a, b, _ in harita) if harita else sure
+    bilgi = {
+        'path': yuklenecek,
+        'time_map': harita,
+        'profile': profile,
+        'upload_bytes': os.path.getsize(yuklenecek),
+        'baseline_bytes_est': int(sure * _MP3_HQ_BITRATE / 8),
+        'duration_sec': round(sure, 2),
+        'stripped_sec': round(max(0.0, sure - korunan), 2),
+    }
+    print(f"Transkripsiyon sesi: {bilgi['upload_bytes']} bayt ({profile}), kırpılan {bilgi['stripped_sec']} sn")
+    return bilgi
+
+
+# --- Hızlı stil önizlemesi ---
+# Önizleme karelerinin/klibinin tam çözünürlüğe oranı
+PREVIEW_SCALE = 0.5
+
+
+def _onizleme_zinciri(subtitles_filter, width=None, height=None, scale: float = PREVIEW_SCALE) -> str:
+    """Tam render ile aynı zincir (ölçekleme + altyazı) ve ardından küçültme."""
+    zincir = subtitles_filter
+    if width and height:
+        zincir = f"{_scale_pad_filter(width, height)},{zincir}"
+    if scale and scale != 1:
+        zincir += f",scale=trunc(iw*{float(scale)}/2)*2:-2"
+    return zincir
+
+
+def onizleme_zamanlari_sec(altyazilar_data, adet: int = 4) -> list:
+    """Altyazılar arasından eşit aralıklı 'adet' tanesinin orta noktalarını seçer."""
+    if not altyazilar_data:
+        return [0.0]
+    adet = max(1, min(int(adet), len(altyazilar_data)))
+    if adet == 1:
+        secilen = [altyazilar_data[len(altyazilar_data) // 2]]
+    else:
+        son = len(altyazilar_data) - 1
+        secilen = [altyazilar_data[round(i * son / (adet - 1))] for i in range(adet)]
+    return [round((float(a['start']) + float(a['end'])) / 2.0, 3) for a in secilen]
+
+
+def onizleme_kareleri_olustur(video_yolu, altyazilar_data, output_folder, zamanlar: list, width: int | None = None, height: int | None = None, scale: float = PREVIEW_SCALE, **stil) -> list:
+    """Verilen zamanlarda altyazılı JPEG kareler üretir (tam kodlama yapılmaz).
+
+    Aynı ASS üretimi kullanılır. Her kare için girdi hızlıca aranır (-ss girdiden önce) ve
+    -copyts ile zaman damgaları korunur; böylece subtitles filtresi doğru satırı çizer.
+    Kareler ayrı ffmpeg süreçlerinde paralel üretilir.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    kok = os.path.splitext(os.path.basename(video_yolu))[0]
+    subtitles_filter, temizlenecekler = _altyazi_filtresi_hazirla(altyazilar_data, f"{kok}_onizleme", **stil)
+    zincir = _onizleme_zinciri(subtitles_filter, width, height, scale)
+    os.makedirs(output_folder, exist_ok=True)
+
+    def kare(i_t):
+        i, t = i_t
+        cikti = os.path.join(output_folder, f"kare_{i:02d}.jpg")
+        run_ffmpeg_command([
+            'ffmpeg',
+            '-ss', f'{max(0.0, float(t)):.3f}', '-copyts',
+            '-i', video_yolu,
+            '-vf', zincir,
+            '-frames:v', '1',
+            '-q:v', '3',
+            '-an',
+            '-y', cikti
+        ])
+        return cikti
+
+    try:
+        with ThreadPoolExecutor(max_workers=min(4, len(zamanlar)) or 1) as pool:
+            return list(pool.map(kare, enumerate(zamanlar)))
+    finally:
+        _gecici_dosyalari_temizle(temizlenecekler)
+
+
+def onizleme_klibi_olustur(video_yolu, altyazilar_data, output_folder, merkez: float, sure: float = 4.0, width: int | None = None, height: int | None = None, scale: float = PREVIEW_SCALE, **stil) -> str:
+    """Seçilen zamanın çevresindeki kısa bir pencereyi düşük çözünürlükte altyazılı kodlar."""
+    kok = os.path.splitext(os.path.basename(video_yolu))[0]
+    subtitles_filter, temizlenecekler = _altyazi_filtresi_hazirla(altyazilar_data, f"{kok}_onizleme", **stil)
+    # Altyazı orijinal zamanlarla çizilir, ardından zaman damgaları 0'dan başlatılır
+    zincir = _onizleme_zinciri(subtitles_filter, width, height, scale) + ",setpts=PTS-STARTPTS"
+    baslangic = max(0.0, float(merkez) - float(sure) / 2.0)
+    os.makedirs(output_folder, exist_ok=True)
+    cikti = os.path.join(output_folder, "klip.mp4")
+    try:
+        run_ffmpeg_command([
+            'ffmpeg',
+            '-ss', f'{baslangic:.3f}', '-copyts',
+            '-i', video_yolu,
+            '-t', f'{float(sure):.3f}',
+            '-vf', zincir,
+            '-af', 'asetpts=PTS-STARTPTS',
+            '-c:v', 'libx264',
+            '-preset', 'ultrafast',
+            '-crf', '28',
+            '-pix_fmt', 'yuv420p',
+            '-c:a', 'aac',
+            '-movflags', '+faststart',
+            '-y', cikti
+        ])
+    finally:
+        _gecici_dosyalari_temizle(temizlenecekler)
+    return cikti